@@ -1,13 +1,45 @@
-from flask import Flask, request, render_template, jsonify, send_file
+from flask import Flask, Request, Response, request, render_template, jsonify, send_file, url_for, stream_with_context
 import os
-from werkzeug.utils import secure_filename
+import io
 import json
-from utils.parser import extract_text_from_pdf, extract_text_from_txt
-from utils.enhancer import get_ats_score, get_suggestions, generate_enhanced_resume
-from utils.pdf_generator import generate_pdf_resume
-from utils.enhanced_resume import parse_resume_to_html  # Parses JSON to HTML preview
+import logging
+import sys
+import tempfile
+import uuid
+import zipfile
+from werkzeug.utils import secure_filename
+from utils.jobs import JobQueue, QueueFullError, JOB_DONE, JOB_FAILED
+from utils.pipeline import (run_pipeline, iter_pipeline, iter_batch, regenerate_resume_section, PipelineError,
+                            PIPELINE_MODES, ATS_SCORERS, EDITABLE_SECTIONS, BATCH_STAGES, BATCH_SCORE)
+from utils.archive import iter_zip_entries, iter_file_entries
+from utils.enhancer import gemini_cache
+from utils.skill_matcher import get_matcher
+from utils.jd_profile import jd_index, get_jd_profile, jd_profile_summary
+from utils.artifacts import artifact_store
+from utils.ats_api import ats_poller
+from utils.pdf_generator import render_pool, PDF_TEMPLATES
+from utils.metrics import request_context, render_metrics
+
+
+class SpoolingRequest(Request):
+    """Keeps uploaded files in memory up to UPLOAD_SPILL_THRESHOLD before spilling to a temp file."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=app.config['UPLOAD_SPILL_THRESHOLD'], mode='rb+')
+
+    @property
+    def max_content_length(self):
+        # Bulk uploads carry many resumes, so they get their own body limit
+        if self.endpoint == 'batch_upload':
+            return app.config['BATCH_MAX_CONTENT_LENGTH']
+        return super().max_content_length
+
 
 app = Flask(__name__)
+app.request_class = SpoolingRequest
+
+# Sampled span logs (see utils.metrics) are written through the standard logging module
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'), format='%(asctime)s %(levelname)s %(name)s %(message)s')
 
 # Configuration
 UPLOAD_FOLDER = 'uploads'
@@ -17,15 +49,159 @@ ALLOWED_EXTENSIONS = {'pdf', 'txt'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['OUTPUT_FOLDER'] = OUTPUT_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB
+# Uploads stay in memory up to this size; larger ones spill to disk
+app.config['UPLOAD_SPILL_THRESHOLD'] = int(os.getenv('UPLOAD_SPILL_THRESHOLD', 4 * 1024 * 1024))
+
+# Job queue: concurrent pipelines, extra jobs allowed to wait, seconds results are kept
+app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', 4))
+app.config['JOB_QUEUE_DEPTH'] = int(os.getenv('JOB_QUEUE_DEPTH', 16))
+app.config['JOB_RESULT_TTL'] = int(os.getenv('JOB_RESULT_TTL', 3600))
+app.config['JOB_RETRY_AFTER'] = int(os.getenv('JOB_RETRY_AFTER', 10))
+
+# "staged" (three LLM calls) or "fused" (one call); overridable per request with the "mode" field
+app.config['PIPELINE_MODE'] = os.getenv('PIPELINE_MODE', 'staged')
+# "llm" (Gemini), "local" (utils.scoring) or "sharpapi" (utils.ats_api); overridable per request with the "scorer" field
+app.config['ATS_SCORER'] = os.getenv('ATS_SCORER', 'llm')
+# Default layout from utils.pdf_generator.PDF_TEMPLATES; overridable per request with the "template" field
+app.config['PDF_TEMPLATE'] = os.getenv('PDF_TEMPLATE', 'classic')
+# Bulk uploads (/batch): request body, each resume once read (decompressed), all resumes read,
+# number of resumes, resumes processed at once and the default scorer
+app.config['BATCH_MAX_CONTENT_LENGTH'] = int(os.getenv('BATCH_MAX_CONTENT_LENGTH', 64 * 1024 * 1024))
+app.config['BATCH_MAX_ENTRY_BYTES'] = int(os.getenv('BATCH_MAX_ENTRY_BYTES', 16 * 1024 * 1024))
+app.config['BATCH_MAX_TOTAL_BYTES'] = int(os.getenv('BATCH_MAX_TOTAL_BYTES', 256 * 1024 * 1024))
+app.config['BATCH_MAX_ENTRIES'] = int(os.getenv('BATCH_MAX_ENTRIES', 500))
+app.config['BATCH_CONCURRENCY'] = int(os.getenv('BATCH_CONCURRENCY', 4))
+app.config['BATCH_SCORER'] = os.getenv('BATCH_SCORER', 'local')
+# Longest "instructions" text accepted when regenerating a single resume section
+app.config['SECTION_INSTRUCTIONS_MAX_CHARS'] = int(os.getenv('SECTION_INSTRUCTIONS_MAX_CHARS', 500))
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
+# Compile the skill automaton at import so it is built once and, with
+# `gunicorn --preload`, shared copy-on-write by every worker
+get_matcher()
+
+job_queue = JobQueue(max_workers=app.config['JOB_WORKERS'],
+                     max_pending=app.config['JOB_QUEUE_DEPTH'],
+                     result_ttl=app.config['JOB_RESULT_TTL'])
+artifact_store.start_sweeper()
+
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+class UploadError(Exception):
+    """Invalid upload form; the message is returned to the client with a 400."""
+
+
+def read_upload(file_storage):
+    """
+    Returns the uploaded file's contents as bytes, or, above
+    UPLOAD_SPILL_THRESHOLD, the path of a copy saved under a unique name.
+    """
+    stream = file_storage.stream
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    if size <= app.config['UPLOAD_SPILL_THRESHOLD']:
+        return stream.read()
+
+    # Unique name so concurrent uploads with the same filename don't collide
+    spill_filename = f"{uuid.uuid4().hex}_{secure_filename(file_storage.filename)}"
+    spill_path = os.path.join(app.config['UPLOAD_FOLDER'], spill_filename)
+    file_storage.save(spill_path)
+    return spill_path
+
+
+def take_upload_stream(file_storage):
+    """
+    Takes an upload's stream away from the request, rewound. Flask closes
+    the request's files as soon as the view returns, before a streamed
+    response is generated; the caller closes the returned stream instead.
+    """
+    stream = file_storage.stream
+    file_storage.stream = io.BytesIO()
+    stream.seek(0)
+    return stream
+
+
+def read_job_description():
+    """The form's job description, given as text or as the ID of a pre-registered profile."""
+    job_description_text = request.form.get('job_description', '').strip()
+    profile_id = request.form.get('jd_profile_id', '').strip()
+    if not job_description_text and profile_id:
+        profile = jd_index.get(profile_id)
+        if profile is None:
+            raise UploadError('Unknown jd_profile_id')
+        job_description_text = profile['text']
+    if not job_description_text:
+        raise UploadError('Job description is required')
+    return job_description_text
+
+
+def read_pipeline_options(default_scorer=None):
+    """The form's pipeline keyword arguments (mode, scorer, template), validated."""
+    mode = request.form.get('mode', app.config['PIPELINE_MODE'])
+    if mode not in PIPELINE_MODES:
+        raise UploadError(f"mode must be one of: {', '.join(PIPELINE_MODES)}")
+    scorer = request.form.get('scorer', default_scorer or app.config['ATS_SCORER'])
+    if scorer not in ATS_SCORERS:
+        raise UploadError(f"scorer must be one of: {', '.join(ATS_SCORERS)}")
+    template = request.form.get('template', app.config['PDF_TEMPLATE'])
+    if template not in PDF_TEMPLATES:
+        raise UploadError(f"template must be one of: {', '.join(PDF_TEMPLATES)}")
+    return {'mode': mode, 'scorer': scorer, 'template': template}
+
+
+def save_upload():
+    """
+    Validates the upload form and reads the resume.
+    Returns (resume_filename, resume_source, job_description_text, options)
+    where resume_source is bytes or a spilled path (see read_upload) and
+    options holds the pipeline keyword arguments.
+    """
+    # Validate uploaded file
+    if 'resume' not in request.files:
+        raise UploadError('No resume file uploaded')
+    resume_file = request.files['resume']
+    if resume_file.filename == '':
+        raise UploadError('No resume file selected')
+    if not allowed_file(resume_file.filename):
+        raise UploadError('Resume must be PDF or TXT file')
+
+    job_description_text = read_job_description()
+    options = read_pipeline_options()
+    resume_source = read_upload(resume_file)
+    return resume_file.filename, resume_source, job_description_text, options
+
+
+def discard_upload(resume_source):
+    if isinstance(resume_source, str) and os.path.exists(resume_source):
+        os.remove(resume_source)
+
+
+def busy_response():
+    """429 for a full job queue, with Retry-After."""
+    response = jsonify({'error': 'Server is busy, please retry shortly'})
+    response.headers['Retry-After'] = str(app.config['JOB_RETRY_AFTER'])
+    return response, 429
+
+
+def run_job(job_id, resume_filename, resume_source, job_description_text, **options):
+    # The job ID doubles as the request ID that spans and logs are tagged with
+    with request_context(job_id):
+        result = run_pipeline(resume_filename, resume_source, job_description_text, **options)
+    if result.get('pdf_digest'):
+        result['pdf_generated'] = artifact_store.link(job_id, result['pdf_digest'])
+    return result
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -34,82 +210,321 @@ def index():
 @app.route('/upload', methods=['POST'])
 def upload_files():
     try:
-        # Validate uploaded file
-        if 'resume' not in request.files:
-            return jsonify({'error': 'No resume file uploaded'}), 400
-        resume_file = request.files['resume']
-        if resume_file.filename == '':
-            return jsonify({'error': 'No resume file selected'}), 400
-        if not allowed_file(resume_file.filename):
-            return jsonify({'error': 'Resume must be PDF or TXT file'}), 400
-
-        resume_filename = secure_filename(resume_file.filename)
-        resume_path = os.path.join(app.config['UPLOAD_FOLDER'], resume_filename)
-        resume_file.save(resume_path)
-
-        # Job description
-        job_description_text = request.form.get('job_description', '').strip()
-        if not job_description_text:
-            return jsonify({'error': 'Job description is required'}), 400
-
-        # Extract resume text
-        resume_text = extract_text_from_pdf(resume_path) if resume_filename.endswith('.pdf') else extract_text_from_txt(resume_path)
-
-        # ATS scoring (already returns dict, no need for json.loads)
-        ats_result = get_ats_score(resume_text, job_description_text)
-        if ats_result is None:
-            ats_result = {
-                "overall_match": "N/A",
-                "skills_match": "N/A",
-                "experience_match": "N/A",
-                "education_match": "N/A",
-                "explanations": "Failed to generate ATS score"
-            }
-        print(ats_result)
-        # Suggestions
-        suggestions_json = get_suggestions(resume_text, job_description_text, ats_result) or {}
-        print(suggestions_json)
-
-        # Enhanced resume (expects ats_result dict, not string)
-        enhanced_resume_json = generate_enhanced_resume(resume_text, job_description_text, ats_result, suggestions_json)
-        print(enhanced_resume_json)
-
-        if not isinstance(enhanced_resume_json, dict):
-            return jsonify({'error': 'Failed to generate enhanced resume'}), 500
-
-        # Convert to HTML for preview
-        enhanced_resume_html = parse_resume_to_html(enhanced_resume_json)
-
-        # Generate PDF
-        enhanced_resume_path = os.path.join(app.config['OUTPUT_FOLDER'], 'enhanced_resume.pdf')
-        pdf_generated = generate_pdf_resume(enhanced_resume_path, enhanced_resume_json)
-
-        # Clean up uploaded file
-        os.remove(resume_path)
-
-        return render_template(
-            'results.html',
-            ats_result=ats_result,
-            suggestions=suggestions_json,
-            enhanced_resume=enhanced_resume_html,
-            pdf_generated=pdf_generated
-        )
+        resume_filename, resume_source, job_description_text, options = save_upload()
 
+        job_id = uuid.uuid4().hex
+        try:
+            job_queue.submit(run_job, job_id, resume_filename, resume_source, job_description_text,
+                             job_id=job_id, **options)
+        except QueueFullError:
+            discard_upload(resume_source)
+            return busy_response()
+
+        response = jsonify({
+            'job_id': job_id,
+            'status_url': url_for('job_status', job_id=job_id),
+            'result_url': url_for('job_result', job_id=job_id)
+        })
+        response.headers['X-Request-ID'] = job_id
+        return response, 202
+
+    except UploadError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/download')
-def download_resume():
+@app.route('/upload/stream', methods=['POST'])
+def upload_files_stream():
+    """
+    Streaming variant of /upload: runs the pipeline in this request and pushes
+    each stage to the client as a Server-Sent Event as soon as it completes.
+    The stream holds one of the job queue's slots, so it is limited (and
+    answered with 429 when full) exactly like /upload.
+    """
+    try:
+        resume_filename, resume_source, job_description_text, options = save_upload()
+    except UploadError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
     try:
-        enhanced_resume_path = os.path.join(app.config['OUTPUT_FOLDER'], 'enhanced_resume.pdf')
-        if os.path.exists(enhanced_resume_path):
-            return send_file(enhanced_resume_path, as_attachment=True, download_name='enhanced_resume.pdf')
+        job_queue.acquire_slot()
+    except QueueFullError:
+        discard_upload(resume_source)
+        return busy_response()
+
+    job_id = uuid.uuid4().hex
+
+    def generate():
+        try:
+            # Spans for this stream are tagged with its job ID
+            with request_context(job_id):
+                for event, data in iter_pipeline(resume_filename, resume_source, job_description_text, **options):
+                    if event == 'done':
+                        download_url = None
+                        if data['pdf_generated'] and artifact_store.link(job_id, data['pdf_digest']):
+                            download_url = url_for('download_resume', job_id=job_id)
+                        data = {'job_id': job_id, 'download_url': download_url}
+                    yield sse_event(event, data)
+        except Exception as e:
+            yield sse_event('error', {'error': str(e)})
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no', 'X-Request-ID': job_id})
+    # Runs when the server closes the response, even if the stream was never read
+    response.call_on_close(job_queue.release_slot)
+    return response
+
+
+@app.route('/batch', methods=['POST'])
+def batch_upload():
+    """
+    Scores many resumes against one job description: a ZIP of PDF/TXT
+    resumes as "archive", or several files as "resumes", plus the usual JD
+    and pipeline fields. "stage" is "score" (default) or "enhance". Each
+    candidate's result is streamed back as one NDJSON line as soon as it is
+    ready, in completion order, followed by a summary line.
+    """
+    # Upload streams taken from the request; closed once the response is done
+    streams = []
+
+    def close_streams():
+        for stream in streams:
+            stream.close()
+
+    try:
+        job_description_text = read_job_description()
+        options = read_pipeline_options(default_scorer=app.config['BATCH_SCORER'])
+        stage = request.form.get('stage', BATCH_SCORE)
+        if stage not in BATCH_STAGES:
+            raise UploadError(f"stage must be one of: {', '.join(BATCH_STAGES)}")
+
+        limits = (ALLOWED_EXTENSIONS, app.config['BATCH_MAX_ENTRY_BYTES'], app.config['BATCH_MAX_TOTAL_BYTES'],
+                  app.config['BATCH_MAX_ENTRIES'])
+        archive_file = request.files.get('archive')
+        if archive_file is not None and archive_file.filename:
+            streams.append(take_upload_stream(archive_file))
+            try:
+                # Read straight from the (spooled) upload; nothing is extracted to disk
+                archive = zipfile.ZipFile(streams[0])
+            except zipfile.BadZipFile:
+                raise UploadError('archive must be a ZIP file')
+            entries = iter_zip_entries(archive, *limits)
+        elif request.files.getlist('resumes'):
+            uploads = [(f.filename, take_upload_stream(f)) for f in request.files.getlist('resumes') if f.filename]
+            streams.extend(stream for _, stream in uploads)
+            entries = iter_file_entries(uploads, *limits)
+        else:
+            raise UploadError('Upload a ZIP as "archive" or resume files as "resumes"')
+    except UploadError as e:
+        close_streams()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        close_streams()
+        return jsonify({'error': str(e)}), 500
+
+    batch_id = uuid.uuid4().hex
+
+    def generate():
+        summary = {'batch_id': batch_id, 'candidates': 0, 'errors': 0}
+        try:
+            with request_context(batch_id):
+                for result in iter_batch(entries, job_description_text, stage=stage,
+                                         max_concurrency=app.config['BATCH_CONCURRENCY'], **options):
+                    pdf_digest = result.pop('pdf_digest', None)
+                    # Each candidate's PDF is downloadable under its own ID
+                    candidate_id = f"{batch_id}-{result['index']}"
+                    if pdf_digest and artifact_store.link(candidate_id, pdf_digest):
+                        result['download_url'] = url_for('download_resume', job_id=candidate_id)
+                    summary['candidates'] += 1
+                    summary['errors'] += 'error' in result
+                    yield json.dumps(result) + '\n'
+        except Exception as e:
+            summary['error'] = str(e)
+        yield json.dumps({'summary': summary}) + '\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no', 'X-Request-ID': batch_id})
+    # Runs when the server closes the response, even if the client left before it was read
+    response.call_on_close(close_streams)
+    return response
+
+
+@app.route('/jd', methods=['POST'])
+def register_job_description():
+    """Pre-registers a job description and returns its profile ID for later uploads."""
+    data = request.get_json(silent=True) or request.form
+    job_description_text = (data.get('job_description') or '').strip()
+    if not job_description_text:
+        return jsonify({'error': 'Job description is required'}), 400
+    profile = get_jd_profile(job_description_text)
+    return jsonify({'profile_id': profile['id'], 'profile': jd_profile_summary(profile)}), 201
+
+
+@app.route('/jd/<profile_id>')
+def get_job_description(profile_id):
+    profile = jd_index.get(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Job description profile not found'}), 404
+    return jsonify({'profile_id': profile['id'], 'profile': jd_profile_summary(profile)})
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    status = job_queue.status(job_id)
+    if status is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(status)
+
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] == JOB_FAILED:
+        return jsonify({'error': job['error']}), 500
+    if job['status'] != JOB_DONE:
+        return jsonify(job_queue.status(job_id)), 202
+
+    result = job['result']
+    if request.args.get('format') == 'json':
+        return jsonify(result)
+    return render_template(
+        'results.html',
+        ats_result=result['ats_result'],
+        suggestions=result['suggestions'],
+        enhanced_resume=result['enhanced_resume'],
+        pdf_generated=result['pdf_generated'],
+        download_url=url_for('download_resume', job_id=job_id)
+    )
+
+
+@app.route('/resume/sections/<section>', methods=['POST'])
+@app.route('/jobs/<job_id>/sections/<section>', methods=['POST'])
+def edit_section(section, job_id=None):
+    """
+    Regenerates one section of an enhanced resume: that of a finished job, or
+    one posted as "resume" along with "profile_id" or "job_description".
+    Optional fields: "index" (which experience entry), "instructions" and "template".
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        if section not in EDITABLE_SECTIONS:
+            return jsonify({'error': f"section must be one of: {', '.join(EDITABLE_SECTIONS)}"}), 400
+
+        job = None
+        if job_id is not None:
+            job = job_queue.get(job_id)
+            if job is None:
+                return jsonify({'error': 'Job not found'}), 404
+            if job['status'] != JOB_DONE:
+                return jsonify({'error': 'Job has not finished'}), 409
+            resume_json = job['result']['enhanced_resume_json']
+            profile = jd_index.get(job['result'].get('jd_profile_id'))
         else:
+            resume_json = data.get('resume')
+            if not isinstance(resume_json, dict):
+                return jsonify({'error': 'resume must be an enhanced resume JSON object'}), 400
+            if data.get('profile_id'):
+                profile = jd_index.get(data['profile_id'])
+                if profile is None:
+                    return jsonify({'error': 'Job description profile not found'}), 404
+            elif data.get('job_description'):
+                profile = get_jd_profile(data['job_description'])
+            else:
+                profile = None
+
+        index = None
+        if section == 'experience':
+            entries = resume_json.get('experience') or []
+            try:
+                index = int(data.get('index', 0))
+            except (TypeError, ValueError):
+                index = -1
+            if not 0 <= index < len(entries):
+                return jsonify({'error': f"index must be between 0 and {len(entries) - 1}"}), 400
+
+        template = data.get('template', app.config['PDF_TEMPLATE'])
+        if template not in PDF_TEMPLATES:
+            return jsonify({'error': f"template must be one of: {', '.join(PDF_TEMPLATES)}"}), 400
+        instructions = str(data.get('instructions') or '')[:app.config['SECTION_INSTRUCTIONS_MAX_CHARS']]
+
+        edit_id = job_id or uuid.uuid4().hex
+        try:
+            with request_context(edit_id):
+                result = regenerate_resume_section(resume_json, section, jd_profile=profile, index=index,
+                                                   instructions=instructions, template=template)
+        except PipelineError as e:
+            return jsonify({'error': str(e)}), 502
+
+        if job is not None:
+            job['result'] = {**job['result'], **{key: result[key] for key in (
+                'enhanced_resume_json', 'enhanced_resume', 'pdf_generated', 'pdf_digest')}}
+        download_url = None
+        pdf_digest = result.pop('pdf_digest')
+        if result['pdf_generated'] and artifact_store.link(edit_id, pdf_digest):
+            download_url = url_for('download_resume', job_id=edit_id)
+        result['pdf_generated'] = download_url is not None
+        return jsonify({**result, 'download_url': download_url})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/jobs')
+def job_stats():
+    return jsonify({**job_queue.stats(), 'sharpapi_poller': ats_poller.stats()})
+
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(gemini_cache.stats())
+
+
+@app.route('/metrics')
+def metrics():
+    """Stage, Gemini and token metrics in the Prometheus text format."""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/artifacts/stats')
+def artifact_stats():
+    return jsonify(dict(artifact_store.stats(), render_pool=render_pool.stats()))
+
+
+@app.route('/download/<job_id>')
+def download_resume(job_id):
+    try:
+        artifact = artifact_store.get(job_id)
+        if artifact is None:
             return jsonify({'error': 'Enhanced resume not found'}), 404
+        digest, pdf_data, pdf_path = artifact
+        # The digest is a content hash, so it doubles as a strong ETag for conditional GETs
+        if pdf_data is not None:
+            response = send_file(io.BytesIO(pdf_data), mimetype='application/pdf', as_attachment=True,
+                                 download_name='enhanced_resume.pdf', etag=digest, conditional=True)
+        else:
+            response = send_file(pdf_path, mimetype='application/pdf', as_attachment=True,
+                                 download_name='enhanced_resume.pdf', etag=digest, conditional=True)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/download')
+def download_latest_resume():
+    """The old single-PDF download; PDFs are now per job, so point clients at /download/<job_id>."""
+    return jsonify({'error': 'PDFs are downloaded per job from /download/<job_id>; '
+                             'use the download_url returned with the job result'}), 410
+
+
 if __name__ == '__main__':
+    # The PDF render and extraction pools spawn their workers, and a spawned worker first re-runs
+    # the parent's main script. Their tasks all live in utils/, so hide this script from them;
+    # otherwise each worker would rebuild the app, its job queue and the artifact sweeper.
+    sys.modules['__main__'].__file__ = None
+    sys.modules['__main__'].__spec__ = None
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,147 @@
+"""
+ASGI entry point.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+POST /upload/stream is served natively: the pipeline runs as a coroutine
+on the server's event loop (utils.pipeline.iter_pipeline_async), so one
+worker process can hold hundreds of in-flight LLM calls without a thread
+each. Every other route is passed through to the Flask app in app.py via
+asgiref's WSGI adapter, so both entry points behave the same.
+"""
+import asyncio
+import io
+import json
+import uuid
+from contextlib import aclosing
+from urllib.parse import quote
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import url_for
+
+from app import app, discard_upload, job_queue, save_upload, sse_event, QueueFullError, UploadError
+from utils.artifacts import artifact_store
+from utils.metrics import request_context
+from utils.pipeline import iter_pipeline_async
+
+wsgi_application = WsgiToAsgi(app)
+
+
+async def read_body(receive, limit):
+    """Reads the request body, returning None if it exceeds limit bytes."""
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        body = message.get("body", b"")
+        size += len(body)
+        if limit and size > limit:
+            return None
+        chunks.append(body)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def build_environ(scope, body):
+    """Minimal WSGI environ for running Flask request parsing on an ASGI request."""
+    headers = {name.decode("latin1").lower(): value.decode("latin1") for name, value in scope["headers"]}
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": quote(scope["path"]),
+        "QUERY_STRING": scope["query_string"].decode("latin1"),
+        "CONTENT_TYPE": headers.get("content-type", ""),
+        "CONTENT_LENGTH": str(len(body)),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": io.StringIO(),
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in headers.items():
+        if name not in ("content-type", "content-length"):
+            environ["HTTP_" + name.upper().replace("-", "_")] = value
+    return environ
+
+
+def parse_upload(environ, job_id):
+    """Validates the form with app.save_upload; returns its result plus the job's download URL."""
+    with app.request_context(environ):
+        upload = save_upload()
+        return upload, url_for('download_resume', job_id=job_id)
+
+
+async def send_json(send, status, data, headers=()):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"), *headers]})
+    await send({"type": "http.response.body", "body": json.dumps(data).encode("utf-8")})
+
+
+async def upload_stream(scope, receive, send):
+    """
+    Async twin of app.upload_files_stream: same form, same Server-Sent Events,
+    and the same job queue slot (429 when the queue is full).
+    """
+    body = await read_body(receive, app.config['MAX_CONTENT_LENGTH'])
+    if body is None:
+        await send_json(send, 413, {'error': 'Request body too large'})
+        return
+
+    job_id = uuid.uuid4().hex
+    try:
+        upload, download_url = await asyncio.to_thread(parse_upload, build_environ(scope, body), job_id)
+    except UploadError as e:
+        await send_json(send, 400, {'error': str(e)})
+        return
+    except Exception as e:
+        await send_json(send, 500, {'error': str(e)})
+        return
+    resume_filename, resume_source, job_description_text, options = upload
+    try:
+        job_queue.acquire_slot()
+    except QueueFullError:
+        discard_upload(resume_source)
+        await send_json(send, 429, {'error': 'Server is busy, please retry shortly'},
+                        [(b"retry-after", str(app.config['JOB_RETRY_AFTER']).encode("ascii"))])
+        return
+
+    try:
+        await stream_events(send, job_id, download_url, resume_filename, resume_source,
+                            job_description_text, options)
+    finally:
+        job_queue.release_slot()
+
+
+async def stream_events(send, job_id, download_url, resume_filename, resume_source, job_description_text,
+                        options):
+    await send({"type": "http.response.start", "status": 200, "headers": [
+        (b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache"),
+        (b"x-accel-buffering", b"no"), (b"x-request-id", job_id.encode("ascii"))]})
+    try:
+        with request_context(job_id):
+            events = iter_pipeline_async(resume_filename, resume_source, job_description_text, **options)
+            async with aclosing(events):
+                async for event, data in events:
+                    if event == 'done':
+                        linked = data['pdf_generated'] and artifact_store.link(job_id, data['pdf_digest'])
+                        data = {'job_id': job_id, 'download_url': download_url if linked else None}
+                    await send({"type": "http.response.body", "body": sse_event(event, data).encode("utf-8"),
+                                "more_body": True})
+    except Exception as e:
+        await send({"type": "http.response.body", "body": sse_event('error', {'error': str(e)}).encode("utf-8"),
+                    "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == "/upload/stream":
+        await upload_stream(scope, receive, send)
+    else:
+        await wsgi_application(scope, receive, send)
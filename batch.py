@@ -0,0 +1,159 @@
+"""
+Batch ranking CLI.
+
+Ranks one resume against a directory of job descriptions, or one job
+description against a directory of resumes, using a process pool:
+
+    python batch.py --resume-file resume.pdf --jd-dir jobs/
+    python batch.py --jd-file job.txt --resume-dir applicants/ --workers 8 --stage enhance
+
+Each finished pair is appended to the checkpoint file as a JSON line as soon
+as it completes; re-running with the same checkpoint skips pairs already in
+it. When every pair is done, all results are written as JSONL sorted by
+overall_match (highest first) to --output, or stdout.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils.parser import extract_text
+from utils.compaction import compact_resume
+from utils.enhancer import get_suggestions, generate_enhanced_resume
+from utils.pdf_generator import generate_pdf_resume
+from utils.jd_profile import get_jd_profile
+from utils.pipeline import score_ats, ATS_SCORERS, SCORER_LOCAL
+
+STAGE_SCORE = "score"
+STAGE_ENHANCE = "enhance"
+ALLOWED_EXTENSIONS = ('.pdf', '.txt')
+
+
+def list_documents(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.lower().endswith(ALLOWED_EXTENSIONS))
+
+
+def pair_key(resume_path, jd_path):
+    return f"{os.path.abspath(resume_path)}::{os.path.abspath(jd_path)}"
+
+
+def process_pair(resume_path, jd_path, stage, scorer, output_dir):
+    """Runs one resume/JD pair in a worker process and returns a JSON-safe result."""
+    started = time.perf_counter()
+    result = {"key": pair_key(resume_path, jd_path), "resume": resume_path, "job_description": jd_path}
+    try:
+        resume_text, compaction = compact_resume(extract_text(resume_path))
+        result["tokens_saved"] = compaction["tokens_saved"]
+        # Each worker builds the profile for a JD once and reuses it for every resume
+        jd_profile = get_jd_profile(extract_text(jd_path))
+        job_description_text = jd_profile["text"]
+        ats_result = score_ats(resume_text, job_description_text, scorer, jd_profile)
+        result["ats_result"] = ats_result
+
+        if stage == STAGE_ENHANCE:
+            suggestions = get_suggestions(resume_text, job_description_text, ats_result) or {}
+            enhanced_resume = generate_enhanced_resume(resume_text, job_description_text, ats_result, suggestions)
+            result["suggestions"] = suggestions
+            result["enhanced_resume"] = enhanced_resume
+            if isinstance(enhanced_resume, dict) and output_dir:
+                stem = (f"{os.path.splitext(os.path.basename(resume_path))[0]}__"
+                        f"{os.path.splitext(os.path.basename(jd_path))[0]}")
+                pdf_path = os.path.join(output_dir, f"{stem}.pdf")
+                if generate_pdf_resume(pdf_path, enhanced_resume):
+                    result["pdf"] = pdf_path
+    except Exception as e:
+        result["error"] = str(e)
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def load_checkpoint(path):
+    """Returns {pair key: result} for every complete line in the checkpoint."""
+    done = {}
+    if not path or not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # A partial last line from an interrupted run
+            if "key" in entry and "error" not in entry:
+                done[entry["key"]] = entry
+    return done
+
+
+def score_of(result):
+    score = result.get("ats_result", {}).get("overall_match")
+    return score if isinstance(score, (int, float)) else -1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Rank resumes against job descriptions in bulk.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--resume-file", help="One resume to rank against every file in --jd-dir")
+    source.add_argument("--jd-file", help="One job description to rank every file in --resume-dir against")
+    parser.add_argument("--jd-dir", help="Directory of job descriptions (PDF/TXT)")
+    parser.add_argument("--resume-dir", help="Directory of resumes (PDF/TXT)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Worker processes")
+    parser.add_argument("--stage", choices=(STAGE_SCORE, STAGE_ENHANCE), default=STAGE_SCORE,
+                        help="score only, or also generate suggestions and the enhanced resume")
+    parser.add_argument("--scorer", choices=ATS_SCORERS, default=SCORER_LOCAL, help="ATS scorer to use")
+    parser.add_argument("--checkpoint", default="batch_checkpoint.jsonl",
+                        help="JSONL file finished pairs are appended to; existing entries are skipped")
+    parser.add_argument("--output-dir", default="output", help="Where enhanced PDFs are written (enhance stage)")
+    parser.add_argument("--output", help="Write sorted JSONL here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.resume_file and not args.jd_dir:
+        parser.error("--resume-file requires --jd-dir")
+    if args.jd_file and not args.resume_dir:
+        parser.error("--jd-file requires --resume-dir")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.resume_file:
+        pairs = [(args.resume_file, jd_path) for jd_path in list_documents(args.jd_dir)]
+    else:
+        pairs = [(resume_path, args.jd_file) for resume_path in list_documents(args.resume_dir)]
+
+    results = load_checkpoint(args.checkpoint)
+    pending = [pair for pair in pairs if pair_key(*pair) not in results]
+    print(f"{len(pairs)} pairs, {len(pairs) - len(pending)} already in checkpoint, {len(pending)} to run",
+          file=sys.stderr)
+
+    if args.stage == STAGE_ENHANCE:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    if pending:
+        with open(args.checkpoint, "a", encoding="utf-8") as checkpoint, \
+                ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(process_pair, resume_path, jd_path, args.stage, args.scorer, args.output_dir)
+                       for resume_path, jd_path in pending]
+            for completed, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                checkpoint.write(json.dumps(result) + "\n")
+                checkpoint.flush()
+                results[result["key"]] = result
+                status = f"error: {result['error']}" if "error" in result else f"score {score_of(result)}"
+                print(f"[{completed}/{len(pending)}] {os.path.basename(result['resume'])} vs "
+                      f"{os.path.basename(result['job_description'])}: {status}", file=sys.stderr)
+
+    keys = {pair_key(*pair) for pair in pairs}
+    ranked = sorted((r for k, r in results.items() if k in keys), key=score_of, reverse=True)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for result in ranked:
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+"""
+Microbenchmarks for the local (non-LLM) pipeline stages.
+
+Runs each stage against synthetic resumes and job descriptions of growing
+size and reports throughput, p50/p95 latency and peak Python memory:
+
+    python benchmark.py
+    python benchmark.py --quick --stage extract_pdf --stage render_pdf
+    python benchmark.py --output baseline.json
+    python benchmark.py --compare baseline.json --threshold 15
+
+Everything is generated locally, so it runs offline. Results are written as
+JSON with --output; --compare diffs a run against a saved baseline and exits
+with status 1 if any case's p50 got slower by more than --threshold percent.
+Peak memory is measured with tracemalloc in a separate run of each case so it
+doesn't skew the timings; it covers Python allocations only, not memory held
+by PyMuPDF or other C extensions.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+
+import fitz  # PyMuPDF
+
+from utils import parser as extract
+from utils.enhanced_resume import parse_resume_to_html, html_cache
+from utils.pdf_generator import generate_pdf_resume
+from utils.scoring import score_resume_local
+from utils.segmentation import segment_resume, text_lines
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PAGE_SIZES = (1, 5, 20, 50)
+BULLET_SIZES = (10, 50, 200, 500)
+QUICK_PAGE_SIZES = (1, 5)
+QUICK_BULLET_SIZES = (10, 50)
+
+SKILLS = ["Python", "JavaScript", "React", "Node.js", "AWS", "SQL", "Docker", "Kubernetes",
+          "TypeScript", "MongoDB", "PostgreSQL", "Redis", "Terraform", "GraphQL", "CI/CD"]
+VERBS = ["Built", "Led", "Designed", "Migrated", "Optimised", "Automated", "Shipped", "Scaled"]
+OBJECTS = ["a payments API", "the data pipeline", "an internal dashboard", "the search service",
+           "deployment tooling", "a recommendation engine", "the auth layer", "observability"]
+
+
+def load_source_module(name, relative_path):
+    """Imports a module by path, so the src/ demo copy doesn't shadow the main utils package."""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bullet(i):
+    skill = SKILLS[i % len(SKILLS)]
+    return (f"{VERBS[i % len(VERBS)]} {OBJECTS[(i // len(VERBS)) % len(OBJECTS)]} in {skill}, "
+            f"cutting p95 latency by {10 + i % 60}% for {1 + i % 9} teams")
+
+
+def synthetic_resume_json(bullets):
+    """Enhanced-resume JSON with `bullets` responsibilities spread over jobs of ten each."""
+    jobs = [{
+        "title": "Senior Software Engineer",
+        "company": f"Company {n}",
+        "location": "Remote",
+        "duration": f"{2024 - 2 * n - 2} - {2024 - 2 * n}",
+        "responsibilities": [bullet(i) for i in range(start, min(start + 10, bullets))]
+    } for n, start in enumerate(range(0, bullets, 10))]
+    return {
+        "name": "Alex Example",
+        "contact_info": "alex@example.com | +1 555 0100 | linkedin.com/in/alex",
+        "summary": "Backend engineer focused on reliable, observable distributed systems. " * 3,
+        "skills": SKILLS,
+        "experience": jobs,
+        "education": [{"degree": "B.Sc. Computer Science", "institution": "State University",
+                       "graduation_year": "2014"}],
+        "selected_projects": [f"Project {i}: {bullet(i)}" for i in range(min(5, bullets))]
+    }
+
+
+def synthetic_resume_text(bullets):
+    resume = synthetic_resume_json(bullets)
+    lines = [resume["name"], resume["contact_info"], "", "Summary", resume["summary"], "",
+             "Skills", ", ".join(resume["skills"]), "", "Experience"]
+    for job in resume["experience"]:
+        lines.append(f"{job['title']} - {job['company']} ({job['duration']})")
+        lines.extend(f"- {item}" for item in job["responsibilities"])
+    lines += ["", "Education", "B.Sc. Computer Science, State University, 2014"]
+    return "\n".join(lines)
+
+
+def synthetic_job_description(bullets):
+    requirements = [f"- {3 + i % 5}+ years of experience with {SKILLS[i % len(SKILLS)]} and "
+                    f"{OBJECTS[i % len(OBJECTS)]}" for i in range(max(5, bullets // 5))]
+    return "\n".join(["Senior Backend Engineer", "", "Requirements:"] + requirements
+                     + ["", "Bachelor's degree in Computer Science or related field."])
+
+
+def write_synthetic_pdf(path, pages):
+    """Writes a text PDF of `pages` letter pages, each filled with resume bullets."""
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page(width=612, height=792)
+        text = "\n".join(bullet(page_num * 45 + i) for i in range(45))
+        page.insert_textbox(fitz.Rect(50, 50, 562, 742), text, fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def measure(fn, iterations, warmup=2):
+    """Times fn() and returns throughput, latency percentiles and peak traced memory."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "iterations": iterations,
+        "throughput_per_s": round(iterations / elapsed, 2) if elapsed else None,
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+class CaseInputs:
+    """
+    Synthetic inputs and src/ baseline modules for the cases, made on first
+    use, so a run limited with --stage only builds what its stages need.
+    """
+
+    def __init__(self, workdir):
+        self.workdir = workdir
+        self._made = {}
+
+    def _once(self, key, make):
+        if key not in self._made:
+            self._made[key] = make()
+        return self._made[key]
+
+    def pdf_path(self, pages):
+        def make():
+            path = os.path.join(self.workdir, f"resume_{pages}p.pdf")
+            write_synthetic_pdf(path, pages)
+            return path
+        return self._once(("pdf", pages), make)
+
+    def txt_path(self, bullets):
+        def make():
+            path = os.path.join(self.workdir, f"resume_{bullets}b.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(synthetic_resume_text(bullets))
+            return path
+        return self._once(("txt", bullets), make)
+
+    def resume_pdf(self, bullets):
+        def make():
+            buffer = BytesIO()
+            generate_pdf_resume(buffer, synthetic_resume_json(bullets))
+            return buffer.getvalue()
+        return self._once(("resume_pdf", bullets), make)
+
+    def src_module(self, name, relative_path):
+        """
+        A src/ module, loaded with the temp dir as working directory so the
+        directories src/app.py creates at import land there. None if its
+        dependencies (e.g. flask_cors) aren't installed.
+        """
+        def make():
+            cwd = os.getcwd()
+            os.chdir(self.workdir)
+            try:
+                return load_source_module(name, relative_path)
+            except ImportError as e:
+                print(f"Skipping {relative_path} baselines: {e}", file=sys.stderr)
+                return None
+            finally:
+                os.chdir(cwd)
+        return self._once(("module", name), make)
+
+
+def _src_case(inputs, name, relative_path, call):
+    """Setup for a src/ baseline case: call(module) is timed, or None if the module can't load."""
+    module = inputs.src_module(name, relative_path)
+    return None if module is None else (lambda: call(module))
+
+
+def build_cases(workdir, page_sizes, bullet_sizes):
+    """
+    Returns [(stage, size label, setup)] for every stage and input size.
+    setup() builds that case's inputs and returns the zero-argument callable
+    to time (or None if the case can't run here).
+    """
+    inputs = CaseInputs(workdir)
+    cases = []
+    for pages in page_sizes:
+        def extract_pdf(pages=pages):
+            path = inputs.pdf_path(pages)
+
+            def run():
+                # Measure real extraction, not the content-hash cache
+                extract._text_cache.clear()
+                extract.extract_text_from_pdf(path)
+            return run
+
+        cases += [
+            ("extract_pdf", f"{pages}p", extract_pdf),
+            ("src_extract_pdf", f"{pages}p",
+             lambda pages=pages: _src_case(inputs, "src_utils_parser", "src/utils/parser.py",
+                                           lambda m, p=inputs.pdf_path(pages): m.extract_text_from_pdf(p))),
+        ]
+
+    for bullets in bullet_sizes:
+        label = f"{bullets}b"
+        resume_json = synthetic_resume_json(bullets)
+        resume_text = synthetic_resume_text(bullets)
+        job_description_text = synthetic_job_description(bullets)
+        src_pdf_path = os.path.join(workdir, f"src_resume_{bullets}b.pdf")
+
+        def segment_pdf(bullets=bullets):
+            data = inputs.resume_pdf(bullets)
+
+            def run():
+                extract._text_cache.clear()
+                extract.extract_resume_structure_from_pdf_bytes(data)
+            return run
+
+        def render_html(resume=resume_json):
+            html_cache.clear()
+            parse_resume_to_html(resume)
+
+        cases += [
+            ("extract_txt", label, lambda b=bullets: (lambda p=inputs.txt_path(b): extract.extract_text_from_txt(p))),
+            ("segment_pdf", label, segment_pdf),
+            ("segment_txt", label, lambda t=resume_text: lambda: segment_resume(text_lines(t))),
+            ("src_extract_txt", label,
+             lambda b=bullets: _src_case(inputs, "src_utils_parser", "src/utils/parser.py",
+                                         lambda m, p=inputs.txt_path(b): m.extract_text_from_txt(p))),
+            ("render_html", label, lambda run=render_html: run),
+            ("render_pdf", label, lambda r=resume_json: lambda: generate_pdf_resume(BytesIO(), r)),
+            ("src_render_pdf", label,
+             lambda p=src_pdf_path, t=resume_text: _src_case(inputs, "src_utils_pdf_generator",
+                                                             "src/utils/pdf_generator.py",
+                                                             lambda m: m.generate_pdf_resume(p, t))),
+            ("mock_ats_score", label,
+             lambda r=resume_text, j=job_description_text: _src_case(inputs, "src_app", "src/app.py",
+                                                                     lambda m: m.get_mock_ats_score(r, j))),
+            ("local_ats_score", label,
+             lambda r=resume_text, j=job_description_text: lambda: score_resume_local(r, j)),
+        ]
+    return cases
+
+
+def compare(results, baseline, threshold):
+    """Prints p50 changes against a baseline and returns the cases that regressed."""
+    previous = {(r["stage"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get((result["stage"], result["size"]))
+        if old is None or not old["p50_ms"]:
+            continue
+        change = (result["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{result['stage']:<18} {result['size']:>5}  p50 {old['p50_ms']:>9.3f} -> "
+              f"{result['p50_ms']:>9.3f} ms ({change:+.1f}%){flag}", file=sys.stderr)
+        if flag:
+            regressions.append(result)
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the local pipeline stages.")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed runs per case")
+    parser.add_argument("--quick", action="store_true", help="Only the smallest input sizes")
+    parser.add_argument("--stage", action="append", help="Only run this stage (repeatable)")
+    parser.add_argument("--output", help="Write results as JSON here (use as a baseline later)")
+    parser.add_argument("--compare", help="Baseline JSON to diff against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="p50 slowdown in percent that counts as a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    page_sizes = QUICK_PAGE_SIZES if args.quick else PAGE_SIZES
+    bullet_sizes = QUICK_BULLET_SIZES if args.quick else BULLET_SIZES
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="resume-bench-") as workdir:
+        for stage, size, setup in build_cases(workdir, page_sizes, bullet_sizes):
+            if args.stage and stage not in args.stage:
+                continue
+            fn = setup()
+            if fn is None:
+                continue
+            result = dict(stage=stage, size=size, **measure(fn, args.iterations))
+            results.append(result)
+            print(f"{stage:<18} {size:>5}  {result['throughput_per_s']:>9} ops/s  p50 {result['p50_ms']:>9.3f} ms  "
+                  f"p95 {result['p95_ms']:>9.3f} ms  peak {result['peak_kib']:>9} KiB", file=sys.stderr)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "iterations": args.iterations,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
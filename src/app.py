@@ -5,6 +5,7 @@ import json
 from werkzeug.utils import secure_filename
 from utils.parser import extract_text_from_pdf, extract_text_from_txt
 from utils.pdf_generator import generate_pdf_resume
+from utils.skill_matcher import SkillMatcher
 
 app = Flask(__name__)
 CORS(app)
@@ -25,20 +26,19 @@ os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+JOB_KEYWORDS = ['python', 'javascript', 'react', 'node.js', 'aws', 'sql', 'docker', 'kubernetes', 'typescript', 'mongodb']
+
+# Compiled once at import; matches whole words only, so "java" won't match "javascript"
+keyword_matcher = SkillMatcher({keyword.title(): [] for keyword in JOB_KEYWORDS})
+
 def get_mock_ats_score(resume_text, job_description_text):
     """Mock ATS scoring function for demo purposes"""
     # Simple keyword matching for demo
-    job_keywords = ['python', 'javascript', 'react', 'node.js', 'aws', 'sql', 'docker', 'kubernetes', 'typescript', 'mongodb']
-    resume_lower = resume_text.lower()
+    job_keywords = [keyword.title() for keyword in JOB_KEYWORDS]
+    found = keyword_matcher.match(resume_text)
     
-    matching_skills = []
-    missing_skills = []
-    
-    for keyword in job_keywords:
-        if keyword in resume_lower:
-            matching_skills.append(keyword.title())
-        else:
-            missing_skills.append(keyword.title())
+    matching_skills = [keyword for keyword in job_keywords if keyword in found]
+    missing_skills = [keyword for keyword in job_keywords if keyword not in found]
     
     # Calculate score based on matches
     score = min(95, (len(matching_skills) / len(job_keywords)) * 100)
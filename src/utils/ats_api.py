@@ -1,4 +1,5 @@
 import requests
+from requests.adapters import HTTPAdapter
 import os
 from dotenv import load_dotenv
 
@@ -6,6 +7,12 @@ load_dotenv()
 
 SHARPAPI_KEY = os.getenv("SHARPAPI_KEY")
 SHARPAPI_URL = "https://api.apyhub.com/utility/sharpapi-resume-job-match-score"
+# (connect, read) timeouts in seconds
+SHARPAPI_TIMEOUT = (float(os.getenv("HTTP_CONNECT_TIMEOUT", 5)), float(os.getenv("HTTP_READ_TIMEOUT", 30)))
+
+# Keep-alive session reused across calls so each one skips the TCP/TLS handshake
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", 10))))
 
 def get_ats_score(resume_text, job_description_text):
     headers = {
@@ -17,7 +24,7 @@ def get_ats_score(resume_text, job_description_text):
         "jobDescription": job_description_text
     }
     try:
-        response = requests.post(SHARPAPI_URL, headers=headers, json=data)
+        response = session.post(SHARPAPI_URL, headers=headers, json=data, timeout=SHARPAPI_TIMEOUT)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -7,8 +7,10 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=GEMINI_API_KEY)
 
+# Built once per process and reused for every call
+model = genai.GenerativeModel("gemini-pro")
+
 def get_gemini_suggestions(resume_text, job_description_text):
-    model = genai.GenerativeModel("gemini-pro")
     prompt = f"""Given the following resume and job description, please provide suggestions to improve the resume to be more relevant, minimal, and ATS-friendly. Reorganize the resume into the following sections: Summary, Skills, Experience, Education. Highlight missing skills from the job description and suggest how to incorporate them. Also, suggest how to make existing skills more prominent if they are relevant but not clearly stated. 
 
 Resume:
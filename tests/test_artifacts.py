@@ -0,0 +1,122 @@
+import pytest
+
+from app import app
+from utils.artifacts import ArtifactStore, resume_digest
+from utils.resume_document import build_document
+
+RESUME = {"name": "Ann", "skills": ["Python"]}
+
+
+class Renderer:
+    def __init__(self, size=100):
+        self.size = size
+        self.calls = 0
+
+    def __call__(self, document, template):
+        self.calls += 1
+        return f"%PDF {document.name} {template}".encode().ljust(self.size, b" ")
+
+
+def test_identical_documents_render_once():
+    store, render = ArtifactStore(), Renderer()
+    first = store.put_rendered(RESUME, render)
+    second = store.put_rendered({"name": " Ann ", "skills": ["Python", ""]}, render)
+
+    assert first == second == resume_digest(build_document(RESUME))
+    assert render.calls == 1
+    assert store.stats()["dedup_hits"] == 1
+
+
+def test_template_is_part_of_the_digest():
+    store, render = ArtifactStore(), Renderer()
+
+    assert store.put_rendered(RESUME, render, "classic") != store.put_rendered(RESUME, render, "modern")
+    assert render.calls == 2
+
+
+def test_failed_render_stores_nothing():
+    store = ArtifactStore()
+
+    assert store.put_rendered(RESUME, lambda document, template: None) is None
+    assert store.stats()["artifacts"] == 0
+
+
+def test_jobs_get_their_linked_pdf():
+    store = ArtifactStore()
+    digest = store.put_rendered(RESUME, Renderer())
+
+    assert store.link("job-1", digest)
+    assert store.get("job-1")[0] == digest
+    assert store.get("job-2") is None
+    assert not store.link("job-2", "unknown")
+
+
+def test_unlinked_pdf_is_pinned_against_eviction():
+    store = ArtifactStore(max_bytes=150)
+    pending = store.put_rendered({"name": "A"}, Renderer())
+    store.put_rendered({"name": "B"}, Renderer())
+
+    # Over max_bytes, but both PDFs are still waiting to be linked
+    assert store.stats()["artifacts"] == 2
+    assert store.link("job-a", pending)
+
+
+def test_linked_pdfs_are_evicted_least_recently_used_first():
+    store = ArtifactStore(max_bytes=250)
+    digests = [store.put_rendered({"name": name}, Renderer()) for name in "ABC"]
+    for name, digest in zip("ABC", digests):
+        store.link(name, digest)
+    store.link("D", store.put_rendered({"name": "D"}, Renderer()))
+
+    assert store.get("A") is None
+    assert store.get("D") is not None
+
+
+def test_sweep_expires_links_and_drops_unlinked_pdfs():
+    store = ArtifactStore(ttl=-1)
+    store.link("job-1", store.put_rendered(RESUME, Renderer()))
+    store.sweep()
+
+    assert store.get("job-1") is None
+    assert store.stats()["artifacts"] == 0
+
+
+def test_large_pdfs_are_kept_on_disk(tmp_path):
+    store = ArtifactStore(store_dir=str(tmp_path), memory_threshold=50)
+    store.link("job-1", store.put_rendered(RESUME, Renderer(size=100)))
+
+    digest, data, path = store.get("job-1")
+    assert data is None
+    assert path == str(tmp_path / f"{digest}.pdf")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    store = ArtifactStore()
+    monkeypatch.setattr("app.artifact_store", store)
+    store.link("job-1", store.put_rendered(RESUME, Renderer()))
+    return app.test_client()
+
+
+def test_download_sends_digest_as_etag_and_answers_304(client):
+    response = client.get("/download/job-1")
+
+    assert response.status_code == 200
+    assert response.data.startswith(b"%PDF Ann")
+    etag = response.headers["ETag"]
+    assert etag.strip('"') == resume_digest(RESUME)
+
+    revalidated = client.get("/download/job-1", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert not revalidated.data
+
+
+def test_download_of_unknown_job_is_404(client):
+    assert client.get("/download/missing").status_code == 404
+
+
+def test_old_download_route_points_to_per_job_links(client):
+    response = client.get("/download")
+
+    assert response.status_code == 410
+    assert "/download/<job_id>" in response.get_json()["error"]
@@ -0,0 +1,69 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+from app import app
+
+JOB_DESCRIPTION = "Backend engineer with Python, Flask and Docker"
+ALICE = "Alice\nSkills: Python, Flask, SQL, Docker\nExperience: Backend engineer building Flask APIs"
+BOB = "Bob\nSkills: Excel, Sales\nExperience: Account manager"
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def read_lines(response):
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    candidates = {line["filename"]: line for line in lines[:-1]}
+    return candidates, lines[-1]["summary"]
+
+
+def test_batch_zip_streams_one_line_per_candidate(client):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as z:
+        z.writestr("alice.txt", ALICE)
+        z.writestr("bob.txt", BOB)
+        z.writestr("notes.doc", "not a resume")
+        z.writestr("__MACOSX/._alice.txt", "metadata")
+    archive.seek(0)
+
+    response = client.post("/batch", data={"job_description": JOB_DESCRIPTION, "scorer": "local",
+                                           "archive": (archive, "batch.zip")},
+                           content_type="multipart/form-data")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    candidates, summary = read_lines(response)
+    assert set(candidates) == {"alice.txt", "bob.txt", "notes.doc"}
+    assert summary["candidates"] == 3
+    assert summary["errors"] == 1
+    assert "error" not in summary
+    assert candidates["notes.doc"]["error"] == "Resume must be PDF or TXT file"
+    alice, bob = candidates["alice.txt"]["ats_result"], candidates["bob.txt"]["ats_result"]
+    assert alice["overall_match"] > bob["overall_match"]
+
+
+def test_batch_resume_files(client):
+    response = client.post("/batch", data={"job_description": JOB_DESCRIPTION, "scorer": "local",
+                                           "resumes": [(io.BytesIO(ALICE.encode()), "alice.txt"),
+                                                       (io.BytesIO(BOB.encode()), "bob.txt")]},
+                           content_type="multipart/form-data")
+
+    assert response.status_code == 200
+    candidates, summary = read_lines(response)
+    assert set(candidates) == {"alice.txt", "bob.txt"}
+    assert summary["errors"] == 0
+    assert all("ats_result" in candidate for candidate in candidates.values())
+
+
+def test_batch_rejects_a_file_that_is_not_a_zip(client):
+    response = client.post("/batch", data={"job_description": JOB_DESCRIPTION,
+                                           "archive": (io.BytesIO(b"plain text"), "batch.zip")},
+                           content_type="multipart/form-data")
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "archive must be a ZIP file"}
@@ -0,0 +1,80 @@
+import os
+
+from utils import cache as cache_module
+from utils.cache import ResponseCache, make_cache_key
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_key_is_stable_for_equal_values():
+    assert make_cache_key({"a": 1, "b": 2}, "x") == make_cache_key({"b": 2, "a": 1}, "x")
+    assert make_cache_key("x", 1) != make_cache_key("x", "1")
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResponseCache(cache_dir=None, max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_tier_serves_entries_evicted_from_memory(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path), max_entries=1)
+    cache.set("a", "1")
+    cache.set("b", "2")
+
+    assert cache.get("a") == "1"
+    stats = cache.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["memory_entries"] == 1
+
+
+def test_entries_expire_in_both_tiers(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    cache = ResponseCache(cache_dir=str(tmp_path), ttl=60)
+    cache.set("a", "1")
+
+    clock.now += 61
+    assert cache.get("a") is None
+    assert not os.listdir(tmp_path)
+
+
+def test_disk_hit_keeps_its_original_timestamp(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    writer = ResponseCache(cache_dir=str(tmp_path), ttl=60)
+    writer.set("a", "1")
+
+    reader = ResponseCache(cache_dir=str(tmp_path), ttl=60)
+    clock.now += 50
+    assert reader.get("a") == "1"
+    # Promoted to memory, but still expires 60 s after it was first stored
+    clock.now += 20
+    assert reader.get("a") is None
+
+
+def test_disk_tier_is_trimmed_oldest_first(tmp_path):
+    value = "x" * 1000
+    cache = ResponseCache(cache_dir=str(tmp_path), max_entries=1, max_disk_bytes=2500)
+    for i, key in enumerate(("a", "b", "c")):
+        cache.set(key, value)
+        path = os.path.join(tmp_path, f"{key}.json")
+        os.utime(path, (1000 + i, 1000 + i))
+
+    cache.set("d", value)
+
+    assert sorted(os.listdir(tmp_path)) == ["c.json", "d.json"]
+    assert cache.get("a") is None
@@ -0,0 +1,65 @@
+from utils.compaction import (compact_job_description, compact_resume, dedupe_lines, estimate_tokens,
+                              normalize_text, rejoin_hyphenated, strip_jd_boilerplate, strip_page_furniture)
+
+
+def test_normalize_text_fixes_ligatures_bullets_and_spacing():
+    assert normalize_text("eﬀective  work\r\n•  Led   a team\n\n\n") == "effective work\n- Led a team"
+
+
+def test_hyphen_break_is_joined_only_for_known_words():
+    text = "Led develop-\nment of the development platform as a full-\nstack engineer."
+
+    assert rejoin_hyphenated(text) == "Led development of the development platform as a full-stack engineer."
+
+
+def test_hyphen_break_is_joined_for_skill_names():
+    assert rejoin_hyphenated("Built UIs in Type-\nscript") == "Built UIs in Typescript"
+
+
+def test_repeated_headers_and_page_numbers_are_removed():
+    pages = ["Jane Doe - Resume\nExperience\nBuilt APIs\n1",
+             "Jane Doe - Resume\nEducation\nBSc Physics\n2",
+             "Jane Doe - Resume\nSkills\nPython\n3"]
+
+    assert strip_page_furniture("\f".join(pages)) == ("Jane Doe - Resume\nExperience\nBuilt APIs\n"
+                                                      "Education\nBSc Physics\nSkills\nPython")
+
+
+def test_single_page_keeps_number_lines():
+    text = "Jane Doe\n2019\nAcme Corp\nPromoted twice\nGPA\n10/12"
+
+    assert strip_page_furniture(text) == text
+
+
+def test_dedupe_removes_repeated_long_lines_only():
+    text = "Built a distributed ingestion system.\nRemote\nbuilt a distributed ingestion system\nRemote"
+
+    assert dedupe_lines(text) == "Built a distributed ingestion system.\nRemote\nRemote"
+
+
+def test_jd_boilerplate_sections_and_sentences_are_dropped():
+    text = ("Backend Engineer\nAbout us:\nWe are a startup.\nRequirements:\nPython\n"
+            "We are an equal opportunity employer.\nBenefits\nFree lunch")
+
+    assert strip_jd_boilerplate(text) == "Backend Engineer\nRequirements:\nPython"
+
+
+def test_about_the_role_is_kept():
+    text = "About the role:\nYou will build APIs."
+
+    assert strip_jd_boilerplate(text) == text
+
+
+def test_compaction_reports_tokens_saved():
+    text = "Python developer\n" + "Equal opportunity employer, all qualified applicants welcome.\n" * 5
+    compacted, stats = compact_job_description(text)
+
+    assert compacted == "Python developer"
+    assert stats["tokens_after"] == estimate_tokens(compacted)
+    assert stats["tokens_saved"] == stats["tokens_before"] - stats["tokens_after"]
+
+
+def test_compact_resume_keeps_content_wording():
+    text = "Jane Doe\n\n\n• Built APIs in Python\n• Built APIs in Python and Go"
+
+    assert compact_resume(text)[0] == "Jane Doe\n\n- Built APIs in Python\n- Built APIs in Python and Go"
@@ -0,0 +1,37 @@
+import asyncio
+
+import google.generativeai as genai
+import pytest
+
+from utils import enhancer
+
+
+@pytest.fixture
+def api_key():
+    genai.configure(api_key="test-key")
+    yield
+    genai.configure(api_key=enhancer.GEMINI_API_KEY)
+
+
+async def build_model(generation_config=None):
+    return enhancer.get_model("gemini-test", generation_config)
+
+
+def test_each_event_loop_gets_its_own_transport(api_key):
+    first, second = asyncio.new_event_loop(), asyncio.new_event_loop()
+    try:
+        model_a = first.run_until_complete(build_model())
+        model_b = second.run_until_complete(build_model())
+
+        assert model_a is not model_b
+        assert model_a._async_client is not None
+        assert model_a._async_client is not model_b._async_client
+        # Reused on the same loop, and shared by that loop's other models
+        assert first.run_until_complete(build_model()) is model_a
+        other = first.run_until_complete(build_model({"temperature": 0}))
+        assert other is not model_a
+        assert other._async_client is model_a._async_client
+    finally:
+        first.close()
+        second.close()
+
@@ -0,0 +1,75 @@
+from utils.jd_profile import (JDProfileIndex, build_jd_profile, detect_seniority, jd_profile_summary,
+                              normalize_jd_text, split_preferred)
+
+JOB_DESCRIPTION = """Senior Data Engineer
+
+Requirements:
+5+ years building pipelines in Python and SQL.
+Master's degree in Computer Science.
+
+Nice to have:
+Experience with Kafka and Python."""
+
+
+def test_normalize_collapses_whitespace_and_blank_runs():
+    assert normalize_jd_text("  Title  \n\n\n  two   words \n") == "Title\n\ntwo words"
+
+
+def test_split_preferred_follows_headings():
+    required, preferred = split_preferred(JOB_DESCRIPTION)
+
+    assert "Python and SQL" in required
+    assert "Kafka" in preferred
+    assert "Kafka" not in required
+
+
+def test_detect_seniority_prefers_the_title():
+    assert detect_seniority("Junior Developer\nYou will work with a senior team.") == "junior"
+    assert detect_seniority("Developer\nReporting to the engineering manager.") == "lead"
+    assert detect_seniority("Developer\nBuild features.") == "mid"
+
+
+def test_profile_separates_required_and_preferred_skills():
+    profile = build_jd_profile(JOB_DESCRIPTION)
+
+    assert set(profile["required_skills"]) == {"Python", "SQL"}
+    assert profile["preferred_skills"] == ["Kafka"]
+    assert profile["skill_counts"]["Python"] == 2
+    assert profile["seniority"] == "senior"
+    assert profile["required_years"] == 5
+    assert profile["term_weights"]
+
+
+def test_index_reuses_profiles_for_the_same_normalised_text():
+    index = JDProfileIndex()
+    profile = index.get_or_build(JOB_DESCRIPTION)
+
+    assert index.get_or_build("  " + JOB_DESCRIPTION.replace("\n\n", "\n\n\n") + "\n") is profile
+    assert index.get(profile["id"]) is profile
+    assert index.stats() == {"hits": 1, "misses": 1, "profiles": 1}
+
+
+def test_index_finds_a_profile_by_its_compacted_text():
+    index = JDProfileIndex()
+    text = JOB_DESCRIPTION + "\n\nAbout us:\nWe are a friendly team.\n\nEqual opportunity employer."
+    profile = index.get_or_build(text)
+
+    assert profile["text"] != normalize_jd_text(text)
+    assert index.get_or_build(profile["text"]) is profile
+
+
+def test_index_evicts_least_recently_used_profiles():
+    index = JDProfileIndex(max_profiles=2)
+    first = index.get_or_build("Python developer")
+    index.get_or_build("Java developer")
+    index.get_or_build("Go developer")
+
+    assert index.get(first["id"]) is None
+
+
+def test_summary_omits_bulky_fields():
+    summary = jd_profile_summary(build_jd_profile(JOB_DESCRIPTION))
+
+    assert "text" not in summary
+    assert "term_weights" not in summary
+    assert summary["required_skills"]
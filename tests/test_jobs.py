@@ -0,0 +1,98 @@
+import io
+import threading
+import time
+
+import pytest
+
+import app as app_module
+from utils.jobs import JobQueue, QueueFullError, JOB_DONE, JOB_FAILED
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def wait_for(queue, job_id, status):
+    for _ in range(200):
+        if queue.get(job_id)["status"] == status:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}")
+
+
+def test_submit_rejects_jobs_beyond_workers_and_pending(release):
+    queue = JobQueue(max_workers=1, max_pending=1)
+    running = queue.submit(release.wait)
+    waiting = queue.submit(release.wait)
+
+    with pytest.raises(QueueFullError):
+        queue.submit(release.wait)
+
+    release.set()
+    wait_for(queue, running, JOB_DONE)
+    wait_for(queue, waiting, JOB_DONE)
+    # Finished jobs give their slots back
+    wait_for(queue, queue.submit(lambda: "ok"), JOB_DONE)
+
+
+def test_failed_job_keeps_its_error_and_frees_its_slot():
+    queue = JobQueue(max_workers=1, max_pending=0)
+
+    def fail():
+        raise ValueError("boom")
+
+    job_id = queue.submit(fail)
+    wait_for(queue, job_id, JOB_FAILED)
+    assert queue.status(job_id)["error"] == "boom"
+    assert queue.get(queue.submit(lambda: 1)) is not None
+
+
+def test_upload_returns_429_with_retry_after_when_queue_is_full(monkeypatch, release):
+    queue = JobQueue(max_workers=1, max_pending=0)
+    queue.submit(release.wait)
+    monkeypatch.setattr(app_module, "job_queue", queue)
+
+    response = app_module.app.test_client().post(
+        "/upload",
+        data={"job_description": "Python developer",
+              "resume": (io.BytesIO(b"Alice\nSkills: Python"), "alice.txt")},
+        content_type="multipart/form-data")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(app_module.app.config["JOB_RETRY_AFTER"])
+    assert "error" in response.get_json()
+
+
+def post_stream(client):
+    return client.post(
+        "/upload/stream",
+        data={"job_description": "Python developer",
+              "resume": (io.BytesIO(b"Alice\nSkills: Python"), "alice.txt")},
+        content_type="multipart/form-data")
+
+
+def test_upload_stream_returns_429_when_queue_is_full(monkeypatch, release):
+    queue = JobQueue(max_workers=1, max_pending=0)
+    queue.submit(release.wait)
+    monkeypatch.setattr(app_module, "job_queue", queue)
+
+    response = post_stream(app_module.app.test_client())
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(app_module.app.config["JOB_RETRY_AFTER"])
+
+
+def test_upload_stream_holds_a_slot_until_the_response_closes(monkeypatch):
+    queue = JobQueue(max_workers=1, max_pending=0)
+    monkeypatch.setattr(app_module, "job_queue", queue)
+
+    response = post_stream(app_module.app.test_client())
+    assert response.status_code == 200
+    with pytest.raises(QueueFullError):
+        queue.submit(lambda: "ok")
+
+    response.close()
+    wait_for(queue, queue.submit(lambda: "ok"), JOB_DONE)
@@ -0,0 +1,85 @@
+from utils.json_repair import repair_json, conform, top_level_fields
+
+EXPERIENCE = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "skills": {"type": "array", "items": {"type": "string"}},
+        "experience": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"title": {"type": "string"}, "location": {"type": "string"}},
+                "required": ["title", "location"]
+            }
+        }
+    },
+    "required": ["name", "experience"]
+}
+
+
+def test_repair_strips_fences_and_trailing_commas():
+    value, repairs, truncated_at = repair_json('```json\n{"skills": ["a", "b",],}\n```')
+
+    assert value == {"skills": ["a", "b"]}
+    assert repairs == ["code_fence", "trailing_comma"]
+    assert truncated_at is None
+
+
+def test_repair_closes_truncated_output_after_last_complete_element():
+    value, repairs, truncated_at = repair_json('{"name": "Ann", "skills": ["a", "b", "unfini')
+
+    assert "truncated" in repairs
+    assert truncated_at == "skills"
+    assert value == {"name": "Ann", "skills": ["a", "b"]}
+
+
+def test_repair_gives_up_on_text_without_json():
+    assert repair_json("Sorry, I can't help with that.") == (None, ["unparseable"], None)
+
+
+def test_conform_drops_incomplete_last_item_of_truncated_array():
+    value, _, truncated_at = repair_json('{"name": "Ann", "experience": [{"title": "a", "location": "x"}, '
+                                         '{"title": "b"')
+    assert truncated_at == "experience"
+    value, missing = conform(value, EXPERIENCE, truncated_at=truncated_at)
+
+    assert value["experience"] == [{"title": "a", "location": "x"}]
+    assert missing == []
+
+
+def test_conform_keeps_last_item_of_complete_array_and_reports_its_gaps():
+    value, _, truncated_at = repair_json('{"name": "Ann", "experience": [{"title": "a", "location": "x"}, '
+                                         '{"title": "b", "location": null}]}')
+    value, missing = conform(value, EXPERIENCE, truncated_at=truncated_at)
+
+    assert value["experience"] == [{"title": "a", "location": "x"}, {"title": "b", "location": ""}]
+    assert missing == ["experience[1].location"]
+
+
+def test_conform_trims_only_the_array_open_at_the_cut():
+    # experience closed before the cut, so its incomplete last item is real data, not the cut
+    value, _, truncated_at = repair_json('{"experience": [{"title": "a", "location": "x"}, {"title": "b"}], '
+                                         '"name": "Ann", "skills": ["a", "b", "unfini')
+    assert truncated_at == "skills"
+    value, missing = conform(value, EXPERIENCE, truncated_at=truncated_at)
+
+    assert value["experience"] == [{"title": "a", "location": "x"}, {"title": "b", "location": ""}]
+    assert value["skills"] == ["a", "b"]
+    assert missing == ["experience[1].location"]
+
+
+def test_repair_reports_the_innermost_open_array():
+    text = '[{"title": "a", "location": "x"}, {"title": "b", "bullets": ["one", "tw'
+
+    assert repair_json(text)[2] == "[1].bullets"
+    assert repair_json('[{"title": "a", "location": "x"}, {"title": "b", "loc')[2] == ""
+    assert repair_json('{"name": "Ann", "summary": "unfini')[2] is None
+
+
+def test_conform_fills_missing_fields_and_coerces_scalars():
+    value, missing = conform({"name": None, "skills": "Python"}, EXPERIENCE)
+
+    assert value == {"name": "", "skills": ["Python"], "experience": []}
+    assert missing == ["name", "experience"]
+    assert top_level_fields(missing + ["experience[0].title"]) == ["name", "experience"]
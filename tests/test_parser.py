@@ -0,0 +1,25 @@
+import fitz
+
+from utils.parser import extract_text_from_upload
+
+
+def make_pdf(text):
+    with fitz.open() as doc:
+        doc.new_page().insert_text((72, 72), text)
+        return doc.tobytes()
+
+
+def test_spilled_upload_uses_the_uploaded_filename(tmp_path):
+    # secure_filename("简历.pdf") == "pdf", so the spill path has no extension
+    spilled = tmp_path / "0123abcd_pdf"
+    spilled.write_bytes(make_pdf("Alice Python developer"))
+
+    assert "Alice Python developer" in extract_text_from_upload("简历.pdf", str(spilled))
+
+
+def test_spilled_and_in_memory_text_uploads_match(tmp_path):
+    data = "Alice\nSkills: Python".encode("utf-8")
+    spilled = tmp_path / "0123abcd_alice.txt"
+    spilled.write_bytes(data)
+
+    assert extract_text_from_upload("alice.txt", str(spilled)) == extract_text_from_upload("alice.txt", data)
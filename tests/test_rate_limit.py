@@ -0,0 +1,103 @@
+import asyncio
+import fcntl
+import threading
+import time
+
+import pytest
+
+from utils.rate_limit import RateLimiter, backoff_delay, retry_hint
+
+
+def test_retry_hint_reads_attribute_or_message():
+    class Error(Exception):
+        retry_after = 3
+
+    assert retry_hint(Error()) == 3.0
+    assert retry_hint(Exception("429 quota exceeded. retry_delay { seconds: 17 }")) == 17.0
+    assert retry_hint(Exception("Please retry in 2.5s")) == 2.5
+    assert retry_hint(Exception("boom")) is None
+
+
+def test_backoff_delay_is_capped():
+    assert all(0 <= backoff_delay(attempt, base_delay=1, max_delay=5) <= 5 for attempt in range(10))
+
+
+def test_budget_is_taken_without_waiting_until_spent():
+    limiter = RateLimiter("test", requests_per_minute=2, tokens_per_minute=1000)
+
+    async def run():
+        return [await limiter.acquire_async(100) for _ in range(2)]
+
+    assert asyncio.run(run()) == [pytest.approx(0, abs=0.05)] * 2
+    stats = limiter.stats()
+    assert stats["requests_available"] == pytest.approx(0, abs=0.01)
+    assert stats["tokens_available"] == pytest.approx(800, abs=1)
+
+
+def test_spent_budget_refills_over_time():
+    limiter = RateLimiter("test", requests_per_minute=600, tokens_per_minute=100000)
+
+    async def run():
+        for _ in range(600):
+            await limiter.acquire_async()
+        return await limiter.acquire_async()
+
+    # One request refills every 0.1 s
+    assert 0.05 < asyncio.run(run()) < 0.5
+
+
+def test_debit_and_pause_apply_to_the_next_acquire():
+    limiter = RateLimiter("test", requests_per_minute=100, tokens_per_minute=6000)
+
+    async def run():
+        await limiter.debit_async(6000)
+        await limiter.pause_async(0.2)
+        return limiter.stats()
+
+    stats = asyncio.run(run())
+    assert stats["tokens_available"] <= 0
+    assert 0 < stats["paused_for_s"] <= 0.2
+
+
+def test_processes_share_state_through_the_file(tmp_path):
+    path = str(tmp_path / "limits.json")
+    first = RateLimiter("test", requests_per_minute=1, tokens_per_minute=1000, state_path=path)
+    second = RateLimiter("test", requests_per_minute=1, tokens_per_minute=1000, state_path=path)
+
+    asyncio.run(first.acquire_async(10))
+
+    assert second.stats()["requests_available"] < 0.1
+    assert second.stats()["tokens_available"] == pytest.approx(990, abs=1)
+
+
+def test_waiting_for_the_file_lock_does_not_block_the_event_loop(tmp_path):
+    path = tmp_path / "limits.json"
+    path.write_text("")
+    limiter = RateLimiter("test", requests_per_minute=60, tokens_per_minute=1000, state_path=str(path))
+    locked, release = threading.Event(), threading.Event()
+
+    def hold_lock():
+        # Another process holding the lock for a while
+        with open(path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            locked.set()
+            release.wait(5)
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+    async def run():
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        locked.wait(5)
+        acquire = asyncio.create_task(limiter.acquire_async())
+        ticks = 0
+        started = time.monotonic()
+        while time.monotonic() - started < 0.2:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert not acquire.done()
+        release.set()
+        await acquire
+        holder.join()
+        return ticks
+
+    assert asyncio.run(run()) >= 10
@@ -0,0 +1,73 @@
+from utils.enhanced_resume import html_cache, parse_resume_to_html, render_section_html
+from utils.resume_document import EducationEntry, ExperienceEntry, ResumeDocument, build_document
+
+RESUME = {
+    "name": " Ann Lee ",
+    "contact_info": "ann@example.com",
+    "summary": None,
+    "skills": ["Python", "", None, 3],
+    "experience": [{"title": "Engineer", "company": "Acme", "location": "Berlin", "duration": 2020,
+                    "responsibilities": "Built APIs"}, None, "Consultant"],
+    "education": [{"degree": "BSc", "institution": "MIT", "graduation_year": 2015}],
+    "selected_projects": "CLI tool"
+}
+
+
+def test_build_document_normalises_loose_json():
+    document = build_document(RESUME)
+
+    assert document.name == "Ann Lee"
+    assert document.summary == ""
+    assert document.skills == ("Python", "3")
+    assert document.selected_projects == ("CLI tool",)
+    first, second = document.experience
+    assert first.duration == "2020"
+    assert first.responsibilities == ("Built APIs",)
+    assert second.title == "Consultant"
+    assert document.education[0].graduation_year == "2015"
+
+
+def test_build_document_accepts_a_document_or_nothing():
+    document = build_document(RESUME)
+
+    assert build_document(document) is document
+    assert build_document(None).to_json()["experience"] == []
+
+
+def test_digest_depends_only_on_normalised_content():
+    same = dict(RESUME, name="Ann Lee", skills=["Python", "3"])
+
+    assert build_document(same).digest == build_document(RESUME).digest
+    assert build_document(dict(RESUME, name="Bo")).digest != build_document(RESUME).digest
+
+
+def test_entries_compose_their_title_lines():
+    assert ExperienceEntry("Engineer", "Acme", "Berlin", "2020").title_line == "Engineer – Acme | Berlin (2020)"
+    assert EducationEntry("BSc", "MIT", "2015").line == "BSc – MIT (2015)"
+
+
+def test_to_json_round_trips():
+    document = build_document(RESUME)
+
+    assert build_document(document.to_json()).to_json() == document.to_json()
+    assert isinstance(document, ResumeDocument)
+
+
+def test_html_escapes_content_and_skips_empty_sections():
+    html = parse_resume_to_html(dict(RESUME, name="<Ann>"))
+
+    assert "&lt;Ann&gt;" in html
+    assert "Summary" not in html
+    assert render_section_html(RESUME, "summary") == ""
+    assert "Engineer – Acme | Berlin (2020)" in render_section_html(RESUME, "experience")
+
+
+def test_html_is_memoized_by_digest():
+    html_cache.clear()
+    before = html_cache.stats()
+    parse_resume_to_html(RESUME)
+    parse_resume_to_html(dict(RESUME, name="Ann Lee"))
+
+    stats = html_cache.stats()
+    assert stats["memory_hits"] - before["memory_hits"] == 1
+    assert stats["sets"] - before["sets"] == 1
@@ -0,0 +1,47 @@
+from utils.jd_profile import build_jd_profile
+from utils.scoring import score_resume_local
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+Requirements: 5+ years of Python and Django, PostgreSQL, Docker and AWS.
+Bachelor's degree in Computer Science."""
+
+STRONG = """Jane Doe
+Experience
+Senior Backend Engineer, Acme 2016 - 2023
+Built Django services in Python on PostgreSQL, deployed with Docker on AWS.
+Education
+Bachelor of Science in Computer Science"""
+
+PARTIAL = """John Roe
+Experience
+Web Developer, Widgets 2020 - 2022
+Python scripts and some Docker.
+Education
+Bachelor of Arts"""
+
+UNRELATED = """Sam Poe
+Experience
+Sales Associate, Store 2021 - 2022
+Handled customer accounts and Excel reports."""
+
+
+def test_resumes_rank_by_fit():
+    scores = [score_resume_local(resume, JOB_DESCRIPTION)["overall_match"]
+              for resume in (STRONG, PARTIAL, UNRELATED)]
+
+    assert scores == sorted(scores, reverse=True)
+    assert len(set(scores)) == 3
+
+
+def test_missing_skills_are_reported():
+    result = score_resume_local(PARTIAL, JOB_DESCRIPTION)
+
+    assert {"Python", "Docker"} <= set(result["matched_skills"])
+    assert "PostgreSQL" in result["missing_skills"]
+
+
+def test_jd_profile_gives_the_same_score():
+    profile = build_jd_profile(JOB_DESCRIPTION)
+
+    assert score_resume_local(STRONG, JOB_DESCRIPTION, jd_profile=profile) == \
+        score_resume_local(STRONG, JOB_DESCRIPTION)
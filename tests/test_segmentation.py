@@ -0,0 +1,113 @@
+from utils.segmentation import has_structure, segment_resume, structured_resume_text, text_lines
+
+RESUME = """Jane Doe
+Contact Information: jane@example.com | +1 555 123 4567
+linkedin.com/in/janedoe
+
+SUMMARY
+Backend engineer focused on data platforms.
+
+Skills
+Languages: Python, Go, SQL
+Tools: Docker; Kubernetes
+
+Experience
+Senior Engineer | Acme Corp | Berlin, Germany | Jan 2019 - Present
+- Built the ingestion pipeline
+- Cut batch costs by 40%
+Engineer at Widgets Inc (2016 - 2018)
+- Maintained billing APIs
+
+Education
+BSc Computer Science, University of California, Berkeley, 2016
+
+Projects
+- Open-source CLI for log search
+- Home automation hub
+
+VOLUNTEERING
+- Mentor at Code Club
+"""
+
+
+def layout_line(text, size=10, bold=False, x0=50):
+    return {"text": text, "size": size, "bold": bold, "x0": x0}
+
+
+def test_plain_text_resume_is_segmented():
+    resume = segment_resume(text_lines(RESUME))
+
+    assert resume["name"] == "Jane Doe"
+    assert resume["contact_info"] == "jane@example.com | +1 555 123 4567 | linkedin.com/in/janedoe"
+    assert resume["summary"] == "Backend engineer focused on data platforms."
+    assert resume["skills"] == ["Python", "Go", "SQL", "Docker", "Kubernetes"]
+    assert resume["selected_projects"] == ["Open-source CLI for log search", "Home automation hub"]
+    assert resume["other_sections"] == {"Volunteering": ["Mentor at Code Club"]}
+
+
+def test_experience_entries_are_split_into_fields():
+    first, second = segment_resume(text_lines(RESUME))["experience"]
+
+    assert first == {"title": "Senior Engineer", "company": "Acme Corp", "location": "Berlin, Germany",
+                     "duration": "Jan 2019 - Present",
+                     "responsibilities": ["Built the ingestion pipeline", "Cut batch costs by 40%"]}
+    assert (second["title"], second["company"], second["duration"]) == ("Engineer", "Widgets Inc", "2016 - 2018")
+    assert second["responsibilities"] == ["Maintained billing APIs"]
+
+
+def test_education_keeps_unmatched_parts_with_the_institution():
+    [education] = segment_resume(text_lines(RESUME))["education"]
+
+    assert education == {"degree": "BSc Computer Science", "institution": "University of California, Berkeley",
+                         "graduation_year": "2016"}
+
+
+def test_education_spanning_two_lines_is_one_entry():
+    resume = segment_resume(text_lines("Ann\nEducation\nMaster of Science in Physics\nMIT Institute, 2012"))
+
+    assert resume["education"] == [{"degree": "Master of Science in Physics", "institution": "MIT Institute",
+                                    "graduation_year": "2012"}]
+
+
+def test_contact_heading_section_is_merged_into_contact_info():
+    resume = segment_resume(text_lines("Ann Lee\nContact\nann@example.com\nSkills\nPython"))
+
+    assert resume["contact_info"] == "ann@example.com"
+    assert resume["skills"] == ["Python"]
+
+
+def test_layout_hints_find_headings_and_indented_bullets():
+    lines = [layout_line("Ann Lee", size=20, bold=True),
+             layout_line("ann@example.com"),
+             layout_line("Career History", size=13, bold=True),
+             layout_line("Analyst, Bank Co, 2015 - 2020", bold=True),
+             layout_line("Modelled credit risk", x0=70),
+             layout_line("Work Experience", size=13, bold=True),
+             layout_line("Data Scientist, Shop Co, 2020 - 2024", bold=True),
+             layout_line("Built demand forecasts", x0=70)]
+    resume = segment_resume(lines)
+
+    assert resume["name"] == "Ann Lee"
+    assert resume["other_sections"] == {"Career History": ["Analyst, Bank Co, 2015 - 2020", "Modelled credit risk"]}
+    assert resume["experience"][0]["responsibilities"] == ["Built demand forecasts"]
+
+
+def test_structured_text_round_trips_the_sections():
+    resume = segment_resume(text_lines(RESUME))
+    text = structured_resume_text(resume)
+
+    assert has_structure(resume)
+    assert text.startswith("Jane Doe\njane@example.com")
+    assert "Senior Engineer | Acme Corp | Berlin, Germany | Jan 2019 - Present\n- Built the ingestion pipeline" in text
+    assert segment_resume(text_lines(text))["experience"] == resume["experience"]
+
+
+def test_text_without_sections_has_no_structure():
+    assert not has_structure(segment_resume(text_lines("Just a paragraph of text about me.")))
+
+
+def test_all_caps_name_is_not_a_heading():
+    resume = segment_resume(text_lines("JANE DOE\njane@example.com\nSKILLS\nPython"))
+
+    assert resume["name"] == "JANE DOE"
+    assert resume["other_sections"] == {}
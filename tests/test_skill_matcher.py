@@ -0,0 +1,42 @@
+from utils.skill_matcher import SkillMatcher
+
+TAXONOMY = {
+    "Machine Learning": ["ml"],
+    "Learning": [],
+    "Java": [],
+    "JavaScript": ["js"],
+    "C": [],
+    "C++": ["cpp"],
+}
+
+
+def canonicals(matcher, text):
+    return [canonical for canonical, _, _ in matcher.find(text)]
+
+
+def test_longest_match_wins_where_matches_overlap():
+    matcher = SkillMatcher(TAXONOMY)
+
+    assert canonicals(matcher, "Machine Learning and deep learning") == ["Machine Learning", "Learning"]
+
+
+def test_matches_respect_word_boundaries():
+    matcher = SkillMatcher(TAXONOMY)
+
+    assert canonicals(matcher, "JavaScript, C++ and Java") == ["JavaScript", "C++", "Java"]
+    assert canonicals(matcher, "html xml") == []
+
+
+def test_whitespace_runs_match_a_single_space():
+    matcher = SkillMatcher(TAXONOMY)
+
+    [(canonical, start, end)] = matcher.find("Skills:  machine\n   learning.")
+    assert canonical == "Machine Learning"
+    assert (start, end) == (9, 28)
+
+
+def test_match_counts_aliases_under_canonical_name():
+    found = SkillMatcher(TAXONOMY).match("JS and JavaScript, ML")
+
+    assert found["JavaScript"]["count"] == 2
+    assert found["Machine Learning"]["positions"] == [(19, 21)]
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from utils.stages import Stage, StageRun
+
+
+def run_events(run):
+    async def collect():
+        return [event async for event in run.events()]
+    return asyncio.run(collect())
+
+
+def test_cancelled_speculative_stage_is_not_awaited():
+    started = []
+
+    async def guess(run):
+        started.append("guess")
+        await asyncio.sleep(10)
+        return "guess"
+
+    async def decide(run):
+        run.cancel("guess")
+        run.emit("decided", None)
+        return "done"
+
+    run = StageRun([Stage("guess", guess, speculative=True), Stage("decide", decide)])
+
+    assert run_events(run) == [("decided", None)]
+    assert started == ["guess"]
+    assert "guess" in run.cancelled
+    assert "guess" not in run.results
+    assert [name for name, _ in run.critical_path()] == ["decide"]
+
+
+def test_unfinished_speculative_stages_are_cancelled_when_the_run_ends():
+    async def slow(run):
+        await asyncio.sleep(10)
+
+    async def fast(run):
+        return 1
+
+    run = StageRun([Stage("slow", slow, speculative=True), Stage("fast", fast)])
+    run_events(run)
+
+    assert run.cancelled == {"slow"}
+
+
+def test_taken_speculative_result_is_on_the_critical_path():
+    async def guess(run):
+        await asyncio.sleep(0.01)
+        return 2
+
+    async def use(run):
+        return await run.take("guess") * 2
+
+    run = StageRun([Stage("guess", guess, speculative=True), Stage("use", use)])
+    run_events(run)
+
+    assert run.results["use"] == 4
+    assert [name for name, _ in run.critical_path()] == ["guess", "use"]
+
+
+def test_failing_stage_cancels_the_rest():
+    async def fail(run):
+        raise ValueError("boom")
+
+    async def wait(run):
+        await asyncio.sleep(10)
+
+    run = StageRun([Stage("fail", fail), Stage("wait", wait)])
+
+    with pytest.raises(ValueError, match="boom"):
+        run_events(run)
+    assert run.cancelled == {"wait"}
+
+
+def test_depending_on_a_speculative_stage_is_rejected():
+    async def noop(run):
+        return None
+
+    with pytest.raises(ValueError):
+        StageRun([Stage("guess", noop, speculative=True), Stage("use", noop, deps=("guess",))])
@@ -0,0 +1,67 @@
+"""
+Bridge between synchronous callers and the async LLM client.
+
+Async code (utils.enhancer's *_async functions, utils.pipeline's
+iter_pipeline_async) runs on one long-lived event loop in a daemon thread,
+so every async Gemini client and rate-limiter wait in the process shares a
+single loop however many threads call in. `run_sync` and `iterate_sync` let
+the synchronous API block on that loop, carrying the caller's request ID
+(utils.metrics) across. From code already running on an event loop, await
+the async functions directly instead.
+"""
+import asyncio
+import os
+import threading
+from utils.metrics import context_snapshot, restored_context
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # The loop thread doesn't survive a fork; the child starts its own on first use
+    global _loop
+    _loop = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_loop():
+    """The process-wide background event loop, started on first use."""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+                loop.call_soon(ready.set)
+                threading.Thread(target=loop.run_forever, name="aio-loop", daemon=True).start()
+                ready.wait()
+                _loop = loop
+    return _loop
+
+
+async def _in_context(snapshot, awaitable):
+    with restored_context(snapshot):
+        return await awaitable
+
+
+def run_sync(coro):
+    """Runs a coroutine on the background loop and blocks until it finishes."""
+    return asyncio.run_coroutine_threadsafe(_in_context(context_snapshot(), coro), get_loop()).result()
+
+
+def iterate_sync(agen):
+    """Iterates an async generator on the background loop, yielding its items synchronously."""
+    loop, snapshot = get_loop(), context_snapshot()
+    try:
+        while True:
+            try:
+                item = asyncio.run_coroutine_threadsafe(_in_context(snapshot, agen.__anext__()), loop).result()
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        # Runs the generator's cleanup (open spans, streams) if the caller stops early
+        asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
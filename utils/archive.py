@@ -0,0 +1,95 @@
+"""
+Resume entries from a bulk upload, read one at a time under size limits.
+
+A batch arrives either as a ZIP archive or as a list of uploaded files.
+`iter_zip_entries` and `iter_file_entries` yield one entry per resume as
+{"filename", "data"} (the file's bytes) or {"filename", "error"}. Nothing is
+extracted to disk, and an entry is only decompressed when the consumer asks
+for the next one, so memory holds just the entries being processed.
+
+Each entry is limited to `max_entry_bytes`, the batch to `max_entries`
+entries and `max_total_bytes` read in all. Decompressed sizes are counted as
+they are read rather than taken from the archive's headers, so a ZIP that
+misstates its sizes can't get past the limits. An oversized entry is
+reported and skipped; once the batch runs past a batch-wide limit, a final
+error entry is yielded and reading stops.
+"""
+import os
+import zipfile
+from contextlib import nullcontext
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class EntryTooLarge(Exception):
+    """Raised by read_limited when a stream is longer than its limit."""
+
+
+def read_limited(stream, limit):
+    """Reads stream to the end, raising EntryTooLarge past limit bytes."""
+    chunks, size = [], 0
+    while True:
+        chunk = stream.read(min(READ_CHUNK_SIZE, limit - size + 1))
+        if not chunk:
+            return b"".join(chunks)
+        size += len(chunk)
+        if size > limit:
+            raise EntryTooLarge()
+        chunks.append(chunk)
+
+
+def _skipped(name):
+    # Directories and the metadata archivers add (__MACOSX/, .DS_Store)
+    return name.endswith("/") or name.startswith("__MACOSX/") or os.path.basename(name).startswith(".")
+
+
+def _iter_entries(files, allowed_extensions, max_entry_bytes, max_total_bytes, max_entries):
+    """Entries for (filename, size or None, open_stream) triples, read lazily under the limits."""
+    extensions = tuple(f".{ext}" for ext in allowed_extensions)
+    total_bytes = 0
+    for count, (filename, size, open_stream) in enumerate(files):
+        if count >= max_entries:
+            yield {"filename": filename,
+                   "error": f"Batch has more than {max_entries} entries; the rest were skipped"}
+            return
+        if not filename.lower().endswith(extensions):
+            yield {"filename": filename, "error": "Resume must be PDF or TXT file"}
+            continue
+        if size is not None and size > max_entry_bytes:
+            yield {"filename": filename, "error": f"Entry is larger than {max_entry_bytes} bytes"}
+            continue
+        limit = min(max_entry_bytes, max_total_bytes - total_bytes)
+        try:
+            if size is not None and size > limit:
+                raise EntryTooLarge()
+            with open_stream() as stream:
+                data = read_limited(stream, limit)
+        except EntryTooLarge:
+            if limit == max_entry_bytes:
+                yield {"filename": filename, "error": f"Entry is larger than {max_entry_bytes} bytes"}
+                continue
+            yield {"filename": filename,
+                   "error": f"Batch is larger than {max_total_bytes} bytes; the rest were skipped"}
+            return
+        except (zipfile.BadZipFile, RuntimeError, OSError, EOFError) as e:
+            # Corrupt or encrypted member
+            yield {"filename": filename, "error": f"Could not read entry: {e}"}
+            continue
+        total_bytes += len(data)
+        yield {"filename": filename, "data": data}
+
+
+def iter_zip_entries(archive, allowed_extensions, max_entry_bytes, max_total_bytes, max_entries):
+    """Entries of an open zipfile.ZipFile in archive order, each decompressed as it is consumed."""
+    members = [info for info in archive.infolist() if not _skipped(info.filename)]
+    return _iter_entries(((info.filename, info.file_size, lambda info=info: archive.open(info))
+                          for info in members),
+                         allowed_extensions, max_entry_bytes, max_total_bytes, max_entries)
+
+
+def iter_file_entries(uploads, allowed_extensions, max_entry_bytes, max_total_bytes, max_entries):
+    """Entries of uploaded files, given as (filename, stream) pairs, in upload order."""
+    # The caller owns the streams and closes them once the batch is done
+    return _iter_entries(((filename, None, lambda stream=stream: nullcontext(stream)) for filename, stream in uploads
+                          if filename),
+                         allowed_extensions, max_entry_bytes, max_total_bytes, max_entries)
@@ -0,0 +1,183 @@
+"""
+Per-job artifact store for rendered resume PDFs.
+
+PDFs are stored once per content hash of the normalised resume document
+(utils.resume_document) and render template, so jobs that produce identical
+resumes share one rendered file, and each job ID links to the digest of its PDF. Small PDFs stay in
+memory; larger ones are written to `store_dir`. Links expire after `ttl` seconds, unlinked PDFs are
+dropped, and the least recently used PDFs are evicted while the store holds
+more than `max_bytes`. A PDF returned by `put_rendered` is pinned until a job
+links it, so eviction can't remove it in between. A daemon thread runs the sweep every
+`sweep_interval` seconds.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from utils.cache import make_cache_key
+from utils.resume_document import build_document
+
+logger = logging.getLogger(__name__)
+
+
+def resume_digest(resume, template=None):
+    """
+    Content hash of an enhanced resume (JSON or a ResumeDocument) and
+    template; also used as the PDF's ETag.
+    """
+    return make_cache_key(build_document(resume).digest, template)
+
+
+class ArtifactStore:
+    """Thread-safe, content-addressed PDF store with per-job links."""
+
+    def __init__(self, store_dir=None, max_bytes=200 * 1024 * 1024, ttl=3600,
+                 memory_threshold=4 * 1024 * 1024, sweep_interval=60):
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.memory_threshold = memory_threshold
+        self.sweep_interval = sweep_interval
+        self._blobs = OrderedDict()  # digest -> {"data", "path", "size", "last_used", "pins"}, LRU order
+        self._links = {}  # job ID -> (digest, linked_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._sweeper = None
+        self._stats = {"renders": 0, "dedup_hits": 0, "evictions": 0, "expired_links": 0}
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+
+    def _touch(self, digest):
+        self._blobs[digest]["last_used"] = time.time()
+        self._blobs.move_to_end(digest)
+
+    def put_rendered(self, resume, render, template=None):
+        """
+        Returns the digest of the PDF for resume (JSON or a ResumeDocument),
+        calling render(document, template) (which returns PDF bytes or None)
+        only if that document isn't stored yet. Returns None if rendering fails.
+        The PDF stays pinned until link() is called with the digest.
+        """
+        document = build_document(resume)
+        digest = resume_digest(document, template)
+        with self._lock:
+            if digest in self._blobs:
+                self._touch(digest)
+                self._blobs[digest]["pins"] += 1
+                self._stats["dedup_hits"] += 1
+                return digest
+
+        data = render(document, template)
+        if data is None:
+            return None
+
+        blob = {"data": data, "path": None, "size": len(data), "last_used": time.time(), "pins": 0}
+        if self.store_dir and len(data) > self.memory_threshold:
+            path = os.path.join(self.store_dir, f"{digest}.pdf")
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            blob["data"], blob["path"] = None, path
+
+        with self._lock:
+            self._stats["renders"] += 1
+            if digest not in self._blobs:
+                self._blobs[digest] = blob
+                self._bytes += blob["size"]
+            self._touch(digest)
+            self._blobs[digest]["pins"] += 1
+            self._evict_to_size()
+        return digest
+
+    def link(self, job_id, digest):
+        """
+        Links job_id to a digest from put_rendered and unpins it. Returns
+        False if the PDF is no longer stored (e.g. swept after a very long wait).
+        """
+        with self._lock:
+            blob = self._blobs.get(digest)
+            if blob is None:
+                return False
+            self._links[job_id] = (digest, time.time())
+            blob["pins"] = max(0, blob["pins"] - 1)
+            return True
+
+    def get(self, job_id):
+        """Returns (digest, data, path) for a job's PDF, exactly one of data/path set, or None."""
+        with self._lock:
+            entry = self._links.get(job_id)
+            if entry is None or entry[0] not in self._blobs:
+                return None
+            digest = entry[0]
+            self._touch(digest)
+            blob = self._blobs[digest]
+            return digest, blob["data"], blob["path"]
+
+    def _remove_blob(self, digest):
+        blob = self._blobs.pop(digest)
+        self._bytes -= blob["size"]
+        if blob["path"]:
+            try:
+                os.remove(blob["path"])
+            except OSError:
+                pass
+        for job_id in [j for j, (d, _) in self._links.items() if d == digest]:
+            del self._links[job_id]
+
+    def _evict_to_size(self):
+        # Pinned PDFs are waiting for their job to link them, so they are skipped
+        for digest in [d for d, blob in self._blobs.items() if not blob["pins"]]:
+            if self._bytes <= self.max_bytes or len(self._blobs) <= 1:
+                break
+            self._remove_blob(digest)
+            self._stats["evictions"] += 1
+
+    def sweep(self):
+        """Expires old links, drops PDFs no job links to, and trims to max_bytes."""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [job_id for job_id, (_, linked_at) in self._links.items() if linked_at < cutoff]
+            for job_id in expired:
+                del self._links[job_id]
+            self._stats["expired_links"] += len(expired)
+
+            linked = {digest for digest, _ in self._links.values()}
+            # Recently used blobs may be waiting for their link, so only drop stale ones (a pin
+            # this old belongs to a job that failed before linking)
+            stale = [digest for digest, blob in self._blobs.items()
+                     if digest not in linked and blob["last_used"] < cutoff]
+            for digest in stale:
+                self._remove_blob(digest)
+            self._stats["evictions"] += len(stale)
+            self._evict_to_size()
+
+    def start_sweeper(self):
+        """Starts the background sweep thread (once)."""
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="artifact-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Artifact sweep error")
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, artifacts=len(self._blobs), links=len(self._links), bytes=self._bytes)
+
+
+artifact_store = ArtifactStore(
+    store_dir=os.getenv("ARTIFACT_STORE_DIR", os.path.join("output", "artifacts")) or None,
+    max_bytes=int(os.getenv("ARTIFACT_STORE_MAX_BYTES", 200 * 1024 * 1024)),
+    ttl=int(os.getenv("ARTIFACT_TTL", 3600)),
+    memory_threshold=int(os.getenv("ARTIFACT_MEMORY_THRESHOLD", 4 * 1024 * 1024)),
+    sweep_interval=int(os.getenv("ARTIFACT_SWEEP_INTERVAL", 60))
+)
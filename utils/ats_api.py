@@ -1,70 +1,221 @@
-import requests
+"""
+SharpAPI resume/job match scoring.
+
+Jobs are submitted with `submit_job`, which returns a status URL that
+SharpAPI fills in once scoring finishes. Rather than a thread sleeping in a
+loop per job, `ats_poller` watches every outstanding status URL from the
+shared event loop (utils.aio): waiting jobs cost no threads, polls back off
+from SHARPAPI_POLL_INITIAL_INTERVAL to SHARPAPI_POLL_MAX_INTERVAL, and at
+most SHARPAPI_POLL_CONCURRENCY status requests are in flight at once.
+"""
+import asyncio
+import logging
 import os
+import random
+import threading
 import time
 from dotenv import load_dotenv
+from utils import transport
+from utils.aio import get_loop, run_sync
+from utils.metrics import Counter, Histogram, register
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 SHARPAPI_KEY = os.getenv("SHARPAPI_KEY")
 SUBMIT_URL = "https://api.apyhub.com/sharpapi/api/v1/hr/resume_job_match_score"
 
-def submit_job(resume_path, job_description, language="en"):
+# Seconds before the first status poll, and the cap the interval grows to
+SHARPAPI_POLL_INITIAL_INTERVAL = float(os.getenv("SHARPAPI_POLL_INITIAL_INTERVAL", 1))
+SHARPAPI_POLL_MAX_INTERVAL = float(os.getenv("SHARPAPI_POLL_MAX_INTERVAL", 15))
+SHARPAPI_POLL_TIMEOUT = float(os.getenv("SHARPAPI_POLL_TIMEOUT", 60))
+# Status requests in flight at once across all watched jobs
+SHARPAPI_POLL_CONCURRENCY = int(os.getenv("SHARPAPI_POLL_CONCURRENCY", 8))
+
+SHARPAPI_POLLS = register(Counter("sharpapi_polls_total", "SharpAPI status requests", ["outcome"]))
+SHARPAPI_WAIT_SECONDS = register(Histogram("sharpapi_wait_seconds",
+                                           "Time from watching a SharpAPI job to its result", ["outcome"]))
+
+
+def submit_job(resume, job_description, language="en"):
     """
     Submit resume + job description to SharpAPI and return the status_url.
+    resume is a file path, or the resume's content as bytes.
     """
     headers = {
         "apy-token": SHARPAPI_KEY,
         "Accept": "application/json"
     }
 
-    print(f"[DEBUG] Submitting resume: {resume_path}")
-    with open(resume_path, "rb") as resume_file:
-        files = {
-            "file": resume_file,
-            "content": (None, job_description),
-            "language": (None, language)
-        }
-        response = requests.post(SUBMIT_URL, headers=headers, files=files)
-    
-    print(f"[DEBUG] Submit response status: {response.status_code}")
+    if isinstance(resume, str):
+        logger.debug("Submitting resume: %s", resume)
+        with open(resume, "rb") as resume_file:
+            resume_data = resume_file.read()
+        resume_name = os.path.basename(resume)
+    else:
+        resume_data, resume_name = bytes(resume), "resume.txt"
+    files = {
+        "file": (resume_name, resume_data),
+        "content": (None, job_description),
+        "language": (None, language)
+    }
+    response = transport.post(SUBMIT_URL, headers=headers, files=files)
+
+    logger.debug("Submit response status: %s", response.status_code)
     response.raise_for_status()
     data = response.json()
-    print(f"[DEBUG] Submit response JSON: {data}")
-    
+    logger.debug("Submit response JSON: %s", data)
+
     status_url = data.get("status_url")
-    print(f"[DEBUG] Status URL: {status_url}")
+    logger.debug("Status URL: %s", status_url)
     return status_url
 
-def poll_results(status_url, interval=5, timeout=60):
+
+def fetch_status(status_url):
+    """One status request; returns the response JSON."""
+    response = transport.get(status_url, headers={"apy-token": SHARPAPI_KEY})
+    logger.debug("Polling response status: %s", response.status_code)
+    response.raise_for_status()
+    return response.json()
+
+
+class ResultPoller:
+    """Watches many SharpAPI status URLs from one event loop with adaptive backoff."""
+
+    def __init__(self, max_concurrency, initial_interval, max_interval, timeout, backoff=1.6):
+        self.max_concurrency = max_concurrency
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self.backoff = backoff
+        self._semaphore = None
+        self._semaphore_loop = None
+        self._lock = threading.Lock()
+        self._watching = 0
+        self._outcomes = {"ready": 0, "timeout": 0, "error": 0}
+
+    def _get_semaphore(self):
+        # Belongs to the loop the polls run on, which is replaced after a fork
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def watch_async(self, status_url, timeout=None, initial_interval=None):
+        """
+        Polls status_url until the result has match_scores and returns it,
+        or returns None on timeout or error. Sleeping between polls holds no
+        thread; called from another loop, the watch still runs on the shared one.
+        """
+        if asyncio.get_running_loop() is not get_loop():
+            # Keep every watch on the shared loop, whichever loop the caller runs on
+            return await asyncio.wrap_future(self.watch(status_url, timeout, initial_interval))
+        timeout = self.timeout if timeout is None else timeout
+        interval = self.initial_interval if initial_interval is None else initial_interval
+        started = time.monotonic()
+        deadline = started + timeout
+        outcome = "timeout"
+        with self._lock:
+            self._watching += 1
+        try:
+            while True:
+                await asyncio.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+                async with self._get_semaphore():
+                    # requests is blocking, so only the request itself borrows a worker thread
+                    data = await asyncio.to_thread(fetch_status, status_url)
+                if "match_scores" in data:
+                    SHARPAPI_POLLS.inc(outcome="ready")
+                    outcome = "ready"
+                    return data
+                SHARPAPI_POLLS.inc(outcome="pending")
+                if time.monotonic() >= deadline:
+                    logger.debug("Polling timeout reached for %s", status_url)
+                    return None
+                # Jittered so jobs submitted together don't poll in lockstep
+                interval = min(self.max_interval, interval * self.backoff) * random.uniform(0.9, 1.1)
+        except Exception as e:
+            SHARPAPI_POLLS.inc(outcome="error")
+            logger.warning("SharpAPI polling failed for %s: %s", status_url, e)
+            outcome = "error"
+            return None
+        finally:
+            with self._lock:
+                self._watching -= 1
+                self._outcomes[outcome] += 1
+            SHARPAPI_WAIT_SECONDS.observe(time.monotonic() - started, outcome=outcome)
+
+    def watch(self, status_url, timeout=None, initial_interval=None, callback=None):
+        """
+        Starts watching status_url on the shared loop and returns a
+        concurrent.futures.Future for the result (None on timeout or error).
+        callback, if given, is called with the result when it arrives.
+        """
+        future = asyncio.run_coroutine_threadsafe(self.watch_async(status_url, timeout, initial_interval),
+                                                  get_loop())
+        if callback is not None:
+            future.add_done_callback(lambda f: callback(None if f.cancelled() or f.exception() else f.result()))
+        return future
+
+    def stats(self):
+        with self._lock:
+            return {
+                "watching": self._watching,
+                "max_concurrency": self.max_concurrency,
+                "completed": dict(self._outcomes)
+            }
+
+
+ats_poller = ResultPoller(
+    max_concurrency=SHARPAPI_POLL_CONCURRENCY,
+    initial_interval=SHARPAPI_POLL_INITIAL_INTERVAL,
+    max_interval=SHARPAPI_POLL_MAX_INTERVAL,
+    timeout=SHARPAPI_POLL_TIMEOUT
+)
+
+
+def to_ats_result(data):
+    """Maps a SharpAPI result to the ATS result shape the pipeline uses, or None."""
+    scores = (data or {}).get("match_scores")
+    if not isinstance(scores, dict):
+        return None
+    explanations = data.get("explanations") or data.get("explanation") or ""
+    if isinstance(explanations, dict):
+        explanations = " ".join(str(value) for value in explanations.values())
+    return {
+        "overall_match": scores.get("overall_match", "N/A"),
+        "skills_match": scores.get("skills_match", scores.get("technical_skills", "N/A")),
+        "experience_match": scores.get("experience_match", "N/A"),
+        "education_match": scores.get("education_match", "N/A"),
+        "explanations": explanations,
+        "match_scores": scores
+    }
+
+
+def poll_results(status_url, interval=None, timeout=None):
     """
-    Poll the status_url until results are ready or timeout is reached.
-    Returns JSON result or None if timeout.
+    Wait for the result at status_url, starting with polls `interval`
+    seconds apart. Returns JSON result or None if timeout.
     """
-    headers = {"apy-token": SHARPAPI_KEY}
-    elapsed = 0
-    print(f"[DEBUG] Start polling ATS results at: {status_url}")
-    while elapsed < timeout:
-        response = requests.get(status_url, headers=headers)
-        print(f"[DEBUG] Polling response status: {response.status_code}")
-        response.raise_for_status()
-        data = response.json()
-        if "match_scores" in data:
-            print("[DEBUG] ATS results ready")
-            return data
-        time.sleep(interval)
-        elapsed += interval
-        print(f"[DEBUG] Waiting... elapsed: {elapsed}s")
-    
-    print("[DEBUG] Polling timeout reached")
-    return None
-
-def get_ats_score(resume_path, job_description, language="en", interval=5, timeout=60):
+    return ats_poller.watch(status_url, timeout=timeout, initial_interval=interval).result()
+
+
+async def get_ats_score_async(resume, job_description, language="en", timeout=None):
+    """Submits a job and awaits its result without holding a thread while it is scored."""
+    try:
+        status_url = await asyncio.to_thread(submit_job, resume, job_description, language)
+    except Exception as e:
+        logger.warning("SharpAPI submit failed: %s", e)
+        return None
+    if not status_url:
+        logger.debug("No status URL returned from submit")
+        return None
+    return await ats_poller.watch_async(status_url, timeout=timeout)
+
+
+def get_ats_score(resume, job_description, language="en", timeout=None):
     """
     Wrapper: submit job + poll results.
     """
-    status_url = submit_job(resume_path, job_description, language)
-    if not status_url:
-        print("[DEBUG] No status URL returned from submit")
-        return None
-    #return poll_results(status_url, interval, timeout)
-    return
+    return run_sync(get_ats_score_async(resume, job_description, language, timeout))
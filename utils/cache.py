@@ -0,0 +1,176 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(*parts):
+    """Stable SHA-256 key for any JSON-serialisable values."""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier string cache: an in-memory LRU in front of a directory of files.
+
+    Entries older than `ttl` seconds are treated as misses in both tiers.
+    The memory tier holds at most `max_entries` values; the disk tier is
+    trimmed (oldest first) to `max_disk_bytes`. Set `cache_dir` to None to
+    run memory-only. The disk tier's size is counted as entries are written,
+    so the directory is only scanned once at start and again when a trim is
+    due.
+    """
+
+    def __init__(self, cache_dir=None, max_entries=256, max_disk_bytes=100 * 1024 * 1024, ttl=7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "sets": 0, "evictions": 0}
+        self._disk_bytes = None  # Scanned on first write
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _expired(self, stored_at):
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if not self._expired(stored_at):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            # Promoted with its original timestamp so it still expires on time
+            stored_at, value = entry
+            self._remember(key, value, stored_at)
+        return value
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._stats["sets"] += 1
+            self._remember(key, value, now)
+        self._write_disk(key, value, now)
+
+    def _remember(self, key, value, stored_at):
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _read_disk(self, key):
+        """(stored_at, value) from the disk tier, or None."""
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        stored_at = entry.get("stored_at", 0)
+        if self._expired(stored_at):
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self._count_disk_bytes(-size)
+            except OSError:
+                pass
+            return None
+        return stored_at, entry.get("value")
+
+    def _count_disk_bytes(self, delta):
+        """Adds delta to the disk tier's size; True if it needs a trim (or a first scan)."""
+        with self._lock:
+            if self._disk_bytes is None:
+                return True
+            self._disk_bytes += delta
+            return self._disk_bytes > self.max_disk_bytes
+
+    def _write_disk(self, key, value, stored_at):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"stored_at": stored_at, "value": value}, f)
+            size = os.path.getsize(tmp_path)
+            try:
+                size -= os.path.getsize(path)  # Replacing an existing entry
+            except OSError:
+                pass
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Error writing cache entry: %s", e)
+            return
+        if self._count_disk_bytes(size):
+            self._trim_disk()
+
+    def _trim_disk(self):
+        """Scans the directory, removes the oldest entries past max_disk_bytes and resets the size count."""
+        try:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    st = os.stat(os.path.join(self.cache_dir, name))
+                    entries.append((st.st_mtime, st.st_size, name))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, name in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+                with self._lock:
+                    self._stats["evictions"] += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._disk_bytes = None
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,181 @@
+"""
+Prompt compaction.
+
+Shrinks extracted resume and job description text before it is embedded in
+LLM prompts: normalises whitespace, bullets and ligatures, rejoins words
+hyphenated across line breaks (only where the joined word is known, so
+compounds like "full-stack" keep their hyphen), drops running headers,
+footers and page numbers repeated across PDF pages (pages are separated by form feeds, see
+utils.parser), strips boilerplate job description sections such as "About
+us" and EEO statements, and removes duplicate lines. Nothing here changes
+the wording of the content that remains.
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+from utils.metrics import Counter as MetricCounter, register
+from utils.skill_matcher import load_taxonomy, normalize
+
+# Rough characters-per-token ratio for English text with Gemini's tokenizer
+CHARS_PER_TOKEN = 4
+
+# Lines shorter than this are kept even if repeated ("Remote", dates, job titles)
+DEDUPE_MIN_CHARS = 25
+# Lines checked at the top and bottom of each page for running headers/footers
+FURNITURE_LINES = 3
+
+LIGATURES = str.maketrans({"\ufb00": "ff", "\ufb01": "fi", "\ufb02": "fl", "\ufb03": "ffi", "\ufb04": "ffl",
+                           "\u00a0": " ", "\u2009": " ", "\u200b": "", "\u00ad": "", "\t": " "})
+BULLET_RE = re.compile(r"^[\u2022\u25cf\u25aa\u25e6\u2023\u2043\u2219\u00b7*]\s*")
+HYPHEN_BREAK_RE = re.compile(r"([A-Za-z]+)-\n([a-z]+)")
+WORD_RE = re.compile(r"[a-z]+")
+PAGE_NUMBER_RE = re.compile(r"^(page\s*)?[-–—\s]*\d{1,3}(\s*(of|/)\s*\d{1,3})?[-–—\s]*$", re.I)
+DIGITS_RE = re.compile(r"\d+")
+
+JD_BOILERPLATE_HEADING_RE = re.compile(
+    r"^\s*(about (?!(the |this )?(role|job|position|opportunity)\b|you\b)[\w&.,' -]{1,40}|who we are|"
+    r"our (story|mission|values|culture)|why join us|benefits|perks|what we offer|"
+    r"equal (employment )?opportunity|eeo statement|diversity( and inclusion| & inclusion)?|how to apply|"
+    r"accommodations?|privacy notice)\s*:?\s*$",
+    re.I)
+JD_BOILERPLATE_SENTENCE_RE = re.compile(
+    r"(equal opportunity employer|without regard to (race|age|gender)|reasonable accommodations?|"
+    r"e-verify|protected veteran|all qualified applicants)", re.I)
+
+TOKENS_SAVED = register(MetricCounter("prompt_tokens_saved_total",
+                                      "Estimated prompt tokens removed by compaction", ["document"]))
+
+
+def estimate_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+@lru_cache(maxsize=1)
+def _skill_words():
+    return frozenset(word for canonical, aliases in load_taxonomy().items()
+                     for name in [canonical] + list(aliases) for word in normalize(name).split())
+
+
+def rejoin_hyphenated(text):
+    """
+    Joins words split by a hyphen and a line break when the joined word is
+    used elsewhere in the text or is a skill name ("develop-\nment" with
+    "development" elsewhere); otherwise the line break goes but the hyphen
+    stays, since it may belong to a compound ("full-\nstack").
+    """
+    known = set(WORD_RE.findall(HYPHEN_BREAK_RE.sub(" ", text).lower())) | _skill_words()
+
+    def join(match):
+        head, tail = match.groups()
+        separator = "" if (head + tail).lower() in known else "-"
+        return f"{head}{separator}{tail}"
+
+    return HYPHEN_BREAK_RE.sub(join, text)
+
+
+def normalize_text(text):
+    """Normalises ligatures, odd spaces and bullets, rejoins hyphenated words and trims lines."""
+    text = text.translate(LIGATURES).replace("\r\n", "\n").replace("\r", "\n")
+    text = rejoin_hyphenated(text)
+    pages = []
+    for page in text.split("\f"):
+        lines = []
+        for line in page.split("\n"):
+            line = BULLET_RE.sub("- ", " ".join(line.split()))
+            if line or (lines and lines[-1]):
+                lines.append(line)
+        pages.append("\n".join(lines).strip("\n"))
+    return "\f".join(pages)
+
+
+def strip_page_furniture(text):
+    """
+    Keeps only the first copy of lines repeated at the same position from
+    the top or bottom of at least half of the pages (running headers and
+    footers), and drops such repeated lines entirely when they are page
+    numbers. A single page has nothing repeated, so nothing is removed.
+    """
+    pages = [page.split("\n") for page in text.split("\f")]
+
+    def edge_keys(lines):
+        # {line index: (edge, offset, text with digits masked)} so "Page 2" and "Page 3" match
+        keys = {}
+        for i, line in enumerate(lines[:FURNITURE_LINES]):
+            if line:
+                keys[i] = ("top", i, DIGITS_RE.sub("#", line.lower()))
+        for offset in range(1, min(FURNITURE_LINES, len(lines)) + 1):
+            line = lines[-offset]
+            if line:
+                keys.setdefault(len(lines) - offset, ("bottom", offset, DIGITS_RE.sub("#", line.lower())))
+        return keys
+
+    page_edges = [edge_keys(lines) for lines in pages]
+    counts = Counter(key for edges in page_edges for key in set(edges.values()))
+    threshold = max(2, (len(pages) + 1) // 2)
+
+    kept, emitted = [], set()
+    for lines, edges in zip(pages, page_edges):
+        for i, line in enumerate(lines):
+            key = edges.get(i)
+            if key is not None and counts[key] >= threshold:
+                if PAGE_NUMBER_RE.match(line):
+                    continue
+                if key[2] in emitted:
+                    continue
+                emitted.add(key[2])
+            kept.append(line)
+    return "\n".join(kept)
+
+
+def _is_heading(line):
+    words = line.rstrip(":").split()
+    if not words or len(words) > 6 or not line[0].isalpha() or line.endswith("."):
+        return False
+    return line.endswith(":") or line.isupper() or all(w[0].isupper() or not w[0].isalpha() for w in words)
+
+
+def strip_jd_boilerplate(text):
+    """Drops company-description, benefits and EEO sections and stray EEO sentences."""
+    kept, skipping = [], False
+    for line in text.split("\n"):
+        if JD_BOILERPLATE_HEADING_RE.match(line):
+            skipping = True
+            continue
+        if skipping and _is_heading(line):
+            skipping = False
+        if skipping or JD_BOILERPLATE_SENTENCE_RE.search(line):
+            continue
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def dedupe_lines(text):
+    """Removes repeats of long lines, ignoring case and punctuation differences."""
+    seen, kept = set(), []
+    for line in text.split("\n"):
+        if len(line) >= DEDUPE_MIN_CHARS:
+            key = re.sub(r"[\W_]+", " ", line.lower()).strip()
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(line)
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+
+
+def _report(document, original, compacted):
+    saved = max(0, estimate_tokens(original) - estimate_tokens(compacted))
+    TOKENS_SAVED.inc(saved, document=document)
+    return {"tokens_before": estimate_tokens(original), "tokens_after": estimate_tokens(compacted),
+            "tokens_saved": saved}
+
+
+def compact_resume(text):
+    """Returns (compacted resume text, token stats)."""
+    compacted = dedupe_lines(strip_page_furniture(normalize_text(text)))
+    return compacted, _report("resume", text, compacted)
+
+
+def compact_job_description(text):
+    """Returns (compacted job description text, token stats)."""
+    compacted = dedupe_lines(strip_jd_boilerplate(strip_page_furniture(normalize_text(text))))
+    return compacted, _report("job_description", text, compacted)
@@ -1,61 +1,109 @@
 import html  # for safe escaping
+import os
+from utils.cache import ResponseCache
+from utils.resume_document import ExperienceEntry, build_document
+
+# Sections in display order; "header" is the name and contact line
+RESUME_SECTIONS = ("header", "summary", "skills", "experience", "selected_projects", "education")
+
+# Rendered previews kept in memory, keyed by document digest
+RESUME_HTML_CACHE_ENTRIES = int(os.getenv("RESUME_HTML_CACHE_ENTRIES", 128))
+
+html_cache = ResponseCache(cache_dir=None, max_entries=RESUME_HTML_CACHE_ENTRIES, ttl=None)
+
+
+def _header_html(document):
+    return "\n".join([
+        f"<h1 style='font-size:24px;margin-bottom:4px;'>{html.escape(document.name)}</h1>",
+        f"<p style='color:gray;font-size:12px;margin-bottom:8px;'>{html.escape(document.contact_info)}</p>",
+        "<hr style='border:1px solid #ccc;margin:8px 0;'>"
+    ])
+
+
+def _summary_html(document):
+    if not document.summary:
+        return ""
+    return "\n".join([
+        "<h3 style='margin-bottom:4px;'>Summary</h3>",
+        f"<p style='font-size:12px;margin-bottom:8px;'>{html.escape(document.summary)}</p>"
+    ])
+
+
+def _skills_html(document):
+    if not document.skills:
+        return ""
+    html_parts = ["<h3 style='margin-bottom:4px;'>Skills</h3>",
+                  "<ul style='font-size:12px;margin-bottom:8px;padding-left:20px;'>"]
+    for skill in document.skills:
+        html_parts.append(f"<li>{html.escape(skill)}</li>")
+    html_parts.append("</ul>")
+    return "\n".join(html_parts)
 
-def parse_resume_to_html(enhanced_resume_json):
-    """
-    Converts structured enhanced resume JSON into HTML for preview.
-    Expects experience and education as arrays of objects.
-    """
-    html_parts = []
-
-    # Header
-    html_parts.append(f"<h1 style='font-size:24px;margin-bottom:4px;'>{html.escape(enhanced_resume_json.get('name',''))}</h1>")
-    html_parts.append(f"<p style='color:gray;font-size:12px;margin-bottom:8px;'>{html.escape(enhanced_resume_json.get('contact_info',''))}</p>")
-    html_parts.append("<hr style='border:1px solid #ccc;margin:8px 0;'>")
-
-    # Summary
-    summary = enhanced_resume_json.get('summary', '')
-    if summary:
-        html_parts.append("<h3 style='margin-bottom:4px;'>Summary</h3>")
-        html_parts.append(f"<p style='font-size:12px;margin-bottom:8px;'>{html.escape(summary)}</p>")
-
-    # Skills
-    skills = enhanced_resume_json.get('skills', [])
-    if skills:
-        html_parts.append("<h3 style='margin-bottom:4px;'>Skills</h3>")
-        html_parts.append("<ul style='font-size:12px;margin-bottom:8px;padding-left:20px;'>")
-        for skill in skills:
-            html_parts.append(f"<li>{html.escape(skill)}</li>")
-        html_parts.append("</ul>")
 
-    # Experience
-    experience_list = enhanced_resume_json.get('experience', [])
-    if experience_list:
-        html_parts.append("<h3 style='margin-bottom:4px;'>Experience</h3>")
-        for exp in experience_list:
-            title_line = f"{exp.get('title','')} – {exp.get('company','')} | {exp.get('location','')} ({exp.get('duration','')})"
-            html_parts.append(f"<p style='font-size:12px;margin:2px 0;'><b>{html.escape(title_line)}</b></p>")
-            responsibilities = exp.get('responsibilities', [])
-            if responsibilities:
-                html_parts.append("<ul style='font-size:12px;margin-bottom:8px;padding-left:20px;'>")
-                for r in responsibilities:
-                    html_parts.append(f"<li>{html.escape(r)}</li>")
-                html_parts.append("</ul>")
-
-    # Selected Projects
-    projects = enhanced_resume_json.get('selected_projects', [])
-    if projects:
-        html_parts.append("<h3 style='margin-bottom:4px;'>Selected Projects</h3>")
+def experience_entry_html(exp):
+    """HTML for one experience entry, so a single regenerated entry can be re-rendered on its own."""
+    exp = ExperienceEntry.from_json(exp)
+    html_parts = [f"<p style='font-size:12px;margin:2px 0;'><b>{html.escape(exp.title_line)}</b></p>"]
+    if exp.responsibilities:
         html_parts.append("<ul style='font-size:12px;margin-bottom:8px;padding-left:20px;'>")
-        for proj in projects:
-            html_parts.append(f"<li>{html.escape(str(proj))}</li>")
+        for r in exp.responsibilities:
+            html_parts.append(f"<li>{html.escape(r)}</li>")
         html_parts.append("</ul>")
+    return "\n".join(html_parts)
+
 
-    # Education
-    education_list = enhanced_resume_json.get('education', [])
-    if education_list:
-        html_parts.append("<h3 style='margin-bottom:4px;'>Education</h3>")
-        for edu in education_list:
-            edu_line = f"{edu.get('degree','')} – {edu.get('institution','')} ({edu.get('graduation_year','')})"
-            html_parts.append(f"<p style='font-size:12px;margin:2px 0;'>{html.escape(edu_line)}</p>")
+def _experience_html(document):
+    if not document.experience:
+        return ""
+    return "\n".join(["<h3 style='margin-bottom:4px;'>Experience</h3>"] +
+                     [experience_entry_html(exp) for exp in document.experience])
 
+
+def _projects_html(document):
+    if not document.selected_projects:
+        return ""
+    html_parts = ["<h3 style='margin-bottom:4px;'>Selected Projects</h3>",
+                  "<ul style='font-size:12px;margin-bottom:8px;padding-left:20px;'>"]
+    for proj in document.selected_projects:
+        html_parts.append(f"<li>{html.escape(proj)}</li>")
+    html_parts.append("</ul>")
     return "\n".join(html_parts)
+
+
+def _education_html(document):
+    if not document.education:
+        return ""
+    html_parts = ["<h3 style='margin-bottom:4px;'>Education</h3>"]
+    for edu in document.education:
+        html_parts.append(f"<p style='font-size:12px;margin:2px 0;'>{html.escape(edu.line)}</p>")
+    return "\n".join(html_parts)
+
+
+SECTION_RENDERERS = {
+    "header": _header_html,
+    "summary": _summary_html,
+    "skills": _skills_html,
+    "experience": _experience_html,
+    "selected_projects": _projects_html,
+    "education": _education_html,
+}
+
+
+def render_section_html(resume, section):
+    """HTML for one section of the resume ("" if it is empty); resume is JSON or a ResumeDocument."""
+    return SECTION_RENDERERS[section](build_document(resume))
+
+
+def parse_resume_to_html(resume):
+    """
+    Converts an enhanced resume (JSON or a ResumeDocument) into HTML for
+    preview. Output is memoized by document digest.
+    """
+    document = build_document(resume)
+    cached = html_cache.get(document.digest)
+    if cached is not None:
+        return cached
+    html_parts = [SECTION_RENDERERS[section](document) for section in RESUME_SECTIONS]
+    result = "\n".join(part for part in html_parts if part)
+    html_cache.set(document.digest, result)
+    return result
@@ -1,66 +1,466 @@
+import asyncio
+import contextvars
 import json
+import logging
 import os
+import threading
 import time
+import weakref
+from contextlib import contextmanager
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from google.auth import exceptions as auth_exceptions
+from google.generativeai import client as genai_client
 from google.generativeai.types import generation_types
+from utils.cache import ResponseCache, make_cache_key
+from utils.compaction import estimate_tokens
+from utils.json_repair import repair_json, conform, top_level_fields
+from utils.rate_limit import gemini_limiter, retry_hint, backoff_delay
+from utils.aio import run_sync
+from utils.metrics import (span, Counter, register, GEMINI_CALL_SECONDS, GEMINI_TOKENS, GEMINI_RETRIES,
+                           GEMINI_BACKOFF_SECONDS)
+
+logger = logging.getLogger(__name__)
 
 # API key should be injected at runtime (e.g., in Canvas environment)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 genai.configure(api_key=GEMINI_API_KEY)
 
+# Response cache keyed on prompt + model + generation_config.
+# Set GEMINI_CACHE_DIR to "" for a memory-only cache, GEMINI_CACHE_ENABLED=0 to disable.
+GEMINI_CACHE_ENABLED = os.getenv("GEMINI_CACHE_ENABLED", "1") != "0"
+gemini_cache = ResponseCache(
+    cache_dir=os.getenv("GEMINI_CACHE_DIR", os.path.join("cache", "gemini")) or None,
+    max_entries=int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", 256)),
+    max_disk_bytes=int(os.getenv("GEMINI_CACHE_MAX_BYTES", 100 * 1024 * 1024)),
+    ttl=int(os.getenv("GEMINI_CACHE_TTL", 7 * 24 * 3600))
+)
+
+# Attempts per call; waits between them are governed by utils.rate_limit.gemini_limiter
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", 5))
+
+# Ask again for just the fields missing from a JSON response rather than failing it
+GEMINI_JSON_REASK = os.getenv("GEMINI_JSON_REASK", "1") != "0"
+
+JSON_RESPONSES = register(Counter("gemini_json_responses_total",
+                                  "Gemini JSON responses by how they were made usable", ["outcome"]))
+JSON_TOKENS_SAVED = register(Counter("gemini_json_repair_tokens_saved_total",
+                                     "Estimated output tokens not regenerated thanks to local repair or partial re-asks"))
+
+# Set while re-asking for missing fields, so a re-ask never triggers another
+_reasking = contextvars.ContextVar("gemini_json_reasking", default=False)
+
+# Model clients built once per (event loop, model name, generation config) and reused.
+# genai's own async transport is one grpc.aio client for the whole process, bound to the
+# loop that used it first, so every loop (utils.aio's background loop, an ASGI server's
+# loop) gets a transport of its own, created on that loop, and its models use it. Weak
+# keys drop the clients of loops that have been closed and collected.
+_models = weakref.WeakKeyDictionary()
+_async_clients = weakref.WeakKeyDictionary()
+_models_lock = threading.Lock()
+_NO_LOOP = type("NoLoop", (), {})()
+
+
+def _reset_after_fork():
+    # Clients hold channels opened by the parent; the child builds its own
+    _models.clear()
+    _async_clients.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _async_client(loop):
+    """This loop's async transport; call with _models_lock held, on the loop itself."""
+    client = _async_clients.get(loop)
+    if client is None:
+        try:
+            client = _async_clients[loop] = genai_client._client_manager.make_client("generative_async")
+        except auth_exceptions.DefaultCredentialsError:
+            # No API key; the call itself fails and reports it
+            return None
+    return client
+
+
+def get_model(model_name, generation_config=None):
+    """
+    Returns the shared GenerativeModel for this model name and generation
+    config, bound to the running event loop's transport.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = _NO_LOOP
+    key = (model_name, make_cache_key(generation_config))
+    with _models_lock:
+        models = _models.setdefault(loop, {})
+        model = models.get(key)
+        if model is None:
+            model = genai.GenerativeModel(model_name, generation_config=generation_config)
+            if loop is not _NO_LOOP:
+                model._async_client = _async_client(loop)
+            models[key] = model
+    return model
+
+
+def _parse_response_text(text, json_output):
+    if not json_output:
+        return text
+    value, repairs, _ = repair_json(text)
+    if value is None:
+        logger.warning("JSON decoding error (%s), raw response: %s", ", ".join(repairs), text[:500])
+    return value
+
+
+async def _reask_fields(prompt, model_name, schema, fields, partial):
+    """Asks for just `fields` of a response whose other fields are already in `partial`."""
+    received = {key: value for key, value in partial.items() if key not in fields}
+    reask_prompt = f"""{prompt}
+
+Your previous answer was cut short. Fields already received (do not repeat them):
+{json.dumps(received)}
+
+Return only a JSON object with the missing fields: {", ".join(fields)}.
+"""
+    generation_config = {
+        "response_mime_type": "application/json",
+        "response_schema": {
+            "type": "object",
+            "properties": {field: schema["properties"][field] for field in fields},
+            "required": fields
+        }
+    }
+    token = _reasking.set(True)
+    try:
+        result = await call_gemini_api_async(reask_prompt, model_name, json_output=True,
+                                             generation_config=generation_config, use_cache=False)
+    finally:
+        _reasking.reset(token)
+    return result if isinstance(result, dict) else None
+
+
+async def _finish_response(prompt, model_name, text, json_output, generation_config):
+    """
+    Parses a fresh response. JSON is repaired locally where possible and
+    checked against the response_schema; required fields that are missing
+    are re-asked for on their own. Returns (result, text to cache or None).
+    """
+    if not json_output:
+        return text, text
+    value, repairs, truncated_at = repair_json(text)
+    if value is None:
+        logger.warning("JSON decoding error (%s), raw response: %s", ", ".join(repairs), text[:500])
+        JSON_RESPONSES.inc(outcome="failed")
+        return None, None
+
+    schema = (generation_config or {}).get("response_schema")
+    missing, changed = [], False
+    if schema:
+        conformed, missing = conform(value, schema, truncated_at=truncated_at)
+        changed, value = conformed != value, conformed
+    # Only whole fields are re-asked for; gaps inside array items stay filled with empty values
+    fields = ([field for field in top_level_fields(missing) if field in missing]
+              if schema and schema.get("type") == "object" else [])
+
+    if fields and GEMINI_JSON_REASK and not _reasking.get():
+        fragment = await _reask_fields(prompt, model_name, schema, fields, value)
+        if fragment is None:
+            # Keep the partial answer (missing fields are empty) but don't cache it
+            JSON_RESPONSES.inc(outcome="incomplete")
+            return value, None
+        fragment, _ = conform(fragment, {"type": "object", "properties": schema["properties"], "required": []})
+        value.update({field: fragment[field] for field in fields})
+        JSON_RESPONSES.inc(outcome="reasked")
+        JSON_TOKENS_SAVED.inc(max(0, estimate_tokens(text) - estimate_tokens(json.dumps(fragment))))
+        return value, json.dumps(value)
+    if repairs or missing:
+        logger.info("Repaired Gemini JSON response: %s", ", ".join(repairs + missing))
+        JSON_RESPONSES.inc(outcome="repaired")
+        JSON_TOKENS_SAVED.inc(estimate_tokens(text))
+        return value, json.dumps(value)
+    JSON_RESPONSES.inc(outcome="clean")
+    # Cache hits are parsed without the schema, so cache the conformed value if it differs
+    return value, (json.dumps(value) if changed else text)
+
+
+@contextmanager
+def _gemini_span(model_name, streamed=False):
+    """Span for one Gemini call that also feeds the per-model latency histogram."""
+    started = time.perf_counter()
+    with span("gemini_call", model=model_name, streamed=streamed, retries=0, backoff_s=0) as current:
+        try:
+            yield current
+        finally:
+            GEMINI_CALL_SECONDS.observe(time.perf_counter() - started, model=model_name, outcome=current.outcome)
+
+
+async def _record_usage(model_name, response, current, estimated_tokens):
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+    GEMINI_TOKENS.inc(prompt_tokens, model=model_name, kind="prompt")
+    GEMINI_TOKENS.inc(output_tokens, model=model_name, kind="output")
+    current.set(prompt_tokens=prompt_tokens, output_tokens=output_tokens)
+    # The limiter was charged an estimate of the prompt; settle up with the real usage
+    await gemini_limiter.debit_async(prompt_tokens + output_tokens - estimated_tokens)
+
+
+async def _wait_for_budget(estimated_tokens, current):
+    waited = await gemini_limiter.acquire_async(estimated_tokens)
+    current.set(queue_wait_s=round(current.attrs.get("queue_wait_s", 0) + waited, 3))
+
+
+def _is_rate_limited(error):
+    if isinstance(error, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)):
+        return True
+    error_message = str(error).lower()
+    return "rate limit" in error_message or "resource exhausted" in error_message
+
+
+async def _schedule_retry(model_name, error, retries, base_delay, current):
+    """
+    Pauses the shared limiter for the server's retry hint, or a jittered
+    backoff, so every caller holds off together; the next acquire waits it out.
+    """
+    delay = retry_hint(error)
+    if delay is None:
+        delay = backoff_delay(retries, base_delay)
+    logger.warning("Gemini rate limit hit, retrying in %.1fs", delay)
+    await gemini_limiter.pause_async(delay)
+    GEMINI_RETRIES.inc(model=model_name)
+    GEMINI_BACKOFF_SECONDS.inc(delay, model=model_name)
+    current.set(retries=retries + 1, backoff_s=round(current.attrs["backoff_s"] + delay, 3))
+
 
 def call_gemini_api(prompt, model_name="gemini-2.5-flash-preview-05-20",
-                    json_output=False, generation_config=None, chat_history=None):
+                    json_output=False, generation_config=None, chat_history=None,
+                    use_cache=True):
+    """Synchronous wrapper around call_gemini_api_async."""
+    return run_sync(call_gemini_api_async(prompt, model_name, json_output, generation_config,
+                                          chat_history, use_cache))
+
+
+async def call_gemini_api_async(prompt, model_name="gemini-2.5-flash-preview-05-20",
+                                json_output=False, generation_config=None, chat_history=None,
+                                use_cache=True):
     """
-    Helper function to call the Gemini API with exponential backoff.
+    Helper function to call the Gemini API, waiting on the shared rate limiter
+    (utils.rate_limit) for budget and retrying rate-limited calls.
     Supports JSON output when json_output=True.
+    Successful responses are cached; pass use_cache=False to force a fresh call.
     """
     chat_history = chat_history or []
-    model = genai.GenerativeModel(model_name)
 
     # Default schema if JSON output is expected but not provided
     if json_output and generation_config is None:
         generation_config = {"response_mime_type": "application/json"}
 
-    retries, max_retries, base_delay = 0, 5, 1
+    use_cache = use_cache and GEMINI_CACHE_ENABLED
+    cache_key = make_cache_key(prompt, model_name, generation_config)
+    if use_cache:
+        cached_text = gemini_cache.get(cache_key)
+        if cached_text is not None:
+            return _parse_response_text(cached_text, json_output)
 
-    while retries < max_retries:
-        try:
-            response = model.generate_content(prompt, generation_config=generation_config)
+    with _gemini_span(model_name) as current:
+        model = get_model(model_name, generation_config)
+        retries, max_retries, base_delay = 0, GEMINI_MAX_RETRIES, 1
+        estimated_tokens = estimate_tokens(prompt)
 
-            if json_output:
-                json_text = getattr(response, "text", None)
-                if not json_text:
-                    return None
+        while retries < max_retries:
+            try:
+                await _wait_for_budget(estimated_tokens, current)
+                response = await model.generate_content_async(prompt)
+                await _record_usage(model_name, response, current, estimated_tokens)
 
-                cleaned = json_text.strip().strip("`")
-                try:
-                    return json.loads(cleaned)
-                except json.JSONDecodeError as e:
-                    print(f"JSON decoding error: {e}, Raw response: {cleaned}")
+                text = getattr(response, "text", None)
+                if not text:
+                    current.outcome = "empty"
                     return None
-            return getattr(response, "text", None)
+                result, cache_text = await _finish_response(prompt, model_name, text, json_output,
+                                                            generation_config)
+                # Only cache responses that parsed, so a bad completion can be retried
+                if use_cache and cache_text is not None:
+                    gemini_cache.set(cache_key, cache_text)
+                if result is None:
+                    current.outcome = "invalid"
+                return result
 
-        except (generation_types.BlockedPromptException,
-                generation_types.StopCandidateException) as e:
-            print(f"Prompt blocked/stopped: {e}")
-            return None
-        except Exception as e:
-            error_message = str(e).lower()
-            if "rate limit" in error_message or "resource exhausted" in error_message:
-                delay = base_delay * (2 ** retries)
-                print(f"Rate limit hit. Retrying in {delay}s...")
-                time.sleep(delay)
-                retries += 1
-            else:
-                print(f"Unexpected API error: {e}")
+            except (generation_types.BlockedPromptException,
+                    generation_types.StopCandidateException) as e:
+                logger.warning("Gemini prompt blocked/stopped: %s", e)
+                current.outcome = "blocked"
                 return None
+            except Exception as e:
+                if _is_rate_limited(e):
+                    await _schedule_retry(model_name, e, retries, base_delay, current)
+                    retries += 1
+                else:
+                    logger.error("Unexpected Gemini API error: %s", e)
+                    current.outcome = "error"
+                    return None
+
+        logger.error("Gemini max retries (%s) exceeded", max_retries)
+        current.outcome = "rate_limited"
+        return None
+
+
+async def stream_gemini_api_async(prompt, model_name="gemini-2.5-flash-preview-05-20",
+                                  json_output=False, generation_config=None, use_cache=True):
+    """
+    Streaming counterpart of call_gemini_api_async.
+    Yields ("chunk", text) as partial output arrives, then a single
+    ("result", value) with the parsed response (None on failure).
+    Rate-limit retries only happen before the first chunk has been received.
+    """
+    if json_output and generation_config is None:
+        generation_config = {"response_mime_type": "application/json"}
+
+    use_cache = use_cache and GEMINI_CACHE_ENABLED
+    cache_key = make_cache_key(prompt, model_name, generation_config)
+    if use_cache:
+        cached_text = gemini_cache.get(cache_key)
+        if cached_text is not None:
+            yield "chunk", cached_text
+            yield "result", _parse_response_text(cached_text, json_output)
+            return
+
+    with _gemini_span(model_name, streamed=True) as current:
+        model = get_model(model_name, generation_config)
+        retries, max_retries, base_delay = 0, GEMINI_MAX_RETRIES, 1
+        estimated_tokens = estimate_tokens(prompt)
+
+        while retries < max_retries:
+            parts = []
+            try:
+                await _wait_for_budget(estimated_tokens, current)
+                response = await model.generate_content_async(prompt, stream=True)
+                async for chunk in response:
+                    text = getattr(chunk, "text", None)
+                    if text:
+                        parts.append(text)
+                        yield "chunk", text
+                await _record_usage(model_name, response, current, estimated_tokens)
+
+                text = "".join(parts)
+                result, cache_text = None, None
+                if text:
+                    result, cache_text = await _finish_response(prompt, model_name, text, json_output,
+                                                                generation_config)
+                if use_cache and cache_text is not None:
+                    gemini_cache.set(cache_key, cache_text)
+                if result is None:
+                    current.outcome = "invalid"
+                yield "result", result
+                return
+
+            except (generation_types.BlockedPromptException,
+                    generation_types.StopCandidateException) as e:
+                logger.warning("Gemini prompt blocked/stopped: %s", e)
+                current.outcome = "blocked"
+                break
+            except Exception as e:
+                if not parts and _is_rate_limited(e):
+                    await _schedule_retry(model_name, e, retries, base_delay, current)
+                    retries += 1
+                else:
+                    logger.error("Unexpected Gemini API error: %s", e)
+                    current.outcome = "error"
+                    break
+        else:
+            logger.error("Gemini max retries (%s) exceeded", max_retries)
+            current.outcome = "rate_limited"
+
+    yield "result", None
+
+
+# Response schemas shared by the per-stage calls and the fused analysis call
+ATS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "overall_match": {"type": "integer"},
+        "skills_match": {"type": "integer"},
+        "experience_match": {"type": "integer"},
+        "education_match": {"type": "integer"},
+        "explanations": {"type": "string"}
+    },
+    "required": ["overall_match", "skills_match", "experience_match", "education_match", "explanations"]
+}
+
+SUGGESTIONS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "missing_skills": {"type": "array", "items": {"type": "string"}},
+        "emphasize_skills": {"type": "array", "items": {"type": "string"}},
+        "section_reorganization": {"type": "array", "items": {"type": "string"}},
+        "other_recommendations": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["missing_skills", "emphasize_skills", "section_reorganization", "other_recommendations"]
+}
+
+ENHANCED_RESUME_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "contact_info": {"type": "string"},
+        "summary": {"type": "string"},
+        "skills": {"type": "array", "items": {"type": "string"}},
+        "experience": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "company": {"type": "string"},
+                    "location": {"type": "string"},
+                    "duration": {"type": "string"},
+                    "responsibilities": {"type": "array", "items": {"type": "string"}}
+                },
+                "required": ["title", "company", "location", "duration", "responsibilities"]
+            }
+        },
+        "education": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "degree": {"type": "string"},
+                    "institution": {"type": "string"},
+                    "graduation_year": {"type": "string"}
+                },
+                "required": ["degree", "institution", "graduation_year"]
+            }
+        },
+        "selected_projects": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["name", "contact_info", "summary", "skills", "experience", "education", "selected_projects"]
+}
+
+FUSED_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "ats_result": ATS_SCHEMA,
+        "suggestions": SUGGESTIONS_SCHEMA,
+        "enhanced_resume": ENHANCED_RESUME_SCHEMA
+    },
+    "required": ["ats_result", "suggestions", "enhanced_resume"]
+}
 
-    print(f"Max retries ({max_retries}) exceeded.")
-    return None
+EMPTY_SUGGESTIONS = {
+    "missing_skills": [],
+    "emphasize_skills": [],
+    "section_reorganization": [],
+    "other_recommendations": []
+}
 
 
 def get_ats_score(resume_text, job_description_text):
+    return run_sync(get_ats_score_async(resume_text, job_description_text))
+
+
+async def get_ats_score_async(resume_text, job_description_text):
     prompt = f"""
 You are an ATS scoring expert. Given the resume and job description below,
 analyze how well the candidate matches the job.
@@ -78,14 +478,18 @@ Job Description:
 {job_description_text}
 """
     try:
-        result = call_gemini_api(prompt, json_output=True)
+        result = await call_gemini_api_async(prompt, json_output=True)
         return result if isinstance(result, dict) else None
     except Exception as e:
-        print(f"Error calling Gemini API for ATS scoring: {e}")
+        logger.warning("Error calling Gemini API for ATS scoring: %s", e)
         return None
 
 
 def get_suggestions(resume_text, job_description_text, ats_result):
+    return run_sync(get_suggestions_async(resume_text, job_description_text, ats_result))
+
+
+async def get_suggestions_async(resume_text, job_description_text, ats_result):
     """
     Generates structured suggestions for improving a resume.
     """
@@ -110,33 +514,15 @@ ATS Result:
 """
     generation_config = {
         "response_mime_type": "application/json",
-        "response_schema": {
-            "type": "object",
-            "properties": {
-                "missing_skills": {"type": "array", "items": {"type": "string"}},
-                "emphasize_skills": {"type": "array", "items": {"type": "string"}},
-                "section_reorganization": {"type": "array", "items": {"type": "string"}},
-                "other_recommendations": {"type": "array", "items": {"type": "string"}}
-            },
-            "required": ["missing_skills", "emphasize_skills", "section_reorganization", "other_recommendations"]
-        }
+        "response_schema": SUGGESTIONS_SCHEMA
     }
 
-    raw_response = call_gemini_api(prompt, json_output=True, generation_config=generation_config)
-    return raw_response or {
-        "missing_skills": [],
-        "emphasize_skills": [],
-        "section_reorganization": [],
-        "other_recommendations": []
-    }
+    raw_response = await call_gemini_api_async(prompt, json_output=True, generation_config=generation_config)
+    return raw_response or dict(EMPTY_SUGGESTIONS)
 
 
-def generate_enhanced_resume(resume_text, job_description_text, ats_result, suggestions):
-    """
-    Generates an ATS-optimized, job-relevant resume in structured JSON format.
-    Ensures experience and education are arrays of objects for PDF/HTML rendering.
-    """
-    prompt = f"""
+def _enhanced_resume_prompt(resume_text, job_description_text, ats_result, suggestions):
+    return f"""
 You are an expert resume writer. Rewrite the resume into an ATS-optimized, job-relevant single-page version.
 
 Requirements:
@@ -163,50 +549,168 @@ Suggestions:
 {json.dumps(suggestions)}
 """
 
+
+def generate_enhanced_resume(resume_text, job_description_text, ats_result, suggestions):
+    return run_sync(generate_enhanced_resume_async(resume_text, job_description_text, ats_result, suggestions))
+
+
+async def generate_enhanced_resume_async(resume_text, job_description_text, ats_result, suggestions):
+    """
+    Generates an ATS-optimized, job-relevant resume in structured JSON format.
+    Ensures experience and education are arrays of objects for PDF/HTML rendering.
+    """
+    prompt = _enhanced_resume_prompt(resume_text, job_description_text, ats_result, suggestions)
+    generation_config = {
+        "response_mime_type": "application/json",
+        "response_schema": ENHANCED_RESUME_SCHEMA
+    }
+
+    try:
+        raw_response = await call_gemini_api_async(prompt, json_output=True, generation_config=generation_config)
+        return raw_response if isinstance(raw_response, dict) else None
+    except Exception as e:
+        logger.warning("Error generating enhanced resume: %s", e)
+        return None
+
+
+async def stream_enhanced_resume_async(resume_text, job_description_text, ats_result, suggestions):
+    """
+    Streaming variant of generate_enhanced_resume_async.
+    Yields ("chunk", text) while the rewrite is generated, then ("result", dict or None).
+    """
+    prompt = _enhanced_resume_prompt(resume_text, job_description_text, ats_result, suggestions)
+    generation_config = {
+        "response_mime_type": "application/json",
+        "response_schema": ENHANCED_RESUME_SCHEMA
+    }
+
+    async for kind, value in stream_gemini_api_async(prompt, json_output=True, generation_config=generation_config):
+        if kind == "result":
+            value = value if isinstance(value, dict) else None
+        yield kind, value
+
+
+async def analyze_resume_fused_async(resume_text, job_description_text):
+    """
+    Scores, critiques and rewrites the resume in a single structured-output call.
+    Returns (ats_result, suggestions, enhanced_resume) in the same shapes as the
+    per-stage functions, or None if the response is unusable so the caller can
+    fall back to the per-stage calls.
+    """
+    prompt = f"""
+You are an ATS scoring expert, career coach and expert resume writer.
+Given the resume and job description below, do all three steps and return them as one JSON object.
+
+1. ats_result - score how well the candidate matches the job:
+   overall_match, skills_match, experience_match, education_match (integers 0-100)
+   and explanations (detailed reasoning for each score).
+2. suggestions - based on your scores, list missing_skills, emphasize_skills,
+   section_reorganization and other_recommendations.
+3. enhanced_resume - rewrite the resume into an ATS-optimized, job-relevant single-page version
+   that applies your suggestions:
+   - Sections: Summary, Skills, Experience, Education, Selected Projects
+   - Highlight relevant experience/skills
+   - Incorporate missing skills (without adding false info)
+   - Concise, readable, single-page
+   - Use bullet points and strong action verbs
+   - Experience must be an array of objects: {{ "title": "...", "company": "...", "location": "...", "duration": "...", "responsibilities": ["...", "..."] }}
+   - Education must be an array of objects: {{ "degree": "...", "institution": "...", "graduation_year": "..." }}
+
+Resume:
+{resume_text}
+
+Job Description:
+{job_description_text}
+"""
+    generation_config = {
+        "response_mime_type": "application/json",
+        "response_schema": FUSED_ANALYSIS_SCHEMA
+    }
+
+    try:
+        raw_response = await call_gemini_api_async(prompt, json_output=True, generation_config=generation_config)
+    except Exception as e:
+        logger.warning("Error calling Gemini API for fused analysis: %s", e)
+        return None
+    if not isinstance(raw_response, dict):
+        return None
+
+    ats_result = raw_response.get("ats_result")
+    suggestions = raw_response.get("suggestions")
+    enhanced_resume = raw_response.get("enhanced_resume")
+    if not isinstance(ats_result, dict) or not isinstance(enhanced_resume, dict):
+        return None
+    if not isinstance(suggestions, dict):
+        suggestions = dict(EMPTY_SUGGESTIONS)
+    return ats_result, suggestions, enhanced_resume
+
+
+# Sections that can be regenerated on their own; "experience" means one entry of the list
+SECTION_SCHEMAS = {
+    "summary": ENHANCED_RESUME_SCHEMA["properties"]["summary"],
+    "skills": ENHANCED_RESUME_SCHEMA["properties"]["skills"],
+    "experience": ENHANCED_RESUME_SCHEMA["properties"]["experience"]["items"],
+    "selected_projects": ENHANCED_RESUME_SCHEMA["properties"]["selected_projects"],
+}
+
+
+def _section_context(enhanced_resume, section):
+    """The least of the rest of the resume a section needs to be rewritten consistently."""
+    roles = [f"{exp.get('title', '')} at {exp.get('company', '')}" for exp in enhanced_resume.get("experience", [])]
+    if section == "summary":
+        return {"roles": roles, "skills": enhanced_resume.get("skills", [])}
+    if section == "skills":
+        return {"roles": roles}
+    return {"skills": enhanced_resume.get("skills", [])}
+
+
+async def regenerate_section_async(enhanced_resume, section, target=None, index=None, instructions=""):
+    """
+    Rewrites one section of an enhanced resume (one entry when section is
+    "experience") and returns its new value, or None on failure. target is a
+    small dict describing the job (e.g. required_skills and seniority from a
+    JD profile) instead of the full job description, so the prompt stays short.
+    """
+    current = enhanced_resume.get(section)
+    if section == "experience":
+        current = current[index]
+    prompt = f"""
+You are an expert resume writer. Rewrite only the {section.replace("_", " ")} section of a resume below,
+keeping it ATS-optimized, concise and truthful (do not invent experience or skills).
+Return JSON of the form {{"value": ...}} where value has the same structure as the current section.
+{f"Instructions from the candidate: {instructions}" if instructions else ""}
+
+Current section:
+{json.dumps(current)}
+
+Rest of the resume (for consistency only, do not rewrite):
+{json.dumps(_section_context(enhanced_resume, section))}
+
+Target job:
+{json.dumps(target or {})}
+"""
     generation_config = {
         "response_mime_type": "application/json",
         "response_schema": {
             "type": "object",
-            "properties": {
-                "name": {"type": "string"},
-                "contact_info": {"type": "string"},
-                "summary": {"type": "string"},
-                "skills": {"type": "array", "items": {"type": "string"}},
-                "experience": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "title": {"type": "string"},
-                            "company": {"type": "string"},
-                            "location": {"type": "string"},
-                            "duration": {"type": "string"},
-                            "responsibilities": {"type": "array", "items": {"type": "string"}}
-                        },
-                        "required": ["title", "company", "location", "duration", "responsibilities"]
-                    }
-                },
-                "education": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "degree": {"type": "string"},
-                            "institution": {"type": "string"},
-                            "graduation_year": {"type": "string"}
-                        },
-                        "required": ["degree", "institution", "graduation_year"]
-                    }
-                },
-                "selected_projects": {"type": "array", "items": {"type": "string"}}
-            },
-            "required": ["name", "contact_info", "summary", "skills", "experience", "education", "selected_projects"]
+            "properties": {"value": SECTION_SCHEMAS[section]},
+            "required": ["value"]
         }
     }
 
     try:
-        raw_response = call_gemini_api(prompt, json_output=True, generation_config=generation_config)
-        return raw_response if isinstance(raw_response, dict) else None
+        # Uncached: asking again for the same section should give a fresh rewrite
+        raw_response = await call_gemini_api_async(prompt, json_output=True, generation_config=generation_config,
+                                                   use_cache=False)
     except Exception as e:
-        print(f"Error generating enhanced resume: {e}")
+        logger.warning("Error calling Gemini API for section regeneration: %s", e)
+        return None
+    if not isinstance(raw_response, dict):
+        return None
+    value = raw_response.get("value")
+    expected = SECTION_SCHEMAS[section]["type"]
+    if (expected == "string" and not isinstance(value, str)) or \
+            (expected == "array" and not isinstance(value, list)) or \
+            (expected == "object" and not isinstance(value, dict)):
         return None
+    return value
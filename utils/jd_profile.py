@@ -0,0 +1,156 @@
+"""
+Job description profiles.
+
+A profile is everything the pipeline derives from a job description alone,
+computed once and stored in an index keyed by a hash of the normalised
+text. Screening many resumes against one posting then reuses the profile
+instead of re-tokenising the JD, and every LLM prompt sees byte-identical
+JD text, so the Gemini response cache can hit across submissions. The
+profile text is compacted (utils.compaction), so boilerplate such as "About
+us" and EEO sections never reaches scoring or prompts.
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from utils.scoring import jd_term_weights, find_skills, required_years, education_level
+from utils.compaction import compact_job_description
+
+MAX_TERM_WEIGHTS = 200
+
+PREFERRED_HEADING_RE = re.compile(r"\b(preferred|nice to have|nice-to-have|bonus|desired|pluses?)\b", re.I)
+HEADING_RE = re.compile(r"^\s*[A-Za-z][A-Za-z /&-]{0,40}:\s*$")
+
+SENIORITY_LEVELS = [
+    ("principal", re.compile(r"\b(principal|distinguished|architect)\b", re.I)),
+    ("lead", re.compile(r"\b(lead|staff|head of|manager)\b", re.I)),
+    ("senior", re.compile(r"\b(senior|sr\.?)\b", re.I)),
+    ("junior", re.compile(r"\b(junior|jr\.?|entry[- ]level|graduate)\b", re.I)),
+    ("intern", re.compile(r"\b(intern|internship)\b", re.I)),
+]
+
+
+def normalize_jd_text(text):
+    """Trims lines and collapses blank-line runs and repeated spaces."""
+    lines = [" ".join(line.split()) for line in text.strip().splitlines()]
+    normalized, blank = [], False
+    for line in lines:
+        if not line:
+            if not blank:
+                normalized.append("")
+            blank = True
+            continue
+        normalized.append(line)
+        blank = False
+    return "\n".join(normalized)
+
+
+def jd_profile_id(normalized_text):
+    return hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+
+
+def split_preferred(text):
+    """Splits JD text into (required_text, preferred_text) using section headings."""
+    required, preferred = [], []
+    target = required
+    for line in text.splitlines():
+        if HEADING_RE.match(line):
+            target = preferred if PREFERRED_HEADING_RE.search(line) else required
+        target.append(line)
+    return "\n".join(required), "\n".join(preferred)
+
+
+def detect_seniority(text):
+    # The title is the strongest signal, so check the first line before the body
+    first_line = text.split("\n", 1)[0]
+    for source in (first_line, text):
+        for level, pattern in SENIORITY_LEVELS:
+            if pattern.search(source):
+                return level
+    return "mid"
+
+
+def build_jd_profile(job_description_text):
+    """Computes a compact profile for a job description."""
+    normalized = normalize_jd_text(job_description_text)
+    text, compaction = compact_job_description(normalized)
+    required_text, preferred_text = split_preferred(text)
+    required = find_skills(required_text)
+    preferred = find_skills(preferred_text)
+
+    weights = jd_term_weights(text)
+    top_terms = sorted(weights.items(), key=lambda item: item[1], reverse=True)[:MAX_TERM_WEIGHTS]
+
+    return {
+        "id": jd_profile_id(normalized),
+        "text": text,
+        "required_skills": list(required),
+        "preferred_skills": [skill for skill in preferred if skill not in required],
+        "skill_counts": dict(required + preferred),
+        "seniority": detect_seniority(text),
+        "required_years": required_years(text),
+        "education_level": education_level(text),
+        "term_weights": {term: round(weight, 4) for term, weight in top_terms},
+        "compaction": compaction,
+    }
+
+
+class JDProfileIndex:
+    """
+    Thread-safe, size-bounded LRU index of profiles keyed by content hash,
+    both of the JD as submitted and of the compacted text the profile stores.
+    """
+
+    def __init__(self, max_profiles=1000):
+        self.max_profiles = max_profiles
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get(self, profile_id):
+        with self._lock:
+            profile = self._profiles.get(profile_id)
+            if profile is not None:
+                self._profiles.move_to_end(profile_id)
+            return profile
+
+    def get_or_build(self, job_description_text):
+        """Returns the profile for this JD text, building and storing it on first use."""
+        profile_id = jd_profile_id(normalize_jd_text(job_description_text))
+        with self._lock:
+            profile = self._profiles.get(profile_id)
+            if profile is not None:
+                self._profiles.move_to_end(profile_id)
+                self._stats["hits"] += 1
+                return profile
+            self._stats["misses"] += 1
+
+        profile = build_jd_profile(job_description_text)
+        # Also stored under the hash of its compacted text, which is what later stages (and
+        # uploads naming a jd_profile_id) pass back in, so they find this profile
+        # rather than building a second one under a new ID
+        stored_id = jd_profile_id(normalize_jd_text(profile["text"]))
+        with self._lock:
+            self._profiles[profile_id] = profile
+            self._profiles[stored_id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, profiles=len({profile["id"] for profile in self._profiles.values()}))
+
+
+jd_index = JDProfileIndex(max_profiles=int(os.getenv("JD_PROFILE_INDEX_SIZE", 1000)))
+
+
+def get_jd_profile(job_description_text):
+    """Profile for a JD from the process-wide index."""
+    return jd_index.get_or_build(job_description_text)
+
+
+def jd_profile_summary(profile):
+    """Profile without the bulky text and term vector, for API responses."""
+    return {key: value for key, value in profile.items() if key not in ("text", "term_weights")}
@@ -0,0 +1,115 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised by JobQueue.submit when every worker and queue slot is taken."""
+
+
+class JobQueue:
+    """
+    Bounded background job runner.
+
+    At most `max_workers` jobs run at once and at most `max_pending` more may
+    wait behind them; anything beyond that is rejected with QueueFullError so
+    the caller can apply backpressure. Finished jobs are kept for `result_ttl`
+    seconds so clients can poll for them.
+    """
+
+    def __init__(self, max_workers=4, max_pending=16, result_ttl=3600):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, job_id=None, **kwargs):
+        """Queues fn(*args, **kwargs) and returns the job ID (job_id, or a new one)."""
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError("Job queue is full")
+
+        job_id = job_id or uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "status": JOB_QUEUED,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None
+        }
+        with self._lock:
+            self._purge_expired()
+            self._jobs[job_id] = job
+        try:
+            self._executor.submit(self._run, job, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            self._slots.release()
+            raise
+        return job_id
+
+    def acquire_slot(self):
+        """
+        Takes a slot for work that runs outside the pool (a streamed request),
+        so it counts against the same limits as queued jobs. Raises
+        QueueFullError if none is free; give it back with release_slot().
+        """
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError("Job queue is full")
+
+    def release_slot(self):
+        self._slots.release()
+
+    def _run(self, job, fn, args, kwargs):
+        job["status"] = JOB_RUNNING
+        job["started_at"] = time.time()
+        try:
+            job["result"] = fn(*args, **kwargs)
+            job["status"] = JOB_DONE
+        except Exception as e:
+            job["error"] = str(e)
+            job["status"] = JOB_FAILED
+        finally:
+            job["finished_at"] = time.time()
+            self._slots.release()
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job["finished_at"] is not None and job["finished_at"] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """Returns the job dict, or None if it is unknown or expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        """Returns a JSON-safe status summary for a job (without its result)."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        return {key: job[key] for key in ("id", "status", "created_at", "started_at", "finished_at", "error")}
+
+    def stats(self):
+        with self._lock:
+            counts = {JOB_QUEUED: 0, JOB_RUNNING: 0, JOB_DONE: 0, JOB_FAILED: 0}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "jobs": counts
+        }
@@ -0,0 +1,205 @@
+"""
+Local repair and schema checks for LLM JSON output.
+
+A completion that fails `json.loads` is usually almost right: wrapped in
+code fences, followed by a stray sentence, left with a trailing comma, or
+cut off mid-array when it hit the output limit. `repair_json` fixes those
+locally; a truncated value is cut back to its last complete element and the
+open brackets are closed, and the array that was still open at the cut is
+reported. `conform` then checks the value against the
+Gemini response_schema dicts the enhancer already passes, coerces near-miss
+types and fills in optional fields. What it can't fill (missing required
+fields) is reported so the caller can ask for just those fields instead of
+the whole response again.
+"""
+import json
+import re
+
+FENCE_RE = re.compile(r"^\s*```(?:json|JSON)?\s*|\s*```\s*$")
+
+_EMPTY = {"string": "", "array": list, "object": dict, "integer": 0, "number": 0, "boolean": False}
+
+
+def _scan(text):
+    """
+    Walks JSON text outside strings. Returns (end of the first complete
+    top-level value or None, stack of open brackets at the end, the last
+    point (index, stack) where the text can be cut and closed).
+    """
+    stack, in_string, escaped = [], False, False
+    safe = (0, [])
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+            safe = (i + 1, list(stack))
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return i + 1, [], safe
+            safe = (i + 1, list(stack))
+        elif char == ",":
+            safe = (i, list(stack))
+    return None, stack, safe
+
+
+def _strip_trailing_commas(text):
+    out, in_string, escaped = [], False, False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == ",":
+            rest = text[i + 1:].lstrip()
+            if not rest or rest[0] in "}]":
+                continue
+        out.append(char)
+    return "".join(out)
+
+
+def _open_array_path(value, stack):
+    """
+    Path (in conform's format) of the innermost array among the containers
+    still open at a cut, or None. Each open container is the last child of
+    the one before it, so they are found by following last children down.
+    """
+    path, node, found = "", value, None
+    for depth, closer in enumerate(stack):
+        if closer == "]":
+            found = path
+        if depth == len(stack) - 1 or not node or not isinstance(node, (list, dict)):
+            break
+        if isinstance(node, list):
+            path, node = f"{path}[{len(node) - 1}]", node[-1]
+        else:
+            key = next(reversed(node))
+            path, node = (f"{path}.{key}" if path else key), node[key]
+    return found
+
+
+def repair_json(text):
+    """
+    Parses LLM JSON output, repairing common defects. Returns (value, repairs,
+    truncated_at) where repairs lists what was fixed and truncated_at is the
+    path of the innermost array still open where truncated text was cut off
+    (None if there was none), or (None, repairs, None) if it can't be parsed.
+    """
+    repairs = []
+    cleaned = FENCE_RE.sub("", text).strip().strip("`").strip()
+    if cleaned != text.strip():
+        repairs.append("code_fence")
+    try:
+        return json.loads(cleaned), repairs, None
+    except json.JSONDecodeError:
+        pass
+
+    starts = [i for i in (cleaned.find("{"), cleaned.find("[")) if i >= 0]
+    if not starts:
+        return None, repairs + ["unparseable"], None
+    if min(starts) > 0:
+        repairs.append("leading_text")
+    cleaned = cleaned[min(starts):]
+
+    end, stack, (cut, cut_stack) = _scan(cleaned)
+    open_stack = []
+    if end is not None:
+        if cleaned[end:].strip():
+            repairs.append("trailing_text")
+        cleaned = cleaned[:end]
+    else:
+        # Truncated: drop the incomplete last element and close what is still open
+        repairs.append("truncated")
+        cleaned = cleaned[:cut].rstrip().rstrip(",") + "".join(reversed(cut_stack))
+        open_stack = cut_stack
+
+    fixed = _strip_trailing_commas(cleaned)
+    if fixed != cleaned:
+        repairs.append("trailing_comma")
+    try:
+        value = json.loads(fixed)
+    except json.JSONDecodeError:
+        return None, repairs + ["unparseable"], None
+    return value, repairs, _open_array_path(value, open_stack)
+
+
+def _empty(schema):
+    default = _EMPTY.get(schema.get("type"), None)
+    return default() if callable(default) else default
+
+
+def conform(value, schema, path="", truncated_at=None):
+    """
+    Fits value to a response_schema: coerces scalars to strings or one-item
+    arrays where the schema asks for them and fills missing optional fields
+    with empty values. If the text was truncated, an incomplete last item of
+    the array open at the cut (repair_json's truncated_at) is dropped. Returns
+    (value, missing) where missing lists the paths of required fields that
+    were absent or null, including those inside array items (filled with
+    empty values so the result is still usable).
+    """
+    kind, missing = schema.get("type"), []
+    if kind == "object":
+        if not isinstance(value, dict):
+            return _empty(schema), [path or "$"]
+        result = dict(value)
+        required = set(schema.get("required", ()))
+        for key, prop in schema.get("properties", {}).items():
+            child = f"{path}.{key}" if path else key
+            if key in value and value[key] is not None:
+                result[key], child_missing = conform(value[key], prop, child, truncated_at)
+                missing += child_missing
+            else:
+                result[key] = _empty(prop)
+                if key in required:
+                    missing.append(child)
+        return result, missing
+    if kind == "array":
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            value = [value]
+        if not isinstance(value, list):
+            return [], [path]
+        items, item_schema = [], schema.get("items", {})
+        for i, item in enumerate(value):
+            item, item_missing = conform(item, item_schema, f"{path}[{i}]", truncated_at)
+            # An incomplete last item of the array open at the cut is where the text was cut
+            # off, so it is dropped; other gaps are left filled with empty values
+            if path == truncated_at and item_missing and i == len(value) - 1 and i > 0:
+                continue
+            items.append(item)
+            missing += item_missing
+        return items, missing
+    if kind == "string" and not isinstance(value, str):
+        return ("" if value is None else json.dumps(value) if isinstance(value, (dict, list)) else str(value)), missing
+    if kind in ("integer", "number") and isinstance(value, str):
+        match = re.search(r"-?\d+(?:\.\d+)?", value)
+        if not match:
+            return 0, [path]
+        number = float(match.group(0))
+        return (round(number) if kind == "integer" else number), missing
+    return value, missing
+
+
+def top_level_fields(missing):
+    """Top-level property names that contain the given missing paths."""
+    fields = []
+    for path in missing:
+        field = re.split(r"[.\[]", path, maxsplit=1)[0]
+        if field and field != "$" and field not in fields:
+            fields.append(field)
+    return fields
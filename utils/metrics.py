@@ -0,0 +1,199 @@
+"""
+Request spans and Prometheus metrics.
+
+`span(name)` times a block of work, records it in a per-stage latency
+histogram and tags it with the current request's ID, set with
+`request_context`. Finished spans are also written as one JSON
+log line each, for a sampled fraction of requests (TRACE_LOG_SAMPLE_RATE,
+decided once per request so a sampled request is logged completely).
+`render_metrics()` returns every metric in the Prometheus text format for
+the /metrics endpoint.
+"""
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+TRACE_LOG_SAMPLE_RATE = float(os.getenv("TRACE_LOG_SAMPLE_RATE", 0.1))
+
+# Seconds; wide enough for both millisecond renders and multi-second LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+span_logger = logging.getLogger("resume.spans")
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+_sampled = contextvars.ContextVar("trace_sampled", default=False)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value):
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    labels = _format_labels(names, key + (_format_value(bound),))
+                    lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("resume_stage_seconds", "Time spent in each pipeline stage", ["stage", "outcome"])
+GEMINI_CALL_SECONDS = Histogram("gemini_call_seconds", "Gemini request latency including retries",
+                                ["model", "outcome"])
+GEMINI_TOKENS = Counter("gemini_tokens_total", "Gemini tokens used", ["model", "kind"])
+GEMINI_RETRIES = Counter("gemini_retries_total", "Gemini calls retried after a rate limit", ["model"])
+GEMINI_BACKOFF_SECONDS = Counter("gemini_backoff_seconds_total", "Seconds slept backing off from Gemini",
+                                 ["model"])
+
+_metrics = [STAGE_SECONDS, GEMINI_CALL_SECONDS, GEMINI_TOKENS, GEMINI_RETRIES, GEMINI_BACKOFF_SECONDS]
+
+
+def register(metric):
+    """Adds a metric to the /metrics output and returns it."""
+    _metrics.append(metric)
+    return metric
+
+
+def render_metrics():
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def current_request_id():
+    return _request_id.get()
+
+
+@contextmanager
+def request_context(request_id=None):
+    """Sets the request ID (a new one if None) and log sampling for the enclosed work."""
+    request_id = request_id or uuid.uuid4().hex
+    id_token = _request_id.set(request_id)
+    sampled_token = _sampled.set(random.random() < TRACE_LOG_SAMPLE_RATE)
+    try:
+        yield request_id
+    finally:
+        _sampled.reset(sampled_token)
+        _request_id.reset(id_token)
+
+
+def context_snapshot():
+    """The current request ID and sampling decision, to carry across threads or event loops."""
+    return _request_id.get(), _sampled.get()
+
+
+@contextmanager
+def restored_context(snapshot):
+    """Re-applies a context_snapshot() for the enclosed work."""
+    request_id, sampled = snapshot
+    id_token = _request_id.set(request_id)
+    sampled_token = _sampled.set(sampled)
+    try:
+        yield
+    finally:
+        _sampled.reset(sampled_token)
+        _request_id.reset(id_token)
+
+
+class Span:
+    """A timed unit of work; attrs are added to its log line."""
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.outcome = "ok"
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+@contextmanager
+def span(name, **attrs):
+    """Times the enclosed block as stage `name`; yields a Span for extra attributes."""
+    current = Span(name, attrs)
+    started = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        current.outcome = "error"
+        current.attrs.setdefault("error", str(e))
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        STAGE_SECONDS.observe(duration, stage=name, outcome=current.outcome)
+        if _sampled.get() or current.outcome == "error":
+            span_logger.info(json.dumps({
+                "request_id": _request_id.get(),
+                "span": name,
+                "duration_ms": round(duration * 1000, 2),
+                "outcome": current.outcome,
+                **current.attrs
+            }, default=str))
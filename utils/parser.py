@@ -1,24 +1,243 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import fitz  # PyMuPDF
+from utils.segmentation import segment_resume, text_lines
+
+# Extraction limits: pages read and characters kept per document (0 disables a cap)
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", 50))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", 200000))
+# Documents with at least this many pages are split across worker processes
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 12))
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", min(4, os.cpu_count() or 1)))
+PDF_TEXT_CACHE_SIZE = int(os.getenv("PDF_TEXT_CACHE_SIZE", 128))
+
+logger = logging.getLogger(__name__)
+
+_text_cache = OrderedDict()
+_text_cache_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Spawned rather than forked: by now the process has threads (the aio loop, job
+                # workers) whose locks a forked child could inherit held
+                _pool = ProcessPoolExecutor(max_workers=PDF_EXTRACT_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _read_pages(doc, start, stop, max_chars):
+    """Returns the text of pages [start, stop), stopping early once max_chars is reached."""
+    parts, total = [], 0
+    for page_num in range(start, stop):
+        page_text = doc.load_page(page_num).get_text()
+        parts.append(page_text)
+        total += len(page_text)
+        if max_chars and total >= max_chars:
+            break
+    return parts
+
+
+def _extract_page_range(path, start, stop, max_chars):
+    # Runs in a worker process, so it opens its own copy of the document
+    with fitz.open(path) as doc:
+        return _read_pages(doc, start, stop, max_chars)
+
+
+def _extract_pdf_bytes(data, max_pages, max_chars):
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        page_count = min(doc.page_count, max_pages) if max_pages else doc.page_count
+        if page_count < PDF_PARALLEL_MIN_PAGES or PDF_EXTRACT_WORKERS < 2:
+            parts = _read_pages(doc, 0, page_count, max_chars)
+        else:
+            parts = None
+
+    if parts is None:
+        parts = _extract_pages_parallel(data, page_count, max_chars)
+
+    # Single join instead of repeated concatenation; form feeds mark page breaks
+    # so utils.compaction can spot running headers and footers
+    text = "\f".join(parts)
+    return text[:max_chars] if max_chars else text
+
+
+def _extract_pages_parallel(data, page_count, max_chars):
+    """
+    Splits the pages across the worker pool. The PDF is written to one temp
+    file that every worker opens, rather than pickled to each of them, and
+    once the ranges read so far reach max_chars the later ones are cancelled.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(data)
+        path = f.name
+    try:
+        chunk = -(-page_count // PDF_EXTRACT_WORKERS)
+        futures = [_get_pool().submit(_extract_page_range, path, start, min(start + chunk, page_count), max_chars)
+                   for start in range(0, page_count, chunk)]
+        parts, total = [], 0
+        for i, future in enumerate(futures):
+            for part in future.result():
+                parts.append(part)
+                total += len(part)
+                if max_chars and total >= max_chars:
+                    for pending in futures[i + 1:]:
+                        pending.cancel()
+                    return parts
+        return parts
+    finally:
+        os.remove(path)
+
+
+def extract_text_from_pdf_bytes(data, max_pages=None, max_chars=None):
+    """
+    Extracts text from PDF bytes. Results are cached by SHA-256 of the bytes,
+    long documents are split across worker processes, and extraction stops
+    after max_pages pages / max_chars characters (PDF_MAX_PAGES / PDF_MAX_CHARS
+    by default).
+    """
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    max_chars = PDF_MAX_CHARS if max_chars is None else max_chars
+    key = (hashlib.sha256(data).hexdigest(), max_pages, max_chars)
+
+    with _text_cache_lock:
+        text = _text_cache.get(key)
+        if text is not None:
+            _text_cache.move_to_end(key)
+            return text
 
-def extract_text_from_pdf(pdf_path):
     text = ""
     try:
-        doc = fitz.open(pdf_path)
-        for page_num in range(doc.page_count):
-            page = doc.load_page(page_num)
-            text += page.get_text()
-        doc.close()
+        text = _extract_pdf_bytes(data, max_pages, max_chars)
     except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
+        logger.warning("Error extracting text from PDF: %s", e)
+        return text
+
+    with _text_cache_lock:
+        _text_cache[key] = text
+        while len(_text_cache) > PDF_TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
     return text
 
+
+def _layout_lines(doc, max_pages):
+    """Text lines with font size, boldness and left edge, for utils.segmentation."""
+    page_count = min(doc.page_count, max_pages) if max_pages else doc.page_count
+    lines = []
+    for page_num in range(page_count):
+        previous = None
+        for block in doc.load_page(page_num).get_text("dict")["blocks"]:
+            for line in block.get("lines", []):
+                spans = [span for span in line["spans"] if span["text"].strip()]
+                if not spans:
+                    continue
+                text = " ".join(span["text"].strip() for span in spans)
+                size = round(max(span["size"] for span in spans), 1)
+                bold = any(span["flags"] & 16 or "bold" in span["font"].lower() for span in spans)
+                x0, y0 = line["bbox"][0], line["bbox"][1]
+                # Text on the same baseline (e.g. a right-aligned date) belongs to the same line
+                if previous is not None and abs(y0 - previous["y0"]) < size / 2:
+                    previous["text"] += " | " + text
+                    previous["bold"] = previous["bold"] or bold
+                    continue
+                previous = {"text": text, "size": size, "bold": bold, "x0": round(x0, 1), "y0": y0}
+                lines.append(previous)
+    return lines
+
+
+def extract_resume_structure_from_pdf_bytes(data, max_pages=None):
+    """
+    Segments a PDF resume into enhancer-schema JSON (see utils.segmentation)
+    using PyMuPDF's font and position data. Cached like extract_text_from_pdf_bytes.
+    """
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    key = ("layout", hashlib.sha256(data).hexdigest(), max_pages)
+
+    with _text_cache_lock:
+        resume = _text_cache.get(key)
+        if resume is not None:
+            _text_cache.move_to_end(key)
+            return resume
+
+    try:
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            resume = segment_resume(_layout_lines(doc, max_pages))
+    except Exception as e:
+        logger.warning("Error segmenting PDF: %s", e)
+        return segment_resume([])
+
+    with _text_cache_lock:
+        _text_cache[key] = resume
+        while len(_text_cache) > PDF_TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+    return resume
+
+
+def extract_text_from_pdf(pdf_path, max_pages=None, max_chars=None):
+    try:
+        with open(pdf_path, 'rb') as f:
+            data = f.read()
+    except Exception as e:
+        logger.warning("Error extracting text from PDF: %s", e)
+        return ""
+    return extract_text_from_pdf_bytes(data, max_pages, max_chars)
+
 def extract_text_from_txt(txt_path):
     text = ""
     try:
         with open(txt_path, 'r', encoding='utf-8') as f:
             text = f.read()
     except Exception as e:
-        print(f"Error extracting text from TXT: {e}")
+        logger.warning("Error extracting text from TXT: %s", e)
     return text
 
+def extract_text(path):
+    """Extracts text from a PDF or TXT file based on its extension."""
+    if path.lower().endswith('.pdf'):
+        return extract_text_from_pdf(path)
+    return extract_text_from_txt(path)
+
+def extract_text_from_upload(filename, source):
+    """
+    Extracts text from an uploaded file held in memory (bytes) or spilled
+    to disk (a path), choosing PDF or TXT handling from the uploaded filename
+    rather than the spill path, whose name went through secure_filename
+    ("简历.pdf" becomes "pdf").
+    """
+    if isinstance(source, str):
+        try:
+            with open(source, 'rb') as f:
+                source = f.read()
+        except Exception as e:
+            logger.warning("Error reading uploaded file: %s", e)
+            return ""
+    if filename.lower().endswith('.pdf'):
+        return extract_text_from_pdf_bytes(source)
+    try:
+        return bytes(source).decode('utf-8')
+    except UnicodeDecodeError as e:
+        logger.warning("Error extracting text from TXT: %s", e)
+        return bytes(source).decode('utf-8', errors='replace')
 
+def extract_resume_structure_from_upload(filename, source):
+    """
+    Layout-aware counterpart of extract_text_from_upload: returns the resume
+    segmented into enhancer-schema JSON. TXT files are segmented from their
+    text alone.
+    """
+    if filename.lower().endswith('.pdf'):
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                source = f.read()
+        return extract_resume_structure_from_pdf_bytes(bytes(source))
+    return segment_resume(text_lines(extract_text_from_upload(filename, source)))
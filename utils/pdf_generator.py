@@ -1,95 +1,227 @@
-from reportlab.lib.pagesizes import letter
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
+from io import BytesIO
+from xml.sax.saxutils import escape
+from utils.resume_document import build_document
 
-def generate_pdf_resume(output_path, resume_json):
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATE = "classic"
+
+# Worker processes for PDF layout; 0 renders on the calling thread
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", min(2, os.cpu_count() or 1)))
+# Renders allowed to wait for a worker before callers block
+PDF_RENDER_QUEUE_DEPTH = int(os.getenv("PDF_RENDER_QUEUE_DEPTH", 8))
+
+
+def build_template(pagesize=letter, margin=50, base_size=11, name_size=18, header_size=14, skills_columns=4):
     """
-    Generates a well-formatted resume PDF from structured JSON.
-    Compatible with experience/education as arrays of objects.
+    Builds a render template: page setup plus every paragraph and table style
+    the resume layout uses. Templates are immutable once built and shared by
+    all renders in the process.
     """
-    doc = SimpleDocTemplate(output_path, pagesize=letter,
-                            rightMargin=50, leftMargin=50,
-                            topMargin=50, bottomMargin=50)
-    
     styles = getSampleStyleSheet()
-    story = []
+    leading = base_size + 3
+    return {
+        "pagesize": pagesize,
+        "margin": margin,
+        "skills_columns": skills_columns,
+        "header": ParagraphStyle('HeaderStyle', parent=styles['Heading2'], fontSize=header_size,
+                                 leading=header_size + 2, spaceBefore=12, spaceAfter=6,
+                                 textColor=colors.HexColor('#222222')),
+        "subheader": ParagraphStyle('SubHeader', parent=styles['Heading3'], fontSize=base_size + 1,
+                                    leading=leading, spaceBefore=6, spaceAfter=2,
+                                    textColor=colors.HexColor('#333333')),
+        "normal": ParagraphStyle('NormalStyle', parent=styles['Normal'], fontSize=base_size, leading=leading,
+                                 textColor=colors.HexColor('#000000')),
+        "bullet": ParagraphStyle('BulletStyle', parent=styles['Normal'], fontSize=base_size, leading=leading,
+                                 leftIndent=14, spaceAfter=2),
+        "name": ParagraphStyle('NameStyle', parent=styles['Heading1'], fontSize=name_size, leading=name_size + 4,
+                               spaceAfter=4, textColor=colors.HexColor('#111111')),
+        "skills_table": TableStyle([('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+                                    ('FONTSIZE', (0, 0), (-1, -1), base_size),
+                                    ('BOTTOMPADDING', (0, 0), (-1, -1), 6)]),
+        "rule_color": colors.HexColor('#cccccc'),
+    }
+
+
+# Built once at import, in the web process and in each render worker
+PDF_TEMPLATES = {
+    "classic": build_template(),
+    "compact": build_template(margin=36, base_size=10, name_size=16, header_size=12, skills_columns=5),
+    "a4": build_template(pagesize=A4),
+}
 
-    # Custom styles
-    header_style = ParagraphStyle('HeaderStyle', parent=styles['Heading2'], fontSize=14, leading=16,
-                                  spaceBefore=12, spaceAfter=6, textColor=colors.HexColor('#222222'))
-    subheader_style = ParagraphStyle('SubHeader', parent=styles['Heading3'], fontSize=12, leading=14,
-                                     spaceBefore=6, spaceAfter=2, textColor=colors.HexColor('#333333'))
-    normal_style = ParagraphStyle('NormalStyle', parent=styles['Normal'], fontSize=11, leading=14,
-                                  textColor=colors.HexColor('#000000'))
-    bullet_style = ParagraphStyle('BulletStyle', parent=styles['Normal'], fontSize=11, leading=14,
-                                  leftIndent=14, spaceAfter=2)
-    name_style = ParagraphStyle('NameStyle', parent=styles['Heading1'], fontSize=18, leading=22,
-                                spaceAfter=4, textColor=colors.HexColor('#111111'))
+
+def generate_pdf_resume(output_path, resume, template=DEFAULT_TEMPLATE):
+    """
+    Generates a well-formatted resume PDF from an enhanced resume (JSON or a
+    ResumeDocument).
+    output_path may be a filesystem path or a writable binary file object;
+    template names an entry of PDF_TEMPLATES. Resume text is escaped, since
+    Paragraph parses what it is given as markup.
+    """
+    document = build_document(resume)
+    t = PDF_TEMPLATES[template]
+    doc = SimpleDocTemplate(output_path, pagesize=t["pagesize"],
+                            rightMargin=t["margin"], leftMargin=t["margin"],
+                            topMargin=t["margin"], bottomMargin=t["margin"])
+
+    story = []
+    header_style, subheader_style, normal_style = t["header"], t["subheader"], t["normal"]
+    bullet_style, name_style = t["bullet"], t["name"]
 
     # Name & Contact
-    if resume_json.get("name"):
-        story.append(Paragraph(resume_json["name"], name_style))
-    if resume_json.get("contact_info"):
-        story.append(Paragraph(resume_json["contact_info"], normal_style))
+    if document.name:
+        story.append(Paragraph(escape(document.name), name_style))
+    if document.contact_info:
+        story.append(Paragraph(escape(document.contact_info), normal_style))
     story.append(Spacer(1, 8))
-    story.append(HRFlowable(width="100%", thickness=1, color=colors.HexColor('#cccccc')))
+    story.append(HRFlowable(width="100%", thickness=1, color=t["rule_color"]))
     story.append(Spacer(1, 8))
 
     # Summary
-    if resume_json.get("summary"):
+    if document.summary:
         story.append(Paragraph("Summary", header_style))
-        story.append(Paragraph(resume_json["summary"], normal_style))
+        story.append(Paragraph(escape(document.summary), normal_style))
         story.append(Spacer(1, 10))
 
-    # Skills
-    if resume_json.get("skills"):
+    # Skills (table cells are drawn as plain text)
+    if document.skills:
         story.append(Paragraph("Skills", header_style))
-        skills = resume_json["skills"]
-        table_data, row = [], []
-        for i, skill in enumerate(skills, 1):
-            row.append(skill)
-            if i % 4 == 0:
-                table_data.append(row)
-                row = []
-        if row:
-            table_data.append(row)
+        columns = t["skills_columns"]
+        table_data = [list(document.skills[i:i + columns]) for i in range(0, len(document.skills), columns)]
         table = Table(table_data, hAlign='LEFT')
-        table.setStyle(TableStyle([('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                                   ('FONTSIZE', (0, 0), (-1, -1), 11),
-                                   ('BOTTOMPADDING', (0, 0), (-1, -1), 6)]))
+        table.setStyle(t["skills_table"])
         story.append(table)
         story.append(Spacer(1, 10))
 
     # Experience
-    if resume_json.get("experience"):
+    if document.experience:
         story.append(Paragraph("Experience", header_style))
-        for exp in resume_json["experience"]:
-            title_line = f"{exp.get('title','')} – {exp.get('company','')} | {exp.get('location','')} ({exp.get('duration','')})"
-            story.append(Paragraph(f"<b>{title_line}</b>", subheader_style))
-            for resp in exp.get("responsibilities", []):
-                story.append(Paragraph(f"• {resp}", bullet_style))
+        for exp in document.experience:
+            story.append(Paragraph(f"<b>{escape(exp.title_line)}</b>", subheader_style))
+            for resp in exp.responsibilities:
+                story.append(Paragraph(f"• {escape(resp)}", bullet_style))
             story.append(Spacer(1, 6))
 
     # Education
-    if resume_json.get("education"):
+    if document.education:
         story.append(Paragraph("Education", header_style))
-        for edu in resume_json["education"]:
-            edu_line = f"{edu.get('degree','')} – {edu.get('institution','')} ({edu.get('graduation_year','')})"
-            story.append(Paragraph(edu_line, normal_style))
+        for edu in document.education:
+            story.append(Paragraph(escape(edu.line), normal_style))
             story.append(Spacer(1, 4))
         story.append(Spacer(1, 10))
 
     # Selected Projects
-    if resume_json.get("selected_projects"):
+    if document.selected_projects:
         story.append(Paragraph("Selected Projects", header_style))
-        for proj in resume_json["selected_projects"]:
-            story.append(Paragraph(proj, normal_style))
+        for proj in document.selected_projects:
+            story.append(Paragraph(escape(proj), normal_style))
             story.append(Spacer(1, 6))
 
     try:
         doc.build(story)
         return True
-    except Exception as e:
-        print(f"Error generating PDF: {e}")
+    except Exception:
+        logger.exception("Error generating PDF")
         return False
+
+
+def render_pdf_resume(resume, template=DEFAULT_TEMPLATE):
+    """Renders the resume PDF in memory and returns its bytes, or None on failure."""
+    buffer = BytesIO()
+    if not generate_pdf_resume(buffer, resume, template):
+        return None
+    return buffer.getvalue()
+
+
+def _timed_render(resume, template):
+    # Runs in a render worker; wall-clock timestamps so the parent can compute queue wait
+    started = time.time()
+    data = render_pdf_resume(resume, template)
+    return data, started, time.time()
+
+
+class RenderPool:
+    """
+    Bounded process pool for PDF layout.
+
+    Keeps reportlab's CPU-bound work off the web worker threads. At most
+    `max_workers` renders run at once and `max_pending` more may queue;
+    further callers block until a slot frees. With max_workers=0 renders run
+    on the calling thread.
+    """
+
+    def __init__(self, max_workers=2, max_pending=8):
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending) if max_workers else None
+        self._lock = threading.Lock()
+        self._stats = {"renders": 0, "failures": 0, "queue_wait_ms_total": 0.0, "queue_wait_ms_max": 0.0,
+                       "render_ms_total": 0.0, "render_ms_max": 0.0}
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    # Spawned rather than forked: web and loop threads are running by now, and a
+                    # forked child could inherit one of their locks held
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                         mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def render(self, resume, template=DEFAULT_TEMPLATE):
+        """Renders in a worker process and returns the PDF bytes, or None on failure."""
+        if template not in PDF_TEMPLATES:
+            raise ValueError(f"Unknown PDF template: {template}")
+        submitted = time.time()
+        if not self.max_workers:
+            data, started, finished = _timed_render(resume, template)
+        else:
+            with self._slots:
+                try:
+                    data, started, finished = self._get_executor().submit(
+                        _timed_render, resume, template).result()
+                except Exception:
+                    logger.exception("Error generating PDF")
+                    data, started, finished = None, submitted, time.time()
+        self._record(data is not None, max(0.0, started - submitted), finished - started)
+        return data
+
+    def _record(self, ok, queue_wait, render_time):
+        queue_wait_ms, render_ms = queue_wait * 1000, render_time * 1000
+        with self._lock:
+            self._stats["renders"] += 1
+            if not ok:
+                self._stats["failures"] += 1
+            self._stats["queue_wait_ms_total"] += queue_wait_ms
+            self._stats["queue_wait_ms_max"] = max(self._stats["queue_wait_ms_max"], queue_wait_ms)
+            self._stats["render_ms_total"] += render_ms
+            self._stats["render_ms_max"] = max(self._stats["render_ms_max"], render_ms)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        renders = stats["renders"] or 1
+        return {
+            "workers": self.max_workers,
+            "renders": stats["renders"],
+            "failures": stats["failures"],
+            "queue_wait_ms_avg": round(stats.pop("queue_wait_ms_total") / renders, 1),
+            "queue_wait_ms_max": round(stats["queue_wait_ms_max"], 1),
+            "render_ms_avg": round(stats.pop("render_ms_total") / renders, 1),
+            "render_ms_max": round(stats["render_ms_max"], 1),
+        }
+
+
+render_pool = RenderPool(max_workers=PDF_RENDER_WORKERS, max_pending=PDF_RENDER_QUEUE_DEPTH)
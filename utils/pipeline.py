@@ -0,0 +1,456 @@
+import asyncio
+import logging
+import os
+import time
+from utils.parser import extract_text_from_upload, extract_resume_structure_from_upload
+from utils.segmentation import has_structure, structured_resume_text
+from utils.enhancer import (get_ats_score, get_ats_score_async, get_suggestions_async, analyze_resume_fused_async,
+                            stream_enhanced_resume_async, regenerate_section_async, SECTION_SCHEMAS)
+from utils.pdf_generator import render_pool, DEFAULT_TEMPLATE
+from utils.enhanced_resume import parse_resume_to_html, render_section_html, experience_entry_html
+from utils.resume_document import build_document
+from utils.scoring import score_resume_local
+from utils import ats_api
+from utils.jd_profile import get_jd_profile
+from utils.artifacts import artifact_store
+from utils.metrics import span
+from utils.compaction import compact_resume
+from utils.aio import run_sync, iterate_sync
+from utils.stages import Stage, StageRun
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_ATS_RESULT = {
+    "overall_match": "N/A",
+    "skills_match": "N/A",
+    "experience_match": "N/A",
+    "education_match": "N/A",
+    "explanations": "Failed to generate ATS score"
+}
+
+# "text" sends the extracted text on as is; "layout" segments the resume locally first
+# (utils.segmentation) and sends compact structured text instead
+RESUME_PARSE_MODE = os.getenv("RESUME_PARSE_MODE", "text")
+
+MODE_STAGED = "staged"
+MODE_FUSED = "fused"
+PIPELINE_MODES = (MODE_STAGED, MODE_FUSED)
+
+# Opt-in: start suggestions from the local score while a remote ATS score is in flight, keeping
+# them if the two overall scores differ by at most PIPELINE_SPECULATION_TOLERANCE points.
+# Costs an extra Gemini call per request, wasted whenever the scores disagree
+PIPELINE_SPECULATE = os.getenv("PIPELINE_SPECULATE", "0") == "1"
+PIPELINE_SPECULATION_TOLERANCE = float(os.getenv("PIPELINE_SPECULATION_TOLERANCE", 10))
+
+SCORER_LLM = "llm"
+SCORER_LOCAL = "local"
+SCORER_SHARPAPI = "sharpapi"
+ATS_SCORERS = (SCORER_LLM, SCORER_LOCAL, SCORER_SHARPAPI)
+
+
+# What a bulk upload does per resume: "score" only, or the whole pipeline through the PDF
+BATCH_SCORE = "score"
+BATCH_ENHANCE = "enhance"
+BATCH_STAGES = (BATCH_SCORE, BATCH_ENHANCE)
+
+# Sections of an enhanced resume that can be regenerated on their own (see regenerate_resume_section)
+EDITABLE_SECTIONS = tuple(SECTION_SCHEMAS)
+
+
+class PipelineError(Exception):
+    """Raised when a stage fails and the request cannot produce a result."""
+
+
+def score_ats(resume_text, job_description_text, scorer=SCORER_LLM, jd_profile=None):
+    """
+    ATS score from Gemini, from the local scoring engine when scorer="local",
+    or from SharpAPI (utils.ats_api) when scorer="sharpapi".
+    """
+    if scorer == SCORER_LOCAL:
+        return score_resume_local(resume_text, job_description_text, jd_profile=jd_profile)
+    if scorer == SCORER_SHARPAPI:
+        result = ats_api.get_ats_score(resume_text.encode("utf-8"), job_description_text)
+        return ats_api.to_ats_result(result) or dict(FALLBACK_ATS_RESULT)
+    return get_ats_score(resume_text, job_description_text) or dict(FALLBACK_ATS_RESULT)
+
+
+def run_pipeline(resume_filename, resume_source, job_description_text, mode=MODE_STAGED, scorer=SCORER_LLM,
+                 template=DEFAULT_TEMPLATE):
+    """
+    Runs the full enhancement chain for one uploaded resume, given as bytes
+    or as the path of a spilled upload (which is removed once read):
+    extraction -> ATS score -> suggestions -> enhanced resume -> HTML + PDF.
+    With mode="fused" the three LLM stages are done in one call, falling back
+    to the per-stage calls if that call fails. With scorer="local" the ATS
+    score comes from utils.scoring instead of Gemini. template names the
+    utils.pdf_generator.PDF_TEMPLATES entry the PDF is rendered with.
+    Returns a dict with everything results.html needs; the rendered PDF is
+    put in utils.artifacts.artifact_store under "pdf_digest".
+    """
+    result = {}
+    for event, data in iter_pipeline(resume_filename, resume_source, job_description_text,
+                                     mode=mode, scorer=scorer, template=template):
+        if event == "done":
+            result = data
+    return result
+
+
+def iter_pipeline(resume_filename, resume_source, job_description_text, mode=MODE_STAGED, scorer=SCORER_LLM,
+                  template=DEFAULT_TEMPLATE):
+    """
+    Generator form of run_pipeline that yields (event, data) as each stage finishes:
+    "extracted", "ats_score", "suggestions", "resume_progress" (while the rewrite
+    streams in), "enhanced_resume", "pdf_ready" and finally "done" with the
+    same dict run_pipeline returns. Raises PipelineError if no resume is produced.
+    Synchronous wrapper around iter_pipeline_async.
+    """
+    yield from iterate_sync(iter_pipeline_async(resume_filename, resume_source, job_description_text,
+                                                mode=mode, scorer=scorer, template=template))
+
+
+async def score_ats_async(resume_text, job_description_text, scorer=SCORER_LLM, jd_profile=None):
+    if scorer == SCORER_LOCAL:
+        return await asyncio.to_thread(score_resume_local, resume_text, job_description_text, jd_profile=jd_profile)
+    if scorer == SCORER_SHARPAPI:
+        result = await ats_api.get_ats_score_async(resume_text.encode("utf-8"), job_description_text)
+        return ats_api.to_ats_result(result) or dict(FALLBACK_ATS_RESULT)
+    return await get_ats_score_async(resume_text, job_description_text) or dict(FALLBACK_ATS_RESULT)
+
+
+def _score_value(ats_result):
+    try:
+        return float(ats_result.get("overall_match"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def speculation_holds(guess, actual):
+    """True when the real ATS score is close enough to the local guess to keep suggestions based on it."""
+    guess_score, actual_score = _score_value(guess), _score_value(actual)
+    if guess_score is None or actual_score is None:
+        return False
+    return abs(guess_score - actual_score) <= PIPELINE_SPECULATION_TOLERANCE
+
+
+async def extract_resume_async(resume_filename, resume_source):
+    """
+    Extracts and compacts the resume text, removing a spilled upload once it
+    is read. Returns (resume_text, compaction stats).
+    """
+    try:
+        with span("extraction", in_memory=not isinstance(resume_source, str)) as current:
+            resume_text = None
+            if RESUME_PARSE_MODE == "layout":
+                structure = await asyncio.to_thread(extract_resume_structure_from_upload, resume_filename,
+                                                    resume_source)
+                current.set(segmented=has_structure(structure))
+                if has_structure(structure):
+                    resume_text = structured_resume_text(structure)
+            if resume_text is None:
+                resume_text = await asyncio.to_thread(extract_text_from_upload, resume_filename, resume_source)
+            current.set(characters=len(resume_text))
+    finally:
+        if isinstance(resume_source, str) and os.path.exists(resume_source):
+            os.remove(resume_source)
+
+    # Shrink the resume once here rather than sending PyMuPDF noise in every prompt
+    with span("compaction") as current:
+        resume_text, compaction = compact_resume(resume_text)
+        current.set(**compaction)
+    return resume_text, compaction
+
+
+def pipeline_stages(resume_filename, resume_source, job_description_text, mode=MODE_STAGED, scorer=SCORER_LLM,
+                    template=DEFAULT_TEMPLATE):
+    """
+    The pipeline as a utils.stages graph. Resume extraction and JD profiling
+    overlap, the HTML preview and the PDF render run side by side, and when
+    the ATS score comes from a remote scorer, suggestions are started
+    speculatively from the local score while it is in flight.
+    """
+    speculate = mode == MODE_STAGED and scorer != SCORER_LOCAL and PIPELINE_SPECULATE
+
+    async def extraction(run):
+        return await extract_resume_async(resume_filename, resume_source)
+
+    async def jd_profile(run):
+        # Reuse the indexed JD profile; prompts use its compacted text so cache keys match
+        with span("jd_profile"):
+            return await asyncio.to_thread(get_jd_profile, job_description_text)
+
+    async def inputs(run):
+        resume_text, compaction = run.results["extraction"]
+        profile = run.results["jd_profile"]
+        tokens_saved = compaction["tokens_saved"] + profile["compaction"]["tokens_saved"]
+        run.emit("extracted", {"characters": len(resume_text), "tokens_saved": tokens_saved})
+        return resume_text, profile["text"]
+
+    async def fused_analysis(run):
+        with span("fused_analysis") as current:
+            fused = await analyze_resume_fused_async(*run.results["inputs"])
+            current.set(fallback=fused is None)
+        return fused
+
+    async def quick_score(run):
+        resume_text, jd_text = run.results["inputs"]
+        with span("quick_score"):
+            return await score_ats_async(resume_text, jd_text, SCORER_LOCAL, run.results["jd_profile"])
+
+    async def speculative_suggestions(run):
+        resume_text, jd_text = run.results["inputs"]
+        with span("suggestions", speculative=True):
+            return await get_suggestions_async(resume_text, jd_text, run.results["quick_score"]) or {}
+
+    async def ats_score(run):
+        fused = run.results.get("fused_analysis")
+        if fused is not None and scorer != SCORER_LOCAL:
+            ats_result = fused[0]
+        else:
+            # ATS scoring (already returns dict, no need for json.loads)
+            resume_text, jd_text = run.results["inputs"]
+            with span("ats_score", scorer=scorer):
+                ats_result = await score_ats_async(resume_text, jd_text, scorer, run.results["jd_profile"])
+        run.emit("ats_score", ats_result)
+        return ats_result
+
+    async def suggestions(run):
+        fused = run.results.get("fused_analysis")
+        ats_result = run.results["ats_score"]
+        suggestions_json = fused[1] if fused is not None else None
+        if suggestions_json is None and speculate:
+            if speculation_holds(run.results.get("quick_score"), ats_result):
+                try:
+                    suggestions_json = await run.take("speculative_suggestions")
+                except Exception as e:
+                    logger.warning("Speculative suggestions failed: %s", e)
+            else:
+                run.cancel("speculative_suggestions")
+        if suggestions_json is None:
+            resume_text, jd_text = run.results["inputs"]
+            with span("suggestions"):
+                suggestions_json = await get_suggestions_async(resume_text, jd_text, ats_result) or {}
+        run.emit("suggestions", suggestions_json)
+        return suggestions_json
+
+    async def enhanced_resume(run):
+        fused = run.results.get("fused_analysis")
+        if fused is not None:
+            enhanced_resume_json = fused[2]
+        else:
+            # Enhanced resume (expects ats_result dict, not string), streamed so progress can be reported
+            resume_text, jd_text = run.results["inputs"]
+            enhanced_resume_json, received = None, 0
+            async for kind, value in stream_enhanced_resume_async(resume_text, jd_text, run.results["ats_score"],
+                                                                  run.results["suggestions"]):
+                if kind == "chunk":
+                    received += len(value)
+                    run.emit("resume_progress", {"characters": received})
+                else:
+                    enhanced_resume_json = value
+        if not isinstance(enhanced_resume_json, dict):
+            raise PipelineError('Failed to generate enhanced resume')
+        return enhanced_resume_json
+
+    async def resume_document(run):
+        # Normalised once; both renderers take the same document
+        return build_document(run.results["enhanced_resume"])
+
+    async def html_render(run):
+        # Convert to HTML for preview
+        with span("html_render"):
+            enhanced_resume_html = await asyncio.to_thread(parse_resume_to_html, run.results["resume_document"])
+        run.emit("enhanced_resume", {"html": enhanced_resume_html})
+        return enhanced_resume_html
+
+    async def pdf_render(run):
+        # Identical resumes share one stored PDF, so this only renders new content;
+        # layout runs in the render process pool, off this thread
+        with span("pdf_render", template=template) as current:
+            pdf_digest = await asyncio.to_thread(artifact_store.put_rendered, run.results["resume_document"],
+                                                 render_pool.render, template)
+            if pdf_digest is None:
+                current.outcome = "error"
+        run.emit("pdf_ready", {"pdf_generated": pdf_digest is not None})
+        return pdf_digest
+
+    stages = [
+        Stage("extraction", extraction),
+        Stage("jd_profile", jd_profile),
+        Stage("inputs", inputs, deps=("extraction", "jd_profile")),
+    ]
+    if mode == MODE_FUSED:
+        stages.append(Stage("fused_analysis", fused_analysis, deps=("inputs",)))
+    if speculate:
+        stages += [
+            Stage("quick_score", quick_score, deps=("inputs",)),
+            Stage("speculative_suggestions", speculative_suggestions, deps=("quick_score",), speculative=True),
+        ]
+    score_deps = ("fused_analysis",) if mode == MODE_FUSED else ("inputs",)
+    suggestion_deps = ("ats_score", "quick_score") if speculate else ("ats_score",)
+    stages += [
+        Stage("ats_score", ats_score, deps=score_deps),
+        Stage("suggestions", suggestions, deps=suggestion_deps),
+        Stage("enhanced_resume", enhanced_resume, deps=("suggestions",)),
+        Stage("resume_document", resume_document, deps=("enhanced_resume",)),
+        Stage("html_render", html_render, deps=("resume_document",)),
+        Stage("pdf_render", pdf_render, deps=("resume_document",)),
+    ]
+    return stages
+
+
+async def iter_pipeline_async(resume_filename, resume_source, job_description_text, mode=MODE_STAGED,
+                              scorer=SCORER_LLM, template=DEFAULT_TEMPLATE):
+    """
+    Async generator behind iter_pipeline. LLM calls are awaited, so one event
+    loop can drive many pipelines at once; CPU-bound stages run in threads,
+    and independent stages run concurrently (see pipeline_stages).
+    """
+    run = StageRun(pipeline_stages(resume_filename, resume_source, job_description_text,
+                                   mode=mode, scorer=scorer, template=template))
+    async for event, data in run.events():
+        yield event, data
+
+    pdf_digest = run.results["pdf_render"]
+    yield "done", {
+        "ats_result": run.results["ats_score"],
+        "suggestions": run.results["suggestions"],
+        "enhanced_resume": run.results["html_render"],
+        "enhanced_resume_json": run.results["enhanced_resume"],
+        "pdf_generated": pdf_digest is not None,
+        "pdf_digest": pdf_digest,
+        "jd_profile_id": run.results["jd_profile"]["id"],
+        "critical_path": run.record_critical_path()
+    }
+
+
+async def process_candidate_async(index, entry, jd_profile, stage=BATCH_SCORE, mode=MODE_STAGED,
+                                  scorer=SCORER_LOCAL, template=DEFAULT_TEMPLATE):
+    """
+    Processes one entry of a bulk upload (see utils.archive) against the
+    batch's JD profile and returns a JSON-safe result. With stage="enhance"
+    the result carries the pipeline's suggestions, enhanced resume JSON and
+    pdf_digest as well as the ATS result.
+    """
+    started = time.perf_counter()
+    result = {"index": index, "filename": entry["filename"]}
+    try:
+        if "error" in entry:
+            raise PipelineError(entry["error"])
+        if stage == BATCH_ENHANCE:
+            done = {}
+            async for event, data in iter_pipeline_async(entry["filename"], entry["data"], jd_profile["text"],
+                                                         mode=mode, scorer=scorer, template=template):
+                if event == "done":
+                    done = data
+            result.update({key: done[key] for key in ("ats_result", "suggestions", "enhanced_resume_json",
+                                                      "pdf_generated", "pdf_digest")})
+        else:
+            resume_text, compaction = await extract_resume_async(entry["filename"], entry["data"])
+            with span("ats_score", scorer=scorer):
+                result["ats_result"] = await score_ats_async(resume_text, jd_profile["text"], scorer, jd_profile)
+            result["tokens_saved"] = compaction["tokens_saved"]
+    except Exception as e:
+        result["error"] = str(e)
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def iter_batch(entries, job_description_text, stage=BATCH_SCORE, mode=MODE_STAGED, scorer=SCORER_LOCAL,
+               template=DEFAULT_TEMPLATE, max_concurrency=4):
+    """Synchronous wrapper around iter_batch_async."""
+    yield from iterate_sync(iter_batch_async(entries, job_description_text, stage=stage, mode=mode, scorer=scorer,
+                                             template=template, max_concurrency=max_concurrency))
+
+
+async def iter_batch_async(entries, job_description_text, stage=BATCH_SCORE, mode=MODE_STAGED, scorer=SCORER_LOCAL,
+                           template=DEFAULT_TEMPLATE, max_concurrency=4):
+    """
+    Runs process_candidate_async over a bulk upload's entries, at most
+    max_concurrency at once, yielding each result as soon as it finishes.
+    The JD is profiled once for the whole batch. entries is a blocking
+    iterator (utils.archive) that is only advanced when a slot frees, so
+    no more than max_concurrency resumes are held in memory at a time.
+    """
+    jd_profile = await asyncio.to_thread(get_jd_profile, job_description_text)
+    entries = iter(entries)
+    pending, index, exhausted = set(), 0, False
+    try:
+        while True:
+            while not exhausted and len(pending) < max_concurrency:
+                # Reading (and decompressing) an entry blocks, so it runs in a worker thread
+                entry = await asyncio.to_thread(next, entries, None)
+                if entry is None:
+                    exhausted = True
+                    break
+                pending.add(asyncio.create_task(process_candidate_async(index, entry, jd_profile, stage=stage,
+                                                                        mode=mode, scorer=scorer,
+                                                                        template=template)))
+                index += 1
+            if not pending:
+                return
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+def regenerate_resume_section(enhanced_resume_json, section, jd_profile=None, index=None, instructions="",
+                              template=DEFAULT_TEMPLATE):
+    return run_sync(regenerate_resume_section_async(enhanced_resume_json, section, jd_profile, index, instructions,
+                                                    template))
+
+
+async def regenerate_resume_section_async(enhanced_resume_json, section, jd_profile=None, index=None,
+                                          instructions="", template=DEFAULT_TEMPLATE):
+    """
+    Rewrites one section of an existing enhanced resume (one entry of
+    "experience", chosen by index) instead of regenerating the whole resume.
+    The prompt carries only that section, a little surrounding context and
+    the JD profile's skills. section_html is just the changed section, so a
+    preview can be patched in place, and the PDF store renders only resumes
+    it hasn't seen. Returns the updated resume JSON, section_html, the full
+    html and the pdf_digest. Raises PipelineError if regeneration fails.
+    """
+    target = None
+    if jd_profile is not None:
+        target = {key: jd_profile[key] for key in ("required_skills", "preferred_skills", "seniority",
+                                                    "required_years")}
+
+    with span("section_regeneration", section=section) as current:
+        value = await regenerate_section_async(enhanced_resume_json, section, target, index, instructions)
+        if value is None:
+            current.outcome = "error"
+            raise PipelineError(f"Failed to regenerate {section}")
+
+    updated = dict(enhanced_resume_json)
+    if section == "experience":
+        updated["experience"] = list(updated["experience"])
+        updated["experience"][index] = value
+    else:
+        updated[section] = value
+
+    document = build_document(updated)
+    if section == "experience":
+        section_html = experience_entry_html(value)
+    else:
+        section_html = render_section_html(document, section)
+    with span("html_render"):
+        enhanced_resume_html = parse_resume_to_html(document)
+    with span("pdf_render", template=template) as current:
+        pdf_digest = await asyncio.to_thread(artifact_store.put_rendered, document, render_pool.render, template)
+        if pdf_digest is None:
+            current.outcome = "error"
+
+    return {
+        "enhanced_resume_json": updated,
+        "section": section,
+        "index": index,
+        "section_html": section_html,
+        "enhanced_resume": enhanced_resume_html,
+        "pdf_generated": pdf_digest is not None,
+        "pdf_digest": pdf_digest
+    }
@@ -0,0 +1,179 @@
+"""
+Shared rate limiting for Gemini calls.
+
+`RateLimiter` keeps two token buckets, one for requests per minute and one
+for LLM tokens per minute, and makes callers wait until both have budget
+instead of firing requests that will be rejected. When the API does reject
+a call, `pause()` stops every caller until the retry delay has passed, so
+workers back off together rather than each retrying on its own schedule.
+
+State is process-wide by default. Set `state_path` to share the buckets
+between processes on one host (e.g. gunicorn workers or the batch CLI's
+pool): the state lives in a small JSON file guarded by an exclusive
+`flock`. The file is read and locked in a worker thread, so a caller waiting
+for the lock doesn't stall the event loop.
+"""
+import asyncio
+import fcntl
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from utils.metrics import Counter, Histogram, register
+
+# Longest single sleep while waiting, so a pause lifted early is noticed promptly
+MAX_WAIT_SLICE = 1.0
+
+RETRY_HINT_RES = [
+    re.compile(r"retry[_ ]delay\s*\{\s*seconds:\s*(\d+(?:\.\d+)?)", re.I),
+    re.compile(r"retry (?:in|after) (\d+(?:\.\d+)?)\s*s", re.I),
+]
+
+RATE_LIMIT_WAIT_SECONDS = register(Histogram("rate_limit_wait_seconds",
+                                             "Time calls waited for rate-limit budget", ["limiter"]))
+RATE_LIMIT_PAUSES = register(Counter("rate_limit_pauses_total",
+                                     "Times a rate-limit rejection paused all callers", ["limiter"]))
+
+
+def retry_hint(error):
+    """Server-suggested retry delay in seconds from an API error, or None."""
+    delay = getattr(error, "retry_after", None)
+    if isinstance(delay, (int, float)):
+        return float(delay)
+    text = str(error)
+    for pattern in RETRY_HINT_RES:
+        match = pattern.search(text)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def backoff_delay(attempt, base_delay=1.0, max_delay=60.0):
+    """Exponential backoff with full jitter: uniform in [0, base * 2**attempt], capped."""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute token buckets with a shared pause."""
+
+    def __init__(self, name, requests_per_minute, tokens_per_minute, state_path=None):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._state = self._initial_state()
+        if state_path:
+            os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+
+    def _initial_state(self):
+        return {"requests": float(self.requests_per_minute), "tokens": float(self.tokens_per_minute),
+                "updated": time.time(), "paused_until": 0.0}
+
+    @contextmanager
+    def _locked_state(self):
+        with self._lock:
+            if not self.state_path:
+                yield self._state
+                return
+            with open(self.state_path, "a+", encoding="utf-8") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    try:
+                        state = json.loads(f.read() or "null") or self._initial_state()
+                    except ValueError:
+                        state = self._initial_state()
+                    yield state
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(state))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refill(self, state, now):
+        elapsed = max(0.0, now - state["updated"])
+        state["requests"] = min(float(self.requests_per_minute),
+                                state["requests"] + elapsed * self.requests_per_minute / 60)
+        state["tokens"] = min(float(self.tokens_per_minute),
+                              state["tokens"] + elapsed * self.tokens_per_minute / 60)
+        state["updated"] = now
+
+    def _try_acquire(self, tokens):
+        """Takes the budget and returns 0, or returns the seconds to wait before trying again."""
+        with self._locked_state() as state:
+            now = time.time()
+            self._refill(state, now)
+            wait = max(state["paused_until"] - now,
+                       (1 - state["requests"]) * 60 / self.requests_per_minute,
+                       (tokens - state["tokens"]) * 60 / self.tokens_per_minute)
+            if wait > 0:
+                return min(wait, MAX_WAIT_SLICE)
+            state["requests"] -= 1
+            state["tokens"] -= tokens
+            return 0
+
+    async def _call(self, func, *args):
+        # The shared file means a blocking flock and file I/O, which must stay off the event
+        # loop; process-local state only takes a short thread lock
+        if self.state_path:
+            return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+        return func(*args)
+
+    async def acquire_async(self, tokens=0):
+        """
+        Waits until one request and `tokens` tokens are available, takes them,
+        and returns the seconds spent waiting.
+        """
+        tokens = min(tokens, self.tokens_per_minute)
+        started = time.time()
+        while True:
+            wait = await self._call(self._try_acquire, tokens)
+            if not wait:
+                break
+            await asyncio.sleep(wait)
+        waited = time.time() - started
+        RATE_LIMIT_WAIT_SECONDS.observe(waited, limiter=self.name)
+        return waited
+
+    def _debit(self, tokens):
+        with self._locked_state() as state:
+            self._refill(state, time.time())
+            state["tokens"] -= tokens
+
+    async def debit_async(self, tokens):
+        """Charges tokens used beyond the estimate passed to acquire_async (may go negative)."""
+        if tokens:
+            await self._call(self._debit, tokens)
+
+    def _pause(self, seconds):
+        with self._locked_state() as state:
+            state["paused_until"] = max(state["paused_until"], time.time() + seconds)
+
+    async def pause_async(self, seconds):
+        """Makes every caller wait at least `seconds` before the next request."""
+        await self._call(self._pause, seconds)
+        RATE_LIMIT_PAUSES.inc(limiter=self.name)
+
+    def stats(self):
+        with self._locked_state() as state:
+            self._refill(state, time.time())
+            return {
+                "requests_available": round(state["requests"], 2),
+                "tokens_available": round(state["tokens"]),
+                "paused_for_s": round(max(0.0, state["paused_until"] - time.time()), 2),
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+            }
+
+
+gemini_limiter = RateLimiter(
+    "gemini",
+    requests_per_minute=int(os.getenv("GEMINI_RPM", 60)),
+    tokens_per_minute=int(os.getenv("GEMINI_TPM", 1000000)),
+    state_path=os.getenv("GEMINI_RATE_LIMIT_STATE") or None
+)
@@ -0,0 +1,131 @@
+"""
+Normalised resume document shared by the HTML and PDF renderers.
+
+The enhancer's JSON is loose: fields may be missing, None, numbers or
+padded with whitespace, and lists may hold blanks. `build_document`
+cleans it up once into a `ResumeDocument` (plain strings and tuples in
+slotted objects), so utils.enhanced_resume and utils.pdf_generator render
+the same content without each re-walking and re-checking the JSON. Title
+lines are composed here rather than in each renderer.
+
+`document.digest` is a content hash of the normalised document. Renderers
+memoize their output by it, and utils.artifacts stores PDFs under it, so two
+JSON payloads that normalise to the same document render once.
+"""
+from utils.cache import make_cache_key
+
+
+def _text(value):
+    return "" if value is None else str(value).strip()
+
+
+def _items(values):
+    if isinstance(values, (str, int, float)):
+        values = [values]
+    if not isinstance(values, (list, tuple)):
+        return ()
+    return tuple(text for text in (_text(value) for value in values) if text)
+
+
+class ExperienceEntry:
+    __slots__ = ("title", "company", "location", "duration", "responsibilities")
+
+    def __init__(self, title="", company="", location="", duration="", responsibilities=()):
+        self.title = title
+        self.company = company
+        self.location = location
+        self.duration = duration
+        self.responsibilities = responsibilities
+
+    @classmethod
+    def from_json(cls, exp):
+        if isinstance(exp, cls):
+            return exp
+        exp = exp if isinstance(exp, dict) else {"title": exp}
+        return cls(_text(exp.get("title")), _text(exp.get("company")), _text(exp.get("location")),
+                   _text(exp.get("duration")), _items(exp.get("responsibilities")))
+
+    @property
+    def title_line(self):
+        return f"{self.title} – {self.company} | {self.location} ({self.duration})"
+
+    def to_json(self):
+        return {"title": self.title, "company": self.company, "location": self.location,
+                "duration": self.duration, "responsibilities": list(self.responsibilities)}
+
+
+class EducationEntry:
+    __slots__ = ("degree", "institution", "graduation_year")
+
+    def __init__(self, degree="", institution="", graduation_year=""):
+        self.degree = degree
+        self.institution = institution
+        self.graduation_year = graduation_year
+
+    @classmethod
+    def from_json(cls, edu):
+        if isinstance(edu, cls):
+            return edu
+        edu = edu if isinstance(edu, dict) else {"degree": edu}
+        return cls(_text(edu.get("degree")), _text(edu.get("institution")), _text(edu.get("graduation_year")))
+
+    @property
+    def line(self):
+        return f"{self.degree} – {self.institution} ({self.graduation_year})"
+
+    def to_json(self):
+        return {"degree": self.degree, "institution": self.institution, "graduation_year": self.graduation_year}
+
+
+class ResumeDocument:
+    """An enhanced resume, normalised once and shared by every renderer."""
+
+    __slots__ = ("name", "contact_info", "summary", "skills", "experience", "education", "selected_projects",
+                 "digest")
+
+    def __init__(self, name="", contact_info="", summary="", skills=(), experience=(), education=(),
+                 selected_projects=()):
+        self.name = name
+        self.contact_info = contact_info
+        self.summary = summary
+        self.skills = skills
+        self.experience = experience
+        self.education = education
+        self.selected_projects = selected_projects
+        self.digest = make_cache_key(self.to_json())
+
+    def to_json(self):
+        return {
+            "name": self.name,
+            "contact_info": self.contact_info,
+            "summary": self.summary,
+            "skills": list(self.skills),
+            "experience": [exp.to_json() for exp in self.experience],
+            "education": [edu.to_json() for edu in self.education],
+            "selected_projects": list(self.selected_projects)
+        }
+
+
+def _entries(values, entry_cls):
+    if not isinstance(values, (list, tuple)):
+        return ()
+    return tuple(entry_cls.from_json(value) for value in values if value)
+
+
+def build_document(resume_json):
+    """
+    Normalises enhanced resume JSON into a ResumeDocument; a ResumeDocument
+    is returned as is.
+    """
+    if isinstance(resume_json, ResumeDocument):
+        return resume_json
+    resume_json = resume_json or {}
+    return ResumeDocument(
+        name=_text(resume_json.get("name")),
+        contact_info=_text(resume_json.get("contact_info")),
+        summary=_text(resume_json.get("summary")),
+        skills=_items(resume_json.get("skills")),
+        experience=_entries(resume_json.get("experience"), ExperienceEntry),
+        education=_entries(resume_json.get("education"), EducationEntry),
+        selected_projects=_items(resume_json.get("selected_projects"))
+    )
@@ -0,0 +1,241 @@
+"""
+Local, deterministic ATS scorer.
+
+Produces the same keys as utils.enhancer.get_ats_score without an API call,
+by combining BM25-weighted term overlap against the job description, a
+skill/synonym taxonomy and section-aware weights for the resume.
+"""
+import math
+import re
+from collections import Counter
+from datetime import date
+from utils.skill_matcher import get_matcher
+
+TOKEN_RE = re.compile(r"(?<![a-z0-9])\.?[a-z0-9](?:[a-z0-9+#.]*[a-z0-9+#])?")
+
+STOPWORDS = frozenset("""
+a about above across after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each etc few for from further had has
+have having he her here hers him his how i if in into is it its itself just me more most my no nor not
+of off on once only or other our ours out over own same she should so some such than that the their them
+then there these they this those through to too under until up very was we were what when where which
+while who whom why will with would you your yours us within across including include includes strong
+ability able work working team teams role candidate candidates looking join new plus preferred required
+requirements responsibilities qualifications experience years year
+""".split())
+
+# Heading text (lowercased, without trailing colon) -> canonical section
+SECTION_HEADINGS = {
+    "summary": "summary", "professional summary": "summary", "profile": "summary",
+    "objective": "summary", "about me": "summary", "career objective": "summary",
+    "skills": "skills", "technical skills": "skills", "core competencies": "skills",
+    "key skills": "skills", "technologies": "skills", "tools": "skills",
+    "experience": "experience", "work experience": "experience", "professional experience": "experience",
+    "employment": "experience", "employment history": "experience", "work history": "experience",
+    "education": "education", "academic background": "education", "certifications": "education",
+    "education and certifications": "education",
+    "projects": "projects", "selected projects": "projects", "personal projects": "projects",
+}
+
+# How much a term occurrence counts, by the resume section it appears in
+SECTION_WEIGHTS = {
+    "experience": 1.2,
+    "skills": 1.0,
+    "projects": 0.9,
+    "summary": 0.8,
+    "education": 0.6,
+    "other": 0.5,
+}
+
+# Sub-score weights for overall_match
+OVERALL_WEIGHTS = {"skills": 0.4, "experience": 0.25, "education": 0.1, "lexical": 0.25}
+
+EDUCATION_LEVELS = [
+    (4, re.compile(r"\b(ph\.?d|doctorate|doctoral)\b")),
+    (3, re.compile(r"\b(master'?s?|m\.s\.?|msc|m\.sc|mba|m\.tech|meng)\b")),
+    (2, re.compile(r"\b(bachelor'?s?|b\.s\.?|bsc|b\.sc|b\.tech|b\.e\.?|ba|undergraduate degree)\b")),
+    (1, re.compile(r"\b(associate'?s?)\b")),
+]
+
+YEARS_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:years|yrs)")
+DATE_RANGE_RE = re.compile(r"((?:19|20)\d{2})\s*(?:-|–|—|to)\s*((?:19|20)\d{2}|present|current|now)")
+
+# BM25 parameters; AVG_RESUME_TOKENS is a typical one-to-two page resume
+BM25_K1 = 1.2
+BM25_B = 0.75
+AVG_RESUME_TOKENS = 450
+
+
+def tokenize(text):
+    """Lowercased word tokens, keeping skill punctuation such as c++, c#, node.js."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def content_terms(tokens):
+    return [t for t in tokens if t not in STOPWORDS and not t.isdigit() and len(t) > 1]
+
+
+def find_skills(text, matcher=None):
+    """Returns Counter of canonical taxonomy skills found in text."""
+    matcher = matcher or get_matcher()
+    return Counter({skill: entry["count"] for skill, entry in matcher.match(text).items()})
+
+
+def split_sections(text):
+    """Splits resume text into {section: text} using common heading lines."""
+    sections = {}
+    current = "other"
+    for line in text.splitlines():
+        heading = line.strip().strip(":").strip().lower()
+        if heading in SECTION_HEADINGS and len(heading.split()) <= 4:
+            current = SECTION_HEADINGS[heading]
+            continue
+        sections.setdefault(current, []).append(line)
+    return {name: "\n".join(lines) for name, lines in sections.items()}
+
+
+def jd_term_weights(job_description_text):
+    """
+    TF-IDF style weights for job description terms. Lines of the JD act as the
+    documents, so terms repeated across many requirement lines weigh more than
+    boilerplate that appears once.
+    """
+    lines = [content_terms(tokenize(line)) for line in job_description_text.splitlines()]
+    lines = [line for line in lines if line]
+    if not lines:
+        return {}
+    tf = Counter(t for line in lines for t in line)
+    df = Counter(t for line in lines for t in set(line))
+    n = len(lines)
+    return {t: (1 + math.log(count)) * math.log(1 + n / df[t]) for t, count in tf.items()}
+
+
+def bm25_match(term_weights, section_terms):
+    """
+    Weighted BM25 overlap between the JD terms and resume sections, scaled 0-1.
+    section_terms maps section name -> list of content terms.
+    """
+    if not term_weights:
+        return 0.0
+    weighted_tf = Counter()
+    length = 0
+    for section, terms in section_terms.items():
+        weight = SECTION_WEIGHTS.get(section, SECTION_WEIGHTS["other"])
+        length += len(terms)
+        for t in terms:
+            if t in term_weights:
+                weighted_tf[t] += weight
+
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / AVG_RESUME_TOKENS)
+    # A term mentioned twice (in an average-weight section) counts as a full match
+    saturated = 2 * (BM25_K1 + 1) / (2 + norm)
+    score = sum(w * min(1.0, (weighted_tf[t] * (BM25_K1 + 1)) / (weighted_tf[t] + norm) / saturated)
+                for t, w in term_weights.items() if weighted_tf[t])
+    return score / sum(term_weights.values())
+
+
+def education_level(text):
+    lowered = text.lower()
+    for level, pattern in EDUCATION_LEVELS:
+        if pattern.search(lowered):
+            return level
+    return 0
+
+
+def required_years(job_description_text):
+    years = [int(y) for y in YEARS_RE.findall(job_description_text.lower())]
+    return max(years) if years else None
+
+
+def resume_years(resume_text):
+    """Years of experience from date ranges (overlaps merged), or stated 'N years'."""
+    lowered = resume_text.lower()
+    current_year = date.today().year
+    spans = []
+    for start, end in DATE_RANGE_RE.findall(lowered):
+        end_year = current_year if end in ("present", "current", "now") else int(end)
+        if end_year >= int(start):
+            spans.append((int(start), end_year))
+
+    total, last_end = 0, None
+    for start, end in sorted(spans):
+        if last_end is not None and start < last_end:
+            start = last_end
+        if end > start:
+            total += end - start
+        last_end = max(end, last_end or end)
+
+    stated = [int(y) for y in YEARS_RE.findall(lowered)]
+    return max([total] + stated)
+
+
+def score_resume_local(resume_text, job_description_text, matcher=None, jd_profile=None):
+    """
+    Scores a resume against a job description locally.
+    Pass a precomputed utils.jd_profile profile to skip all JD-side work.
+    Returns overall_match, skills_match, experience_match, education_match
+    (0-100), explanations, plus matched_skills and missing_skills.
+    """
+    if jd_profile is not None:
+        term_weights = jd_profile["term_weights"]
+        jd_skills = Counter(jd_profile["skill_counts"])
+        needed = jd_profile["required_years"]
+        needed_level = jd_profile["education_level"]
+    else:
+        term_weights = jd_term_weights(job_description_text)
+        jd_skills = find_skills(job_description_text, matcher)
+        needed = required_years(job_description_text)
+        needed_level = education_level(job_description_text)
+
+    sections = split_sections(resume_text)
+    section_terms = {name: content_terms(tokenize(text)) for name, text in sections.items()}
+    lexical = bm25_match(term_weights, section_terms)
+
+    # Skills: taxonomy skills the JD asks for, weighted by how often it mentions them
+    resume_skills = find_skills(resume_text, matcher)
+    matched = [s for s in jd_skills if s in resume_skills]
+    missing = [s for s in jd_skills if s not in resume_skills]
+    if jd_skills:
+        total = sum(1 + math.log(c) for c in jd_skills.values())
+        skills = sum(1 + math.log(jd_skills[s]) for s in matched) / total
+    else:
+        skills = lexical
+
+    # Experience: years against the JD requirement, plus relevance of the experience section
+    have = resume_years(sections.get("experience", resume_text))
+    if needed:
+        years_fit = min(1.0, have / needed)
+    else:
+        years_fit = 1.0 if have or "experience" in sections else 0.5
+    experience_relevance = bm25_match(term_weights, {"experience": section_terms.get("experience", [])})
+    experience = 0.6 * years_fit + 0.4 * min(1.0, experience_relevance * 1.5)
+
+    # Education: degree level against the JD requirement
+    have_level = education_level(sections.get("education", resume_text))
+    if needed_level:
+        education = min(1.0, have_level / needed_level)
+    else:
+        education = 1.0 if have_level else 0.5
+
+    overall = (OVERALL_WEIGHTS["skills"] * skills + OVERALL_WEIGHTS["experience"] * experience
+               + OVERALL_WEIGHTS["education"] * education + OVERALL_WEIGHTS["lexical"] * lexical)
+
+    explanations = (
+        f"Skills: {len(matched)} of {len(jd_skills)} skills from the job description found"
+        + (f"; missing {', '.join(missing)}." if missing else ".")
+        + f" Experience: about {have} years"
+        + (f" against {needed}+ required." if needed else " (no minimum stated).")
+        + f" Education: degree level {have_level}"
+        + (f" against {needed_level} required." if needed_level else " (no requirement stated).")
+        + f" Keyword overlap with the job description: {round(lexical * 100)}%."
+    )
+
+    return {
+        "overall_match": round(overall * 100),
+        "skills_match": round(skills * 100),
+        "experience_match": round(experience * 100),
+        "education_match": round(education * 100),
+        "explanations": explanations,
+        "matched_skills": matched,
+        "missing_skills": missing,
+    }
@@ -0,0 +1,270 @@
+"""
+Local resume segmentation.
+
+Splits a resume into the same structure the enhancer's ENHANCED_RESUME_SCHEMA
+uses (name, contact_info, summary, skills, experience entries, education,
+selected_projects), plus any other sections under "other_sections", without
+calling an LLM. `segment_resume` works on lines carrying layout hints (font
+size, bold, left edge) from utils.parser's PyMuPDF reader; plain text lines
+work too, with headings found by name and capitalisation alone.
+
+`structured_resume_text` turns the result back into compact, consistently
+labelled text for prompts and utils.scoring.
+"""
+import re
+from collections import Counter
+from utils.scoring import SECTION_HEADINGS
+
+# Heading text -> output key; certifications don't fit the education entry shape
+HEADING_SECTIONS = {heading: "selected_projects" if section == "projects" else section
+                    for heading, section in SECTION_HEADINGS.items() if heading != "certifications"}
+SECTION_TITLES = {"summary": "Summary", "skills": "Skills", "experience": "Experience",
+                  "education": "Education", "selected_projects": "Selected Projects"}
+
+# A heading set in a font at least this much larger than the body text
+HEADING_SIZE_RATIO = 1.15
+# Continuation lines indented further than this (points) past the entry's left edge are bullets
+BULLET_INDENT = 8
+
+BULLET_RE = re.compile(r"^[•●▪◦‣⁃∙·*\-–]\s+")
+MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+DATE = rf"(?:{MONTH}\s+)?(?:\d{{1,2}}/)?(?:19|20)\d{{2}}"
+DATE_RANGE_RE = re.compile(rf"\(?\s*{DATE}\s*(?:-|–|—|to)\s*(?:{DATE}|present|current|now)\s*\)?", re.I)
+SINGLE_DATE_RE = re.compile(rf"\(?\s*\b{DATE}\b\s*\)?", re.I)
+YEAR_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+CONTACT_RE = re.compile(r"@|\+?\d[\d\s().-]{7,}\d|https?://|www\.|linkedin|github", re.I)
+# "Contact Information:" and similar, as a heading or as a label in front of the details
+CONTACT_HEADINGS = {"contact", "contact information", "contact info", "contact details"}
+CONTACT_LABEL_RE = re.compile(r"^\s*contact(?:\s+(?:information|info|details))?\s*:\s*", re.I)
+FIELD_SPLIT_RE = re.compile(r"\s+[|–—-]\s+|\s*\|\s*|,\s+|\s+at\s+")
+SKILL_SPLIT_RE = re.compile(r"\s*[,;|•·]\s*")
+INSTITUTION_RE = re.compile(r"universit|college|institut|school|academy|polytechnic", re.I)
+DEGREE_RE = re.compile(r"\b(bachelor|master|b\.?\s?sc|m\.?\s?sc|b\.?\s?s\.?|m\.?\s?s\.?|b\.?\s?a\.?|m\.?\s?a\.?|"
+                       r"ph\.?\s?d|mba|b\.?\s?tech|m\.?\s?tech|b\.?\s?e\.?|m\.?\s?eng|associate|diploma|degree)\b",
+                       re.I)
+
+
+def text_lines(text):
+    """Plain text as line dicts without layout hints."""
+    return [{"text": line.strip(), "size": None, "bold": False, "x0": None}
+            for line in text.replace("\f", "\n").split("\n") if line.strip()]
+
+
+def _body_size(lines):
+    sizes = Counter()
+    for line in lines:
+        if line["size"]:
+            sizes[line["size"]] += len(line["text"])
+    return sizes.most_common(1)[0][0] if sizes else None
+
+
+def _heading_key(text):
+    return re.sub(r"[^a-z& ]+", "", text.lower()).strip()
+
+
+def _heading(line, body_size):
+    """(section key, title) if the line is a section heading, else None."""
+    text = line["text"].strip()
+    words = text.rstrip(":").split()
+    if not words or len(words) > 5 or text.endswith((".", ",")) or YEAR_RE.search(text):
+        return None
+    key = _heading_key(text)
+    if key in CONTACT_HEADINGS:
+        return "contact", text.rstrip(":")
+    if key in HEADING_SECTIONS:
+        return HEADING_SECTIONS[key], text.rstrip(":")
+    larger = body_size and line["size"] and line["size"] >= body_size * HEADING_SIZE_RATIO
+    if (larger or (text.isupper() and len(text) > 3)) and text[0].isalpha():
+        return "other", text.rstrip(":").title()
+    return None
+
+
+def _is_bullet(line, left):
+    if BULLET_RE.match(line["text"]):
+        return True
+    return left is not None and line["x0"] is not None and line["x0"] > left + BULLET_INDENT
+
+
+def _strip_bullet(text):
+    return BULLET_RE.sub("", text).strip()
+
+
+def _split_duration(text):
+    """(text without its date range, the date range or "")."""
+    match = DATE_RANGE_RE.search(text) or SINGLE_DATE_RE.search(text)
+    if not match:
+        return text, ""
+    duration = match.group(0).strip().strip("()").strip()
+    rest = (text[:match.start()] + " " + text[match.end():]).strip()
+    return re.sub(r"\s*[|,–—-]\s*$|^\s*[|,–—-]\s*", "", rest).strip(), duration
+
+
+def _fields(text):
+    return [part.strip(" ,;") for part in FIELD_SPLIT_RE.split(text) if part.strip(" ,;")]
+
+
+def _parse_experience(lines):
+    entries, current, left = [], None, None
+    for line in lines:
+        bullet = current is not None and _is_bullet(line, left)
+        if bullet:
+            current["responsibilities"].append(_strip_bullet(line["text"]))
+            continue
+        continuation = (current is not None and current["responsibilities"] and not line["bold"]
+                        and not DATE_RANGE_RE.search(line["text"])
+                        and (line["text"][0].islower() or not current["responsibilities"][-1].endswith(".")))
+        if continuation and not (left is not None and line["x0"] is not None and line["x0"] <= left):
+            current["responsibilities"][-1] += " " + line["text"]
+            continue
+        if current is None or current["responsibilities"]:
+            current = {"header": [], "responsibilities": []}
+            entries.append(current)
+            left = line["x0"]
+        current["header"].append(line["text"])
+
+    experience = []
+    for entry in entries:
+        header, duration = _split_duration(" | ".join(entry["header"]))
+        parts = _fields(header)
+        experience.append({
+            "title": parts[0] if parts else "",
+            "company": parts[1] if len(parts) > 1 else "",
+            "location": ", ".join(parts[2:]),
+            "duration": duration,
+            "responsibilities": entry["responsibilities"]
+        })
+    return experience
+
+
+def _education_fields(parts):
+    """
+    (degree, institution) from an education line's parts. Parts that match
+    neither stay with the field they follow ("University of California,
+    Berkeley"), or with the degree if they come first.
+    """
+    fields = {"degree": [], "institution": []}
+    target = "degree"
+    for part in parts:
+        if not fields["institution"] and INSTITUTION_RE.search(part):
+            target = "institution"
+        elif not fields["degree"] and DEGREE_RE.search(part):
+            target = "degree"
+        fields[target].append(part)
+    return ", ".join(fields["degree"]), ", ".join(fields["institution"])
+
+
+def _parse_education(lines):
+    education = []
+    for line in lines:
+        text = _strip_bullet(line["text"])
+        years = YEAR_RE.findall(text)
+        degree, institution = _education_fields(_fields(YEAR_RE.sub("", text).strip(" ()")))
+        current = education[-1] if education else None
+        # Entries often span lines (degree on one, institution and year on the next)
+        if current and not (degree and current["degree"]) and not (institution and current["institution"]):
+            current["degree"] = current["degree"] or degree
+            current["institution"] = current["institution"] or institution
+            current["graduation_year"] = current["graduation_year"] or (years[-1] if years else "")
+            continue
+        education.append({"degree": degree, "institution": institution,
+                          "graduation_year": years[-1] if years else ""})
+    return education
+
+
+def _parse_skills(lines):
+    skills, seen = [], set()
+    for line in lines:
+        text = _strip_bullet(line["text"])
+        label, sep, rest = text.partition(":")
+        if sep and len(label.split()) <= 4:
+            text = rest
+        for skill in SKILL_SPLIT_RE.split(text):
+            skill = skill.strip(" .")
+            if skill and skill.lower() not in seen:
+                seen.add(skill.lower())
+                skills.append(skill)
+    return skills
+
+
+def _parse_items(lines):
+    """Bulleted or one-per-line items, with wrapped lines joined back on."""
+    items = []
+    for line in lines:
+        text = line["text"]
+        if items and not BULLET_RE.match(text) and (text[0].islower() or not items[-1].endswith(".")) \
+                and any(BULLET_RE.match(other["text"]) for other in lines):
+            items[-1] += " " + text
+        else:
+            items.append(_strip_bullet(text))
+    return items
+
+
+def segment_resume(lines):
+    """Segments resume lines (see text_lines) into enhancer-schema JSON plus "other_sections"."""
+    body_size = _body_size(lines)
+    sections, order, preamble = {}, [], []
+    current = None
+    for line in lines:
+        heading = _heading(line, body_size)
+        # The name is usually the largest (or all-caps) line, so the first line is never an "other" heading
+        if heading is not None and heading[0] == "other" and current is None and not preamble:
+            heading = None
+        if heading is not None:
+            key, title = heading
+            current = key if key != "other" else ("other", title)
+            if current not in sections:
+                sections[current] = []
+                order.append(current)
+            continue
+        if current is None:
+            preamble.append(line)
+        else:
+            sections[current].append(line)
+
+    name, top = "", None
+    if preamble:
+        sized = [line for line in preamble[:5]
+                 if not CONTACT_RE.search(line["text"]) and not CONTACT_LABEL_RE.match(line["text"])]
+        top = max(sized, key=lambda line: line["size"] or 0) if sized else None
+        name = top["text"] if top else ""
+    contact = [CONTACT_LABEL_RE.sub("", line["text"]).strip()
+               for line in preamble + sections.get("contact", []) if line is not top]
+
+    return {
+        "name": name,
+        "contact_info": " | ".join(item for item in contact if item),
+        "summary": " ".join(line["text"] for line in sections.get("summary", [])),
+        "skills": _parse_skills(sections.get("skills", [])),
+        "experience": _parse_experience(sections.get("experience", [])),
+        "education": _parse_education(sections.get("education", [])),
+        "selected_projects": _parse_items(sections.get("selected_projects", [])),
+        "other_sections": {key[1]: _parse_items(sections[key]) for key in order if isinstance(key, tuple)},
+    }
+
+
+def has_structure(resume):
+    """True if segmentation found any of the main sections."""
+    return any(resume.get(key) for key in ("summary", "skills", "experience", "education"))
+
+
+def structured_resume_text(resume):
+    """Compact, consistently labelled text for a segmented resume."""
+    lines = [resume.get("name", ""), resume.get("contact_info", "")]
+    if resume.get("summary"):
+        lines += ["", SECTION_TITLES["summary"], resume["summary"]]
+    if resume.get("skills"):
+        lines += ["", SECTION_TITLES["skills"], ", ".join(resume["skills"])]
+    if resume.get("experience"):
+        lines += ["", SECTION_TITLES["experience"]]
+        for exp in resume["experience"]:
+            lines.append(" | ".join(exp[key] for key in ("title", "company", "location", "duration") if exp[key]))
+            lines += [f"- {item}" for item in exp["responsibilities"]]
+    if resume.get("education"):
+        lines += ["", SECTION_TITLES["education"]]
+        lines += [", ".join(edu[key] for key in ("degree", "institution", "graduation_year") if edu[key])
+                  for edu in resume["education"]]
+    if resume.get("selected_projects"):
+        lines += ["", SECTION_TITLES["selected_projects"]] + [f"- {item}" for item in resume["selected_projects"]]
+    for title, items in resume.get("other_sections", {}).items():
+        lines += ["", title] + [f"- {item}" for item in items]
+    return "\n".join(line for line in lines if line is not None).strip()
@@ -0,0 +1,143 @@
+"""
+Aho-Corasick multi-pattern skill matcher.
+
+Compiles every skill name and alias of a taxonomy into one automaton, so a
+document is scanned once regardless of taxonomy size. Matches respect word
+boundaries ("java" does not match inside "javascript") and runs of
+whitespace in the text match a single space in a pattern.
+"""
+import json
+import os
+import threading
+from collections import deque
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(__file__), "data", "skill_taxonomy.json")
+
+# Characters that continue a word; '+' and '#' so "c" doesn't match inside "c++" or "c#"
+WORD_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789+#")
+WHITESPACE_TABLE = str.maketrans({c: " " for c in "\t\n\r\f\v "})
+
+
+def normalize(text):
+    """Lowercases text and maps all whitespace to spaces without changing its length."""
+    return text.lower().translate(WHITESPACE_TABLE)
+
+
+def load_taxonomy(path=None):
+    """Loads a {canonical skill: [aliases]} taxonomy from JSON."""
+    path = path or os.getenv("SKILL_TAXONOMY_PATH", DEFAULT_TAXONOMY_PATH)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class SkillMatcher:
+    """
+    Matches the skills of a {canonical: [aliases]} taxonomy in text.
+
+    Build once and share: the automaton is read-only after construction, so
+    one instance can serve every request thread (and forked workers).
+    """
+
+    def __init__(self, taxonomy):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self._patterns = []  # (canonical, pattern length)
+
+        for canonical, aliases in taxonomy.items():
+            for alias in [canonical] + list(aliases):
+                pattern = " ".join(normalize(alias).split())
+                if pattern:
+                    self._add(pattern, canonical)
+        self._build_failure_links()
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def _add(self, pattern, canonical):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = nxt
+        self._output[state].append(len(self._patterns))
+        self._patterns.append((canonical, len(pattern)))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def _scan(self, text):
+        """Yields (start, end, canonical) for every boundary-respecting match."""
+        goto, fail, output, patterns = self._goto, self._fail, self._output, self._patterns
+        state = 0
+        # Each entry is the original index of a pattern character, so matches
+        # that span collapsed whitespace can be mapped back to the text
+        positions = deque(maxlen=max((n for _, n in patterns), default=1))
+        prev = " "
+        for i, ch in enumerate(text):
+            if ch == " " and prev == " ":
+                continue
+            prev = ch
+            positions.append(i)
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pattern_id in output[state]:
+                canonical, length = patterns[pattern_id]
+                start = positions[-length]
+                end = i + 1
+                if start > 0 and text[start - 1] in WORD_CHARS and text[start] in WORD_CHARS:
+                    continue
+                if end < len(text) and text[end] in WORD_CHARS and text[end - 1] in WORD_CHARS:
+                    continue
+                yield start, end, canonical
+
+    def find(self, text):
+        """
+        Returns non-overlapping matches as (canonical, start, end) in text order.
+        Where matches overlap, the leftmost and then longest one wins.
+        """
+        matches = sorted(self._scan(normalize(text)), key=lambda m: (m[0], -(m[1] - m[0])))
+        selected, last_end = [], -1
+        for start, end, canonical in matches:
+            if start >= last_end:
+                selected.append((canonical, start, end))
+                last_end = end
+        return selected
+
+    def match(self, text):
+        """Returns {canonical: {"count": n, "positions": [(start, end), ...]}}."""
+        found = {}
+        for canonical, start, end in self.find(text):
+            entry = found.setdefault(canonical, {"count": 0, "positions": []})
+            entry["count"] += 1
+            entry["positions"].append((start, end))
+        return found
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher():
+    """Process-wide matcher for the configured taxonomy, compiled on first use."""
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = SkillMatcher(load_taxonomy())
+    return _matcher
@@ -0,0 +1,152 @@
+"""
+Stage graph executor for the upload pipeline.
+
+A pipeline is a list of `Stage`s: named coroutines, each started as soon as
+the stages it depends on have finished, so independent stages overlap.
+Stages read earlier results from `run.results` and report progress with
+`run.emit(event, data)`; iterating `run.events()` yields those events as
+they happen and raises if a stage fails.
+
+A speculative stage starts early on a guess (e.g. suggestions from the local
+score while the LLM score is still in flight). Nothing depends on it
+directly: a later stage either uses its result with `await run.take(name)`
+or drops it with `run.cancel(name)`, and any still running when the graph
+finishes are cancelled.
+
+When the run ends, `critical_path()` walks back from the last stage to
+finish through whichever dependency finished last, giving the chain of
+stages that set the request's latency. The time spent in each is added to
+pipeline_critical_path_seconds_total.
+"""
+import asyncio
+import contextvars
+import time
+from utils.metrics import Counter, register
+
+CRITICAL_PATH_SECONDS = register(Counter("pipeline_critical_path_seconds_total",
+                                         "Seconds each stage spent on a request's critical path", ["stage"]))
+
+_current_stage = contextvars.ContextVar("current_stage", default=None)
+
+
+class Stage:
+    """A named async function of the StageRun, started once `deps` have finished."""
+
+    def __init__(self, name, func, deps=(), speculative=False):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.speculative = speculative
+
+
+class StageRun:
+    """One execution of a stage graph."""
+
+    def __init__(self, stages):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage {stage.name!r} depends on unknown stage {dep!r}")
+                if self.stages[dep].speculative:
+                    raise ValueError(f"Stage {stage.name!r} must take() speculative stage {dep!r}, not depend on it")
+        self.results = {}
+        self.timings = {}  # name -> (started, finished), perf_counter seconds
+        self.cancelled = set()
+        self._errors = {}
+        self._taken = {}  # name -> stages it took speculative results from
+        self._tasks = {}
+        self._queue = None
+
+    def emit(self, event, data):
+        """Reports an (event, data) pair to whoever is iterating events()."""
+        self._queue.put_nowait(("event", event, data))
+
+    async def take(self, name):
+        """Waits for a speculative stage and returns its result (raising its error)."""
+        caller = _current_stage.get()
+        if caller is not None:
+            self._taken.setdefault(caller, []).append(name)
+        await asyncio.wait([self._tasks[name]])
+        if name in self._errors:
+            raise self._errors[name]
+        return self.results[name]
+
+    def cancel(self, name):
+        """Abandons a speculative stage."""
+        task = self._tasks.get(name)
+        if task is not None and not task.done():
+            task.cancel()
+            self.cancelled.add(name)
+
+    async def _run_stage(self, stage):
+        _current_stage.set(stage.name)
+        started = time.perf_counter()
+        error = None
+        try:
+            self.results[stage.name] = await stage.func(self)
+        except asyncio.CancelledError:
+            self.cancelled.add(stage.name)
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            self.timings[stage.name] = (started, time.perf_counter())
+        if stage.speculative:
+            # A failed guess is the consumer's problem (see take), not the run's
+            if error is not None:
+                self._errors[stage.name] = error
+            error = None
+        self._queue.put_nowait(("done", stage.name, error))
+
+    def _start_ready(self):
+        for stage in self.stages.values():
+            if stage.name not in self._tasks and all(dep in self.results for dep in stage.deps):
+                self._tasks[stage.name] = asyncio.create_task(self._run_stage(stage))
+
+    async def events(self):
+        """Runs the graph, yielding emitted (event, data) pairs until every non-speculative stage is done."""
+        self._queue = asyncio.Queue()
+        # Counted from "done" messages rather than results, so events queued ahead of them aren't lost
+        remaining = {name for name, stage in self.stages.items() if not stage.speculative}
+        try:
+            self._start_ready()
+            while remaining:
+                item = await self._queue.get()
+                if item[0] == "event":
+                    yield item[1], item[2]
+                    continue
+                _, name, error = item
+                if error is not None:
+                    raise error
+                remaining.discard(name)
+                self._start_ready()
+        finally:
+            pending = [task for task in self._tasks.values() if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def critical_path(self):
+        """[(stage, seconds)] along the chain of stages that determined total latency."""
+        finished = {name: times for name, times in self.timings.items() if name not in self.cancelled}
+        required = [name for name in finished if not self.stages[name].speculative]
+        if not required:
+            return []
+        name = max(required, key=lambda n: finished[n][1])
+        path = []
+        while name is not None:
+            started, ended = finished[name]
+            path.append((name, round(ended - started, 4)))
+            preds = [n for n in self.stages[name].deps + tuple(self._taken.get(name, ())) if n in finished]
+            name = max(preds, key=lambda n: finished[n][1]) if preds else None
+        path.reverse()
+        return path
+
+    def record_critical_path(self):
+        """Adds the critical path to the metrics and returns it as a list of dicts."""
+        path = self.critical_path()
+        for name, seconds in path:
+            CRITICAL_PATH_SECONDS.inc(seconds, stage=name)
+        return [{"stage": name, "seconds": seconds} for name, seconds in path]
@@ -0,0 +1,75 @@
+"""
+Shared HTTP transport.
+
+`get_session()` returns one process-wide `requests.Session` whose
+connections are kept alive and pooled per host, so repeat calls to the same
+API skip the TCP and TLS handshake. Pool sizes can be set per host
+(HTTP_POOL_SIZES="api.apyhub.com=20,other.host=4"); other hosts get
+HTTP_POOL_MAXSIZE. Every request made through `request()` has connect and
+read timeouts unless the caller passes its own.
+"""
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 30))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 10))
+
+
+def _parse_pool_sizes(value):
+    sizes = {}
+    for item in value.split(","):
+        host, _, size = item.partition("=")
+        if host.strip() and size.strip():
+            sizes[host.strip().lower()] = int(size)
+    return sizes
+
+
+HTTP_POOL_SIZES = _parse_pool_sizes(os.getenv("HTTP_POOL_SIZES", ""))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # Pooled sockets would be shared with the parent; the child opens its own
+    global _session
+    _session = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_session():
+    """The process-wide keep-alive session."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_MAXSIZE, pool_maxsize=HTTP_POOL_MAXSIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                # Longer prefixes win, so configured hosts get their own pool
+                for host, size in HTTP_POOL_SIZES.items():
+                    host_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+                    session.mount(f"https://{host}/", host_adapter)
+                    session.mount(f"http://{host}/", host_adapter)
+                _session = session
+    return _session
+
+
+def request(method, url, **kwargs):
+    """requests.request over the pooled session, with default (connect, read) timeouts."""
+    kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)